@@ -0,0 +1,55 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Builds synthetic encrypted inboxes the same way the reusable.email server does:
+an AES key wrapped with RSA-OAEP (SHA-256) and the email JSON encrypted with AES-CFB.
+"""
+
+import base64
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+
+def encrypt_email(email: dict, public_key_pem: bytes) -> dict:
+  """Encrypt an email dict into the server's encrypted email payload."""
+  public_key = serialization.load_pem_public_key(public_key_pem)
+  aes_key = os.urandom(32)
+  iv = os.urandom(16)
+  encryptor = Cipher(algorithms.AES(aes_key), modes.CFB(iv)).encryptor()
+  data = encryptor.update(json.dumps(email).encode('utf-8')) + encryptor.finalize()
+  wrapped_key = public_key.encrypt(
+    aes_key,
+    padding.OAEP(
+      mgf=padding.MGF1(algorithm=hashes.SHA256()),
+      algorithm=hashes.SHA256(),
+      label=None
+    )
+  )
+  return {
+    'encrypted_aes_key': base64.b64encode(wrapped_key).decode('ascii'),
+    'encrypted_iv': base64.b64encode(iv).decode('ascii'),
+    'encrypted_email_data': base64.b64encode(data).decode('ascii'),
+  }
+
+
+def synthetic_email(index: int, body_size: int = 2048) -> dict:
+  """Build a plain email dict with a body of roughly body_size characters."""
+  return {
+    'id': f'{index:016x}',
+    'subject': f'Verification code #{index}',
+    'sender': 'Example <noreply@example.com>',
+    'timestamp': 1734448240.0 + index,
+    'body': ('Your code is 123456. ' * (body_size // 21 + 1))[:body_size],
+  }
+
+
+def synthetic_encrypted_inbox(count: int, public_key_pem: bytes, body_size: int = 2048) -> list:
+  """Build a list of encrypted email payloads."""
+  return [encrypt_email(synthetic_email(i, body_size), public_key_pem) for i in range(count)]
@@ -0,0 +1,43 @@
+"""
+Per-email decrypt latency: re-parsing the PEM per email vs. a cached Decryptor.
+
+Usage: python benchmarks/decrypt.py [count]
+"""
+
+import sys
+import time
+
+from common import synthetic_encrypted_inbox
+
+from reusable.email import crypto
+
+
+def decrypt_reparse(encrypted_email: dict, pem: str):
+  """The pre-Decryptor behaviour: load the PEM for every email."""
+  return crypto.Decryptor(pem).decrypt(encrypted_email)
+
+
+def main(count: int = 500) -> None:
+  public_key, private_key = crypto.generate_keys()
+  pem = private_key.decode('utf-8')
+  inbox = synthetic_encrypted_inbox(count, public_key)
+
+  start = time.perf_counter()
+  for email in inbox:
+    decrypt_reparse(email, pem)
+  before = (time.perf_counter() - start) / count
+
+  crypto.clear_decryptor_cache()
+  start = time.perf_counter()
+  for email in inbox:
+    crypto.decrypt_email(email, pem)
+  after = (time.perf_counter() - start) / count
+
+  print(f"emails: {count}")
+  print(f"re-parse PEM per email: {before * 1e6:9.1f} us/email")
+  print(f"cached Decryptor:       {after * 1e6:9.1f} us/email")
+  print(f"speedup:                {before / after:9.2f}x")
+
+
+if __name__ == '__main__':
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,39 @@
+"""
+Batch decrypt throughput: calling thread vs. thread pool vs. process pool.
+
+Usage: python benchmarks/decrypt_batch.py [count] [workers]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from common import synthetic_encrypted_inbox
+
+from reusable.email import crypto
+
+
+def run(label: str, inbox: list, pem: bytes, executor=None) -> None:
+  start = time.perf_counter()
+  crypto.decrypt_emails(inbox, pem, executor)
+  elapsed = time.perf_counter() - start
+  print(f"{label:<24} {len(inbox) / elapsed:9.1f} emails/s")
+
+
+def main(count: int = 2000, workers: int = os.cpu_count() or 1) -> None:
+  public_key, private_key = crypto.generate_keys()
+  inbox = synthetic_encrypted_inbox(count, public_key)
+  print(f"emails: {count}, workers: {workers}")
+
+  run("calling thread", inbox, private_key)
+  with ThreadPoolExecutor(workers) as executor:
+    run("thread pool", inbox, private_key, executor)
+  with ProcessPoolExecutor(workers) as executor:
+    # Warm the workers so the one-off PEM parse per worker is not measured
+    crypto.decrypt_emails(inbox[:workers * 4], private_key, executor)
+    run("process pool", inbox, private_key, executor)
+
+
+if __name__ == '__main__':
+  main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,54 @@
+"""
+Decrypt time and peak allocation for large emails: the copying path vs. `Decryptor.decrypt`.
+
+Usage: python benchmarks/decrypt_large.py [size in MB]
+"""
+
+import base64
+import sys
+import time
+import tracemalloc
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from common import encrypt_email, synthetic_email
+
+from reusable.email import crypto
+from reusable.email.types import Email
+
+
+def decrypt_copying(decryptor: crypto.Decryptor, encrypted_email: dict) -> Email:
+  """The previous behaviour: decode into new bytes and concatenate update() and finalize()."""
+  aes_key = decryptor.private_key.decrypt(base64.b64decode(encrypted_email['encrypted_aes_key']), decryptor.padding)
+  iv = base64.b64decode(encrypted_email['encrypted_iv'])
+  data = base64.b64decode(encrypted_email['encrypted_email_data'])
+  context = Cipher(algorithms.AES(aes_key), modes.CFB(iv)).decryptor()
+  return Email.from_json(context.update(data) + context.finalize())
+
+
+def measure(function, *args):
+  tracemalloc.start()
+  start = time.perf_counter()
+  result = function(*args)
+  elapsed = time.perf_counter() - start
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return result, elapsed, peak
+
+
+def main(size_mb: float = 8) -> None:
+  public_key, private_key = crypto.generate_keys()
+  decryptor = crypto.get_decryptor(private_key)
+  encrypted_email = encrypt_email(synthetic_email(0, int(size_mb * 1024 * 1024)), public_key)
+
+  before, before_time, before_peak = measure(decrypt_copying, decryptor, encrypted_email)
+  after, after_time, after_peak = measure(decryptor.decrypt, encrypted_email)
+  assert before.body == after.body
+
+  print(f"body: {size_mb} MB")
+  print(f"copying decrypt:  {before_time * 1e3:8.1f} ms  peak {before_peak / 2 ** 20:7.1f} MB")
+  print(f"Decryptor:        {after_time * 1e3:8.1f} ms  peak {after_peak / 2 ** 20:7.1f} MB")
+
+
+if __name__ == '__main__':
+  main(float(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,64 @@
+"""
+Email construction: the old dict-backed class built through a json.dumps/json.loads
+round trip per email vs. the slotted Email built straight from the parsed response.
+
+Usage: python benchmarks/email_types.py [count]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+from common import synthetic_email
+
+from reusable.email.types import Email, FrozenEmail
+
+
+class DictEmail:
+  """The pre-__slots__ Email, kept here for comparison."""
+
+  def __init__(self, id, subject, sender, timestamp, body):
+    self.id = id
+    self.subject = subject
+    self.sender = sender
+    self.timestamp = timestamp
+    self.body = body
+
+  @classmethod
+  def from_json(cls, data):
+    email_json = json.loads(data)
+    return cls(
+      id=email_json.get('id', None),
+      subject=email_json.get('subject', None),
+      sender=email_json.get('sender', None),
+      timestamp=email_json.get('timestamp', None),
+      body=email_json.get('body', None)
+    )
+
+
+def measure(label: str, build, payload: list) -> None:
+  start = time.perf_counter()
+  build(payload)
+  elapsed = time.perf_counter() - start
+
+  tracemalloc.start()
+  inbox = build(payload)
+  # Bodies and strings are shared with the payload, so this is the per-object overhead
+  size, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del inbox
+  print(f"{label:<34} {len(payload) / elapsed:12.0f} emails/s {size / len(payload):8.1f} B/email")
+
+
+def main(count: int = 100_000) -> None:
+  payload = json.loads(json.dumps({'inbox': [synthetic_email(i, 256) for i in range(count)]}))['inbox']
+  print(f"emails: {count}")
+  measure("dict class via json round trip", lambda p: [DictEmail.from_json(json.dumps(e)) for e in p], payload)
+  measure("slotted Email.from_dict", lambda p: [Email.from_dict(e) for e in p], payload)
+  measure("slotted Email.from_dicts", Email.from_dicts, payload)
+  measure("FrozenEmail.from_dicts", FrozenEmail.from_dicts, payload)
+
+
+if __name__ == '__main__':
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,99 @@
+"""
+Code and link extraction throughput over realistic HTML and plain text emails.
+
+Compares a straightforward pass over `html.parser` output against the `Extractor`'s
+one-regex HTML stripping, cold, memoized and on a process pool.
+
+Usage: python benchmarks/extract.py [count] [workers]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+from reusable.email.extract import DEFAULT_RULES, Extractor
+from reusable.email.types import Email
+
+FILLER = (
+  "Thanks for signing up. If you did not request this, you can safely ignore this message. "
+  "Questions? Reply to this email or visit our help center, we're available 24/7. "
+  "Order #482913 shipped on 2024-03-14 for $129.99 to 221B Baker Street, London. "
+)
+
+TEMPLATES = (
+  "<html><head><style>.btn{{color:#fff}}</style></head><body><table><tr><td><h1>Confirm your email</h1>"
+  "<p>{filler}</p><a class=\"btn\" href=\"https://app.example.com/confirm?token={token}\">Confirm</a>"
+  "<p>{filler}</p><p>Unsubscribe at <a href=\"https://example.com/unsub\">https://example.com/unsub</a></p>"
+  "</td></tr></table></body></html>",
+  "<div style=\"font-family:Arial\"><p>Your verification code is <strong>{code}</strong>.</p>"
+  "<p>It expires in 10 minutes.</p><p>{filler}</p><p>&copy; Example Inc.</p></div>",
+  "Hi,\n\nUse {code} as your one-time passcode to sign in.\n\n{filler}\n\nhttps://example.com/security\n",
+  "Welcome!\n\n{filler}\nActivate your account: https://example.org/activate/{token}\n\nThe team",
+)
+
+
+def synthetic_emails(count: int, seed: int = 0) -> list:
+  rng = random.Random(seed)
+  emails = []
+  for i in range(count):
+    template = TEMPLATES[i % len(TEMPLATES)]
+    body = template.format(
+      filler=FILLER * rng.randint(1, 6), code=f"{rng.randrange(10**6):06d}", token=f"{rng.getrandbits(64):016x}"
+    )
+    emails.append(Email(f"email-{i}", "Your account", "noreply@example.com", 1700000000 + i, body))
+  return emails
+
+
+class _Text(HTMLParser):
+  def __init__(self) -> None:
+    super().__init__()
+    self.parts = []
+
+  def handle_starttag(self, tag, attrs) -> None:
+    self.parts.extend(value for name, value in attrs if name == 'href' and value)
+
+  def handle_data(self, data) -> None:
+    self.parts.append(data)
+
+
+def naive(emails: list) -> list:
+  """The same rules over text from a full HTML parse."""
+  patterns = [(rule, re.compile(rule.pattern)) for rule in DEFAULT_RULES]
+  results = []
+  for email in emails:
+    parser = _Text()
+    parser.feed(email.body)
+    text = f"{email.subject}\n" + " ".join(parser.parts)
+    results.append([(rule.name, m.group('value') if 'value' in p.groupindex else m.group()) for rule, p in patterns for m in p.finditer(text)])
+  return results
+
+
+def run(label: str, count: int, function) -> None:
+  start = time.perf_counter()
+  function()
+  elapsed = time.perf_counter() - start
+  print(f"{label:<24} {count / elapsed:11.1f} emails/s")
+
+
+def main(count: int = 5000, workers: int = os.cpu_count() or 1) -> None:
+  emails = synthetic_emails(count)
+  size = sum(len(email.body) for email in emails) / count
+  print(f"emails: {count}, mean body: {size:.0f} chars, workers: {workers}")
+
+  run("per-rule + HTMLParser", count, lambda: naive(emails))
+  extractor = Extractor(cache_size=count)
+  run("extractor, cold", count, lambda: extractor.extract_many(emails))
+  run("extractor, memoized", count, lambda: extractor.extract_many(emails))
+  with ProcessPoolExecutor(workers) as executor:
+    extractor = Extractor(cache_size=count)
+    # Warm the workers so process start-up is not measured
+    Extractor(cache_size=0).extract_many(emails[:workers * 4], executor)
+    run("extractor, process pool", count, lambda: extractor.extract_many(emails, executor))
+
+
+if __name__ == '__main__':
+  main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,101 @@
+"""
+Cold-start cost of the package: import time and which heavy dependencies get loaded.
+
+Every scenario runs in fresh interpreters under ``python -X importtime``. Reports the
+median time to run the scenario, the heavy dependencies it loaded and its slowest
+imports. With ``--max-ms``, exits with status 1 if ``import reusable.email`` got slower,
+so it can guard cold start in CI.
+
+Usage: python benchmarks/import_time.py [--runs 5] [--max-ms 50] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY = ('requests', 'aiohttp', 'cryptography', 'httpx', 'sqlite3')
+
+SCENARIOS = {
+  'import reusable.email': "import reusable.email",
+  'Sync client': "from reusable.email import Sync; Sync('key')",
+  'Async client': "from reusable.email import Async; Async('key')",
+  'generate_keys': "from reusable.email import generate_keys",
+}
+
+# Runs the statement, then reports its wall time and the heavy modules it loaded
+PROBE = """
+import sys, time
+sys.stderr.write('-- probe --\\n')
+sys.stderr.flush()
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run_once(statement: str) -> Tuple[float, List[str], List[Tuple[int, str]]]:
+  """Run a statement in a fresh interpreter. Returns seconds, heavy modules loaded and (cumulative us, module) per import."""
+  env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+  result = subprocess.run(
+    [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', PROBE.format(statement=statement, heavy=HEAVY)],
+    capture_output=True, text=True, env=env, check=True
+  )
+  elapsed, _, loaded = result.stdout.strip().rpartition('\n')[2].partition(' ')
+  imports = []
+  # Only the imports after the marker belong to the statement, not to interpreter startup
+  for line in result.stderr.partition('-- probe --\n')[2].splitlines():
+    if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+      _, cumulative, name = line[len('import time:'):].split('|')
+      imports.append((int(cumulative), name.strip()))
+  return float(elapsed), [m for m in loaded.split(',') if m], imports
+
+
+def measure(name: str, statement: str, runs: int) -> Dict[str, object]:
+  times = []
+  slowest: Dict[str, int] = {}
+  for _ in range(runs):
+    elapsed, loaded, imports = run_once(statement)
+    times.append(elapsed)
+    for cumulative, module in imports:
+      if '.' not in module:
+        slowest[module] = min(slowest.get(module, cumulative), cumulative)
+  return {
+    'scenario': name,
+    'median_ms': statistics.median(times) * 1e3,
+    'loaded': loaded,
+    'slowest_imports': sorted(slowest.items(), key=lambda item: -item[1])[:5],
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--runs', type=int, default=5)
+  parser.add_argument('--max-ms', type=float, help="Fail if `import reusable.email` takes longer than this")
+  parser.add_argument('--json', help="Write the results to this file as JSON")
+  args = parser.parse_args()
+
+  results = [measure(name, statement, args.runs) for name, statement in SCENARIOS.items()]
+
+  print(f"{'scenario':<24} {'median ms':>10}  heavy dependencies loaded")
+  for r in results:
+    print(f"{r['scenario']:<24} {r['median_ms']:>10.1f}  {', '.join(r['loaded']) or '-'}")
+    for module, cumulative in r['slowest_imports']:
+      print(f"{'':<26}{cumulative / 1e3:>8.1f} ms  {module}")
+
+  if args.json:
+    with open(args.json, 'w', encoding='utf-8') as f:
+      json.dump({'python': sys.version.split()[0], 'runs': args.runs, 'results': results}, f, indent=2)
+
+  if args.max_ms is not None and results[0]['median_ms'] > args.max_ms:
+    print(f"import reusable.email took {results[0]['median_ms']:.1f} ms, over the {args.max_ms} ms budget")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,95 @@
+"""
+Query latency of `InboxIndex` against a linear scan of every polled inbox.
+
+Usage: python benchmarks/index.py [emails] [aliases]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from common import synthetic_email
+
+from reusable.email import InboxIndex
+from reusable.email.types import Email
+
+SUBJECTS = (
+  "Verification code #{n}", "Your receipt from {word}", "Welcome to {word}", "Reset your {word} password",
+  "{word} weekly digest", "Security alert for your {word} account", "Invoice {n} is ready",
+)
+WORDS = ("Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Tyrell", "Cyberdyne")
+
+
+def synthetic_inboxes(count: int, aliases: int, seed: int = 0) -> dict:
+  rng = random.Random(seed)
+  inboxes = {f"alias-{i}": [] for i in range(aliases)}
+  names = list(inboxes)
+  for i in range(count):
+    email = Email.from_dict(synthetic_email(i, body_size=64))
+    email.sender = f"noreply@{rng.choice(WORDS).lower()}-{rng.randrange(100)}.com"
+    email.subject = rng.choice(SUBJECTS).format(n=rng.randrange(10**6), word=rng.choice(WORDS))
+    inboxes[rng.choice(names)].append(email)
+  return inboxes
+
+
+def scan(inboxes: dict, sender=None, subject_contains=None, since=None) -> list:
+  """What callers do without an index: look at every email of every alias."""
+  needle = subject_contains.lower() if subject_contains is not None else None
+  return sorted(
+    (
+      email for inbox in inboxes.values() for email in inbox
+      if (sender is None or email.sender == sender)
+      and (needle is None or needle in email.subject.lower())
+      and (since is None or email.timestamp >= since)
+    ),
+    key=lambda email: email.timestamp
+  )
+
+
+def timed(function, repeat: int = 20) -> float:
+  # Collect first so a full collection of the indexed emails does not land inside the timing
+  gc.collect()
+  start = time.perf_counter()
+  for _ in range(repeat):
+    result = function()
+  return (time.perf_counter() - start) / repeat * 1e6, len(result)
+
+
+def main(count: int = 100_000, aliases: int = 200) -> None:
+  inboxes = synthetic_inboxes(count, aliases)
+  # Memory is measured on a sample, since tracing slows the build down several times
+  sample = {alias: inbox[:len(inbox) // 10] for alias, inbox in inboxes.items()}
+  tracemalloc.start()
+  sample_index = InboxIndex(maxsize=None)
+  for alias, inbox in sample.items():
+    sample_index.add(alias, inbox)
+  per_email = tracemalloc.get_traced_memory()[0] / len(sample_index)
+  tracemalloc.stop()
+  del sample_index
+
+  index = InboxIndex(maxsize=None)
+  start = time.perf_counter()
+  for alias, inbox in inboxes.items():
+    index.add(alias, inbox)
+  build = time.perf_counter() - start
+  print(f"emails: {count}, aliases: {aliases}, build: {count / build:.0f} emails/s, index memory: {per_email:.0f} bytes/email")
+
+  since = 1734448240.0 + count * 0.99
+  queries = {
+    "sender": {'sender': "noreply@acme-7.com"},
+    "subject contains": {'subject_contains': "wonka password"},
+    "last 1% by time": {'since': since},
+    "sender + since": {'sender': "noreply@acme-7.com", 'since': since},
+  }
+  print(f"{'query':<20} {'matches':>8} {'scan us':>10} {'index us':>10} {'speedup':>8}")
+  for name, query in queries.items():
+    scan_us, matches = timed(lambda: scan(inboxes, **query), repeat=3)
+    index_us, index_matches = timed(lambda: index.find(**query))
+    assert matches == index_matches
+    print(f"{name:<20} {matches:>8} {scan_us:>10.0f} {index_us:>10.0f} {scan_us / index_us:>7.0f}x")
+
+
+if __name__ == '__main__':
+  main(*(int(arg) for arg in sys.argv[1:3]))
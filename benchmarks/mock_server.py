@@ -0,0 +1,118 @@
+"""
+Local stand-in for api.reusable.email, for benchmarks.
+
+Serves /v1/inbox, /v1/email, /v1/encrypted/inbox and /v1/encrypted/email with
+synthetic emails. Encrypted inboxes are genuinely encrypted with a public key
+from crypto.generate_keys, so clients exercise the real decrypt path.
+
+Usage: python benchmarks/mock_server.py [--port 8080] [--emails 50] [--latency 0.0] [--error-rate 0.0]
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from common import encrypt_email, synthetic_email
+
+
+class MockServer:
+  """aiohttp application holding every alias's inbox in memory."""
+
+  def __init__(
+    self, emails: int = 50, body_size: int = 2048, public_key: Optional[bytes] = None,
+    latency: float = 0.0, error_rate: float = 0.0
+  ) -> None:
+    """
+    Args:
+      emails (int): Emails in every inbox.
+      body_size (int): Approximate body size of every email in characters.
+      public_key (bytes, optional): Key the encrypted inboxes are encrypted with. No encrypted inboxes when None.
+      latency (float): Seconds added to every response.
+      error_rate (float): Fraction of requests answered with a 503.
+    """
+    self.latency = latency
+    self.error_rate = error_rate
+    self.emails: List[dict] = [synthetic_email(i, body_size) for i in range(emails)]
+    self.encrypted: List[dict] = [encrypt_email(email, public_key) for email in self.emails] if public_key else []
+    self.encrypted_by_id: Dict[str, dict] = {email['id']: payload for email, payload in zip(self.emails, self.encrypted)}
+    self.requests = 0
+
+  def app(self) -> web.Application:
+    app = web.Application(middlewares=[self.inject])
+    app.router.add_get('/v1/inbox', self.inbox)
+    app.router.add_get('/v1/email', self.email)
+    app.router.add_delete('/v1/email', self.delete)
+    app.router.add_post('/v1/encrypted/inbox', self.create_encrypted_inbox)
+    app.router.add_get('/v1/encrypted/inbox', self.encrypted_inbox)
+    app.router.add_get('/v1/encrypted/email', self.encrypted_email)
+    app.router.add_delete('/v1/encrypted/email', self.delete)
+    return app
+
+  @web.middleware
+  async def inject(self, request: web.Request, handler):
+    """Add the configured latency and errors to every request."""
+    self.requests += 1
+    if self.latency:
+      await asyncio.sleep(self.latency)
+    if self.error_rate and random.random() < self.error_rate:
+      return web.json_response({'code': 503, 'message': 'Injected error'}, status=503)
+    return await handler(request)
+
+  def _after(self, request: web.Request, items: List[dict]) -> List[dict]:
+    after = request.query.get('after')
+    if not after:
+      return items
+    for i, email in enumerate(self.emails):
+      if email['id'] == after:
+        return items[i + 1:]
+    return items
+
+  async def inbox(self, request: web.Request) -> web.Response:
+    return web.json_response({'alias': request.query.get('alias'), 'inbox': self._after(request, self.emails)})
+
+  async def email(self, request: web.Request) -> web.Response:
+    for email in self.emails:
+      if email['id'] == request.query.get('id'):
+        return web.Response(text=email['body'], content_type='text/html')
+    return web.json_response({'code': 404, 'message': 'Email not found'}, status=404)
+
+  async def delete(self, request: web.Request) -> web.Response:
+    return web.json_response({'success': True})
+
+  async def create_encrypted_inbox(self, request: web.Request) -> web.Response:
+    return web.json_response({'message': 'Inbox created successfully'})
+
+  async def encrypted_inbox(self, request: web.Request) -> web.Response:
+    return web.json_response({'alias': request.query.get('alias'), 'inbox': self._after(request, self.encrypted)})
+
+  async def encrypted_email(self, request: web.Request) -> web.Response:
+    payload = self.encrypted_by_id.get(request.query.get('id', ''))
+    if payload is None:
+      return web.json_response({'code': 404, 'message': 'Email not found'}, status=404)
+    return web.json_response(payload)
+
+
+def serve(port: int, **kwargs) -> None:
+  """Run a MockServer until the process is terminated."""
+  web.run_app(MockServer(**kwargs).app(), host='127.0.0.1', port=port, print=None)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--port', type=int, default=8080)
+  parser.add_argument('--emails', type=int, default=50)
+  parser.add_argument('--body-size', type=int, default=2048)
+  parser.add_argument('--latency', type=float, default=0.0)
+  parser.add_argument('--error-rate', type=float, default=0.0)
+  args = parser.parse_args()
+
+  from reusable.email import generate_keys
+  public_key, private_key = generate_keys()
+  print(private_key.decode('utf-8'))
+  serve(
+    args.port, emails=args.emails, body_size=args.body_size, public_key=public_key,
+    latency=args.latency, error_rate=args.error_rate
+  )
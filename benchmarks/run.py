@@ -0,0 +1,164 @@
+"""
+End-to-end benchmark of the Sync and Async clients against the local mock server.
+
+Reports requests/sec, p50/p99 latency, decrypts/sec and peak RSS for every
+scenario, as a table and optionally as JSON for tracking regressions.
+
+Usage: python benchmarks/run.py [--requests 500] [--concurrency 50] [--emails 50] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import socket
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import mock_server
+
+from reusable.email import Async, RetryPolicy, Sync, __version__, generate_keys, json_backend
+
+
+def free_port() -> int:
+  with socket.socket() as sock:
+    sock.bind(('127.0.0.1', 0))
+    return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 60.0) -> None:
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    try:
+      socket.create_connection(('127.0.0.1', port), timeout=1).close()
+      return
+    except OSError:
+      time.sleep(0.05)
+  raise TimeoutError(f"Mock server did not start on port {port}")
+
+
+def peak_rss_mb() -> float:
+  # ru_maxrss is in KiB on Linux and bytes on macOS
+  rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, decrypts: int = 0) -> Dict[str, float]:
+  ordered = sorted(latencies)
+  return {
+    'scenario': name,
+    'requests': len(latencies),
+    'seconds': elapsed,
+    'requests_per_sec': len(latencies) / elapsed,
+    'p50_ms': statistics.median(ordered) * 1e3,
+    'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+    'decrypts_per_sec': decrypts / elapsed,
+    'peak_rss_mb': peak_rss_mb(),
+  }
+
+
+def run_sync(name: str, call: Callable[[], object], requests: int, emails_per_call: int = 0) -> Dict[str, float]:
+  latencies = []
+  start = time.perf_counter()
+  for _ in range(requests):
+    t = time.perf_counter()
+    call()
+    latencies.append(time.perf_counter() - t)
+  return summarize(name, latencies, time.perf_counter() - start, emails_per_call * requests)
+
+
+async def run_async(
+  name: str, call: Callable[[], Awaitable[object]], requests: int, concurrency: int, emails_per_call: int = 0
+) -> Dict[str, float]:
+  latencies = []
+  semaphore = asyncio.Semaphore(concurrency)
+
+  async def one() -> None:
+    async with semaphore:
+      t = time.perf_counter()
+      await call()
+      latencies.append(time.perf_counter() - t)
+
+  start = time.perf_counter()
+  await asyncio.gather(*(one() for _ in range(requests)))
+  return summarize(name, latencies, time.perf_counter() - start, emails_per_call * requests)
+
+
+async def async_scenarios(base_url: str, private_key: bytes, args: argparse.Namespace) -> List[Dict[str, float]]:
+  client = Async(
+    'benchmark', private_key, limit=args.concurrency, retry=RetryPolicy(backoff_initial=0.01), base_url=base_url
+  )
+  async with client:
+    return [
+      await run_async("async view_inbox", lambda: client.view_inbox('BENCH'), args.requests, args.concurrency),
+      await run_async("async fetch_email_body", lambda: client.fetch_email_body('BENCH', '0000000000000000'), args.requests, args.concurrency),
+      await run_async(
+        "async view_encrypted_inbox", lambda: client.view_encrypted_inbox('BENC-HMAR-KING'),
+        max(1, args.requests // 10), args.concurrency, args.emails
+      ),
+    ]
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--requests', type=int, default=500)
+  parser.add_argument('--concurrency', type=int, default=50)
+  parser.add_argument('--emails', type=int, default=50)
+  parser.add_argument('--body-size', type=int, default=2048)
+  parser.add_argument('--latency', type=float, default=0.0)
+  parser.add_argument('--error-rate', type=float, default=0.0)
+  parser.add_argument('--json', help="Write the results to this file as JSON")
+  args = parser.parse_args()
+
+  public_key, private_key = generate_keys()
+  port = free_port()
+  server = multiprocessing.Process(target=mock_server.serve, args=(port,), kwargs={
+    'emails': args.emails, 'body_size': args.body_size, 'public_key': public_key,
+    'latency': args.latency, 'error_rate': args.error_rate,
+  }, daemon=True)
+  server.start()
+  try:
+    wait_for_port(port)
+    base_url = f"http://127.0.0.1:{port}/v1"
+
+    client = Sync('benchmark', private_key, retry=RetryPolicy(backoff_initial=0.01), base_url=base_url)
+    with client:
+      results = [
+        run_sync("sync view_inbox", lambda: client.view_inbox('BENCH'), args.requests),
+        run_sync("sync fetch_email_body", lambda: client.fetch_email_body('BENCH', '0000000000000000'), args.requests),
+        run_sync(
+          "sync view_encrypted_inbox", lambda: client.view_encrypted_inbox('BENC-HMAR-KING'),
+          max(1, args.requests // 10), args.emails
+        ),
+      ]
+    results += asyncio.run(async_scenarios(base_url, private_key, args))
+  finally:
+    server.terminate()
+    server.join()
+
+  print(f"{'scenario':<30} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'decrypt/s':>10} {'rss MB':>8}")
+  for r in results:
+    print(
+      f"{r['scenario']:<30} {r['requests_per_sec']:>10.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+      f" {r['decrypts_per_sec']:>10.1f} {r['peak_rss_mb']:>8.1f}"
+    )
+
+  if args.json:
+    with open(args.json, 'w', encoding='utf-8') as f:
+      json.dump({
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json_backend': json_backend.name,
+        'timestamp': time.time(),
+        'parameters': vars(args),
+        'results': results,
+      }, f, indent=2)
+
+
+if __name__ == '__main__':
+  main()
@@ -12,18 +12,100 @@ Version: 1.0.0
 
 __version__ = '0.1.0'
 
-# Import key functions from submodules
-from .crypto import generate_keys
-from .inbox_manager import (
-  Sync,
-  Async
-)
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+# Public names and the submodule each is defined in. They are imported on first
+# access through __getattr__, so `import reusable.email` does not load requests,
+# aiohttp or cryptography until a client or key function is actually used.
+_LAZY = {
+  "generate_keys": "crypto",
+  "Sync": "inbox_manager",
+  "Async": "inbox_manager",
+  "EmailCache": "cache",
+  "RetryPolicy": "retry",
+  "Observer": "metrics",
+  "ObserverGroup": "metrics",
+  "MetricsCollector": "metrics",
+  "OpenTelemetryObserver": "metrics",
+  "RateLimiter": "retry",
+  "InboxSyncer": "cursors",
+  "AsyncInboxSyncer": "cursors",
+  "MemoryCursorStore": "cursors",
+  "JSONCursorStore": "cursors",
+  "SQLiteCursorStore": "cursors",
+  "Archive": "archive",
+  "DecryptionPool": "decrypt_pool",
+  "KeyRing": "keyring",
+  "KeyPool": "keypool",
+  "Extractor": "extract",
+  "Rule": "extract",
+  "InboxIndex": "index",
+  "Poller": "poller",
+}
+
+if TYPE_CHECKING:
+  from .crypto import generate_keys
+  from .inbox_manager import (
+    Sync,
+    Async
+  )
+  from .archive import Archive
+  from .cache import EmailCache
+  from .decrypt_pool import DecryptionPool
+  from .keyring import KeyRing
+  from .keypool import KeyPool
+  from .extract import Extractor, Rule
+  from .index import InboxIndex
+  from .poller import Poller
+  from .metrics import MetricsCollector, Observer, ObserverGroup, OpenTelemetryObserver
+  from .retry import RateLimiter, RetryPolicy
+  from .cursors import (
+    InboxSyncer,
+    AsyncInboxSyncer,
+    MemoryCursorStore,
+    JSONCursorStore,
+    SQLiteCursorStore
+  )
+
+
+def __getattr__(name: str) -> Any:
+  module = _LAZY.get(name)
+  if module is None:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  value = getattr(import_module(f".{module}", __name__), name)
+  # Cache it so the next access is a plain module attribute lookup
+  globals()[name] = value
+  return value
+
+
+def __dir__() -> List[str]:
+  return sorted(set(globals()) | set(_LAZY))
 
 
 # Define the public API of the package
 __all__ = [
   "generate_keys",
   "Sync",
-  "Async"
+  "Async",
+  "EmailCache",
+  "RetryPolicy",
+  "Observer",
+  "ObserverGroup",
+  "MetricsCollector",
+  "OpenTelemetryObserver",
+  "RateLimiter",
+  "InboxSyncer",
+  "AsyncInboxSyncer",
+  "MemoryCursorStore",
+  "JSONCursorStore",
+  "SQLiteCursorStore",
+  "Archive",
+  "DecryptionPool",
+  "KeyRing",
+  "KeyPool",
+  "Extractor",
+  "Rule",
+  "InboxIndex",
+  "Poller"
   ]
-
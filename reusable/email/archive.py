@@ -0,0 +1,320 @@
+"""
+Append-only on-disk archive of received emails.
+
+Emails are appended to numbered segment files and indexed by alias, id, timestamp
+and sender in SQLite, so lookups and range scans never parse whole files. Segments
+are read through ``mmap``. Each segment can compress its records (zlib, or zstd
+when ``zstandard`` is installed) and encrypt them at rest with AES-GCM under a
+per-segment key wrapped with an RSA public key from `crypto.generate_keys`.
+
+Segment layout::
+
+  b'REA1' | codec (1 byte) | wrapped key length (2 bytes) | wrapped key
+  then records: length (4 bytes, little endian) | payload
+
+A payload is the email JSON, compressed if the segment has a codec, then
+prefixed with a 12 byte nonce and AES-GCM encrypted if the segment has a key.
+"""
+
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from . import crypto
+from .types import Email
+
+MAGIC = b'REA1'
+CODECS = {None: 0, 'zlib': 1, 'zstd': 2}
+_HEADER = struct.Struct('<4sBH')
+_LENGTH = struct.Struct('<I')
+_PAGE = 256
+_OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+
+def _compressor(codec: int):
+  if codec == 1:
+    return lambda data: zlib.compress(data, 6), zlib.decompress
+  if codec == 2:
+    import zstandard
+    return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+  return None, None
+
+
+class _Segment:
+  """One segment file: its header, data key and read-only map."""
+
+  __slots__ = ('number', 'path', 'codec', 'key', 'data_start', 'map', 'file')
+
+  def __init__(self, number: int, path: str, codec: int, key: Optional[bytes], data_start: int) -> None:
+    self.number = number
+    self.path = path
+    self.codec = codec
+    self.key = key
+    self.data_start = data_start
+    self.map: Optional[mmap.mmap] = None
+    self.file = None
+
+  def read(self, offset: int, length: int) -> bytes:
+    """Read a record payload, remapping if the segment grew since it was mapped."""
+    if self.map is None or len(self.map) < offset + length:
+      self.close()
+      self.file = open(self.path, 'rb')
+      self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+    return self.map[offset:offset + length]
+
+  def close(self) -> None:
+    if self.map is not None:
+      self.map.close()
+      self.map = None
+    if self.file is not None:
+      self.file.close()
+      self.file = None
+
+
+class Archive:
+  """
+  Segmented, append-only email archive with an alias/id/timestamp/sender index.
+
+  Emails are keyed by alias and id, so the same email delivered to two aliases is kept for both.
+  Aliases are case-insensitive. Safe to share between threads. Pass it to `Sync` or `Async` as
+  ``archive`` to archive every email they fetch.
+  """
+
+  def __init__(
+    self, path: Union[str, os.PathLike], compression: Optional[str] = None,
+    public_key: Optional[bytes] = None, private_key: Optional[bytes] = None,
+    segment_size: int = 64 * 1024 * 1024
+  ) -> None:
+    """
+    Args:
+      path (str | PathLike): Directory holding the segments and index, created if missing.
+      compression (str, optional): ``'zlib'`` or ``'zstd'`` for new segments. No compression when None.
+      public_key (bytes, optional): RSA public key (PEM) to encrypt new segments at rest.
+      private_key (bytes, optional): RSA private key (PEM) to read encrypted segments.
+      segment_size (int): Size in bytes after which a new segment is started.
+    """
+    if compression not in CODECS:
+      raise ValueError(f"Unknown compression: {compression}")
+    self.path = os.fspath(path)
+    os.makedirs(self.path, exist_ok=True)
+    self.codec = CODECS[compression]
+    self.compress, _ = _compressor(self.codec)
+    self.public_key = serialization.load_pem_public_key(public_key) if public_key else None
+    self.decryptor = crypto.get_decryptor(private_key) if private_key else None
+    self.segment_size = segment_size
+    self.lock = threading.RLock()
+    self.segments: Dict[int, _Segment] = {}
+    self.decompressors: Dict[int, object] = {}
+
+    self.index = sqlite3.connect(os.path.join(self.path, 'index.sqlite'), check_same_thread=False)
+    self.index.execute("PRAGMA journal_mode=WAL")
+    self.index.execute("PRAGMA synchronous=NORMAL")
+    with self.index:
+      self.index.execute(
+        "CREATE TABLE IF NOT EXISTS emails ("
+        "alias TEXT NOT NULL, id TEXT NOT NULL, timestamp REAL, sender TEXT, segment INTEGER NOT NULL, "
+        "offset INTEGER NOT NULL, length INTEGER NOT NULL, PRIMARY KEY (alias, id))"
+      )
+      self.index.execute("CREATE INDEX IF NOT EXISTS emails_timestamp ON emails (timestamp)")
+      self.index.execute("CREATE INDEX IF NOT EXISTS emails_alias ON emails (alias, timestamp)")
+      self.index.execute("CREATE INDEX IF NOT EXISTS emails_sender ON emails (sender, timestamp)")
+
+    self.writer = None
+    self.writer_segment: Optional[_Segment] = None
+    numbers = sorted(
+      int(name[8:14]) for name in os.listdir(self.path) if name.startswith('segment-') and name.endswith('.log')
+    )
+    self.next_segment = (numbers[-1] + 1) if numbers else 1
+
+  # Writing
+  def _segment_path(self, number: int) -> str:
+    return os.path.join(self.path, f"segment-{number:06d}.log")
+
+  def _open_writer(self) -> None:
+    """Start a new segment with the current codec and a fresh data key."""
+    number = self.next_segment
+    self.next_segment += 1
+    key = AESGCM.generate_key(bit_length=256) if self.public_key else None
+    wrapped = self.public_key.encrypt(key, _OAEP) if key else b''
+    path = self._segment_path(number)
+    self.writer = open(path, 'ab')
+    self.writer.write(_HEADER.pack(MAGIC, self.codec, len(wrapped)) + wrapped)
+    segment = _Segment(number, path, self.codec, key, _HEADER.size + len(wrapped))
+    self.segments[number] = self.writer_segment = segment
+
+  def _encode(self, email: Email, segment: _Segment) -> bytes:
+    payload = Email.to_json(email).encode('utf-8')
+    if self.compress is not None:
+      payload = self.compress(payload)
+    if segment.key is not None:
+      nonce = os.urandom(12)
+      payload = nonce + AESGCM(segment.key).encrypt(nonce, payload, None)
+    return payload
+
+  def _write(self, alias: str, email: Email) -> Optional[Tuple]:
+    if email is None or email.id is None or (alias, email.id) in self:
+      return None
+    if self.writer is None or self.writer.tell() >= self.segment_size:
+      if self.writer is not None:
+        self.writer.close()
+      self._open_writer()
+    segment = self.writer_segment
+    payload = self._encode(email, segment)
+    self.writer.write(_LENGTH.pack(len(payload)))
+    offset = self.writer.tell()
+    self.writer.write(payload)
+    return (alias, email.id, email.timestamp, email.sender, segment.number, offset, len(payload))
+
+  def append(self, alias: str, email: Email) -> bool:
+    """
+    Archive one email of an alias. Emails already archived for the alias, by id, are skipped.
+
+    Returns:
+      bool: True if the email was written.
+    """
+    return self.extend(alias, [email]) == 1
+
+  def extend(self, alias: str, emails: Iterable[Email]) -> int:
+    """
+    Archive many emails of an alias in one index transaction.
+
+    Returns:
+      int: Number of emails written.
+    """
+    alias = alias.upper()
+    with self.lock:
+      rows = []
+      seen = set()
+      for email in emails:
+        if email is not None and email.id not in seen:
+          row = self._write(alias, email)
+          if row is not None:
+            seen.add(email.id)
+            rows.append(row)
+      if rows:
+        self.writer.flush()
+        with self.index:
+          self.index.executemany("INSERT OR IGNORE INTO emails VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+      return len(rows)
+
+  # Reading
+  def _segment(self, number: int) -> _Segment:
+    segment = self.segments.get(number)
+    if segment is None:
+      path = self._segment_path(number)
+      with open(path, 'rb') as f:
+        magic, codec, wrapped_length = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+          raise ValueError(f"{path} is not an archive segment")
+        wrapped = f.read(wrapped_length)
+      key = None
+      if wrapped:
+        if self.decryptor is None:
+          raise ValueError("This archive is encrypted; pass private_key to read it")
+        key = self.decryptor.private_key.decrypt(wrapped, _OAEP)
+      segment = self.segments[number] = _Segment(number, path, codec, key, _HEADER.size + wrapped_length)
+    return segment
+
+  def _read(self, number: int, offset: int, length: int) -> Email:
+    segment = self._segment(number)
+    payload = segment.read(offset, length)
+    if segment.key is not None:
+      payload = AESGCM(segment.key).decrypt(payload[:12], payload[12:], None)
+    if segment.codec:
+      decompress = self.decompressors.get(segment.codec)
+      if decompress is None:
+        decompress = self.decompressors[segment.codec] = _compressor(segment.codec)[1]
+      payload = decompress(payload)
+    return Email.from_json(payload)
+
+  def get(self, alias: str, email_id: str) -> Optional[Email]:
+    """Return an archived email of an alias by id, or None."""
+    with self.lock:
+      row = self.index.execute(
+        "SELECT segment, offset, length FROM emails WHERE alias = ? AND id = ?", (alias.upper(), email_id)
+      ).fetchone()
+      return self._read(*row) if row else None
+
+  def range(
+    self, since: Optional[float] = None, until: Optional[float] = None, sender: Optional[str] = None,
+    limit: Optional[int] = None, newest_first: bool = False, alias: Optional[str] = None
+  ) -> Iterator[Email]:
+    """
+    Iterate over archived emails in timestamp order, using the index to skip everything outside the range.
+
+    Args:
+      since (float, optional): Only emails at or after this timestamp.
+      until (float, optional): Only emails before this timestamp.
+      sender (str, optional): Only emails from exactly this sender.
+      limit (int, optional): Stop after this many emails.
+      newest_first (bool): Iterate from the newest email.
+      alias (str, optional): Only emails of this alias.
+    """
+    clauses, params = [], []
+    if alias is not None:
+      clauses.append("alias = ?")
+      params.append(alias.upper())
+    if since is not None:
+      clauses.append("timestamp >= ?")
+      params.append(since)
+    if until is not None:
+      clauses.append("timestamp < ?")
+      params.append(until)
+    if sender is not None:
+      clauses.append("sender = ?")
+      params.append(sender)
+    query = "SELECT segment, offset, length FROM emails"
+    if clauses:
+      query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY timestamp DESC" if newest_first else " ORDER BY timestamp"
+    if limit is not None:
+      query += " LIMIT ?"
+      params.append(limit)
+    with self.lock:
+      cursor = self.index.execute(query, params)
+    try:
+      while True:
+        # Read a page of index rows at a time, never holding the lock while the caller runs
+        with self.lock:
+          rows = cursor.fetchmany(_PAGE)
+          emails = [self._read(*row) for row in rows]
+        if not emails:
+          return
+        yield from emails
+    finally:
+      cursor.close()
+
+  def __contains__(self, key: Tuple[str, str]) -> bool:
+    """Whether an ``(alias, email_id)`` pair is archived."""
+    alias, email_id = key
+    with self.lock:
+      query = "SELECT 1 FROM emails WHERE alias = ? AND id = ?"
+      return self.index.execute(query, (alias.upper(), email_id)).fetchone() is not None
+
+  def __len__(self) -> int:
+    with self.lock:
+      return self.index.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+  def close(self) -> None:
+    """Flush and close the segments and the index."""
+    with self.lock:
+      if self.writer is not None:
+        self.writer.close()
+        self.writer = None
+      for segment in self.segments.values():
+        segment.close()
+      self.index.close()
+
+  def __enter__(self) -> 'Archive':
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    self.close()
@@ -0,0 +1,33 @@
+import random
+
+
+class Backoff:
+  """Exponential backoff with full jitter."""
+
+  __slots__ = ('initial', 'maximum', 'multiplier', 'jitter', 'current')
+
+  def __init__(self, initial: float = 1.0, maximum: float = 30.0, multiplier: float = 2.0, jitter: bool = True) -> None:
+    """
+    Args:
+      initial (float): First delay in seconds, and the delay after a reset.
+      maximum (float): Upper bound for the delay in seconds.
+      multiplier (float): Factor the delay grows by after each step.
+      jitter (bool): Randomise each delay between half and all of its value to spread out clients.
+    """
+    self.initial = initial
+    self.maximum = maximum
+    self.multiplier = multiplier
+    self.jitter = jitter
+    self.current = initial
+
+  def reset(self) -> None:
+    """Go back to the initial delay."""
+    self.current = self.initial
+
+  def next(self) -> float:
+    """Return the next delay and grow the delay for the step after."""
+    delay = self.current
+    self.current = min(self.maximum, self.current * self.multiplier)
+    if self.jitter:
+      delay = random.uniform(delay / 2, delay)
+    return delay
@@ -0,0 +1,85 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+from .types import Email
+
+
+class EmailCache:
+  """
+  LRU cache with optional TTL for email bodies and decrypted emails, keyed by ``(alias, email_id)``.
+
+  Values are stored as UTF-8 bytes, optionally zlib compressed, to keep memory bounded.
+  Safe to share between threads.
+  """
+
+  def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, compress: bool = False) -> None:
+    """
+    Args:
+      maxsize (int): Maximum number of cached emails; the least recently used is evicted first.
+      ttl (float, optional): Seconds an entry stays valid. Entries never expire when None.
+      compress (bool): Compress stored values with zlib.
+    """
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.compress = compress
+    self.hits = 0
+    self.misses = 0
+    self.lock = threading.Lock()
+    # (alias, email_id) -> (expires_at, is_email, payload)
+    self.entries: 'OrderedDict[Tuple[str, str], Tuple[Optional[float], bool, bytes]]' = OrderedDict()
+
+  def get(self, alias: str, email_id: str) -> Union[str, Email, None]:
+    """Return the cached body or Email, or None on a miss."""
+    key = (alias, email_id)
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None or (entry[0] is not None and entry[0] <= time.monotonic()):
+        if entry is not None:
+          del self.entries[key]
+        self.misses += 1
+        return None
+      self.entries.move_to_end(key)
+      self.hits += 1
+    _, is_email, payload = entry
+    raw = zlib.decompress(payload) if self.compress else payload
+    return Email.from_json(raw) if is_email else raw.decode('utf-8')
+
+  def set(self, alias: str, email_id: str, value: Union[str, Email]) -> None:
+    """Cache an email body (str) or a decrypted Email."""
+    is_email = isinstance(value, Email)
+    payload = (Email.to_json(value) if is_email else value).encode('utf-8')
+    if self.compress:
+      payload = zlib.compress(payload)
+    expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+    key = (alias, email_id)
+    with self.lock:
+      self.entries[key] = (expires_at, is_email, payload)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.maxsize:
+        self.entries.popitem(last=False)
+
+  def invalidate(self, alias: str, email_id: str) -> None:
+    """Drop a single email from the cache."""
+    with self.lock:
+      self.entries.pop((alias, email_id), None)
+
+  def clear(self) -> None:
+    """Drop every cached email and reset the counters."""
+    with self.lock:
+      self.entries.clear()
+      self.hits = self.misses = 0
+
+  def stats(self) -> Dict[str, int]:
+    """Return hit/miss counters, entry count and stored payload bytes."""
+    with self.lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'entries': len(self.entries),
+        'bytes': sum(len(entry[2]) for entry in self.entries.values()),
+      }
+
+  def __len__(self) -> int:
+    return len(self.entries)
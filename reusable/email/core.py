@@ -0,0 +1,296 @@
+"""
+Transport-agnostic core shared by the Sync and Async clients.
+
+Holds the routes, request building, response decoding, status-to-exception
+mapping and the client options, so the clients only implement the I/O.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+from . import json_backend
+from .errors import Forbidden, FetchFail, HTTPException, InvalidParams, NotFound
+from .retry import RateLimiter, RetryPolicy
+
+if TYPE_CHECKING:
+  from . import crypto
+  from .archive import Archive
+  from .cache import EmailCache
+  from .index import InboxIndex
+  from .keyring import KeyRing
+  from .metrics import Observer
+
+
+# API Version Constant
+INTERNAL_API_VERSION = 1
+DEFAULT_BASE_URL = f"http://api.reusable.email/v{INTERNAL_API_VERSION}"
+USER_AGENT = 'Python-SDK-Package/1.0'
+METHODS = frozenset({'get', 'post', 'put', 'delete'})
+
+# Utility Class for JSON Handling
+class Utils:
+  """Utility methods for handling JSON operations."""
+
+  @staticmethod
+  def handle_metadata(obj: Any) -> dict:
+    """Convert an object to a JSON-serializable dictionary."""
+    try:
+      return dict(obj)
+    except Exception:
+      raise TypeError(f"Type {obj.__class__.__name__} is not JSON serializable")
+
+  @staticmethod
+  def to_json(obj: Any) -> str:
+    """Convert an object to a JSON string."""
+    return json_backend.dumps(obj, default=Utils.handle_metadata)
+
+  @staticmethod
+  def from_json(data: Union[bytes, str]) -> Any:
+    """Parse a JSON string or bytes to a Python object."""
+    return json_backend.loads(data)
+
+# Route Class for API Requests
+class Route:
+  """Represents an immutable API route."""
+
+  __slots__ = ('BASE', 'path', 'method', 'url')
+
+  def __init__(self, base: str, method: str, path: str) -> None:
+    if method not in METHODS:
+      raise ValueError(f"Unsupported HTTP method: {method}")
+    set_ = object.__setattr__
+    set_(self, 'BASE', base)
+    set_(self, 'path', path)
+    set_(self, 'method', method)
+    set_(self, 'url', f"{base}{path}")
+
+  def __setattr__(self, name: str, value: Any) -> None:
+    raise AttributeError("Route is immutable")
+
+  def __repr__(self) -> str:
+    return f"<Route {self.method.upper()} {self.url}>"
+
+
+class Routes:
+  """Every API route for one base URL, built once."""
+
+  __slots__ = (
+    'inbox', 'email', 'delete_email',
+    'create_encrypted_inbox', 'encrypted_inbox', 'encrypted_email', 'delete_encrypted_email',
+  )
+
+  def __init__(self, base: str) -> None:
+    self.inbox = Route(base, 'get', "/inbox")
+    self.email = Route(base, 'get', "/email")
+    self.delete_email = Route(base, 'delete', "/email")
+    self.create_encrypted_inbox = Route(base, 'post', "/encrypted/inbox")
+    self.encrypted_inbox = Route(base, 'get', "/encrypted/inbox")
+    self.encrypted_email = Route(base, 'get', "/encrypted/email")
+    self.delete_encrypted_email = Route(base, 'delete', "/encrypted/email")
+
+
+# Request building
+def inbox_params(alias: str, after: Optional[str] = None, encrypted: bool = False) -> Dict[str, str]:
+  """Query parameters for an inbox listing. Encrypted aliases are upper case."""
+  params = {"alias": alias.upper() if encrypted else alias}
+  if after:
+    params["after"] = after
+  return params
+
+
+def email_params(alias: str, email_id: str, encrypted: bool = False) -> Dict[str, str]:
+  """Query parameters for a single email."""
+  return {"alias": alias.upper() if encrypted else alias, "id": email_id}
+
+
+def advance_cursor(email_id: Optional[str], timestamp: Optional[float], email: Any) -> Tuple[Optional[str], Optional[float]]:
+  """
+  The ``after`` cursor once `email` has been delivered: the newest email by timestamp, or the latest
+  delivered one while none had a timestamp. Shared by the inbox syncers and `iter_inbox`.
+  """
+  if email.timestamp is None:
+    return (email_id, timestamp) if timestamp is not None else (email.id, None)
+  if timestamp is None or email.timestamp >= timestamp:
+    return email.id, email.timestamp
+  return email_id, timestamp
+
+
+def encrypted_inbox_data(alias: str, public_key: bytes) -> Dict[str, str]:
+  """Form data creating an encrypted inbox."""
+  return {"publicKey": public_key.decode('utf-8'), "inboxName": alias.upper()}
+
+
+# Response decoding
+def json_or_text(content_type: str, content: bytes, text: Any) -> Union[Dict[str, Any], str]:
+  """Parse a JSON body straight from bytes, or return the text for anything else. `text` is only called for non-JSON bodies."""
+  if content_type.startswith('application/json'):
+    return Utils.from_json(content)
+  return text()
+
+
+def payload_json(response: Any) -> Any:
+  """Return the body `request` parsed, parsing it here only if it was not served as JSON."""
+  payload = response.payload
+  return Utils.from_json(payload) if isinstance(payload, str) else payload
+
+
+def inbox_items(response: Any) -> List[Dict[str, Any]]:
+  """The raw emails of an inbox listing."""
+  return payload_json(response).get('inbox', [])
+
+
+def success(response: Any) -> bool:
+  """The ``success`` flag of a delete response."""
+  return payload_json(response).get('success', False)
+
+
+def http_error(status: int, response: Any, data: Union[Dict[str, Any], str]) -> HTTPException:
+  """Map an error status code to the matching exception."""
+  if status == 403:
+    return Forbidden(response, data)
+  elif status == 404:
+    return NotFound(response, data)
+  elif status == 400:
+    return InvalidParams(response, data)
+  elif status >= 500:
+    return FetchFail(response, data)
+  return HTTPException(response, data)
+
+
+# Request attempts
+class Attempts:
+  """
+  Retry and observer bookkeeping for the attempts of one request.
+
+  Sync and Async only send each attempt and sleep; whether a response is the result, retried
+  or raised, and every observer event, is decided here so both clients behave the same.
+  """
+
+  __slots__ = ('route', 'retry', 'observer', 'retryable_errors', 'backoff', 'attempt', 'start')
+
+  def __init__(self, client: BaseClient, route: Route) -> None:
+    self.route = route
+    self.retry = client.retry
+    self.observer = client.observer
+    self.retryable_errors = client.retryable_errors
+    self.backoff = client.retry.backoff()
+    self.attempt = 0
+    self.start = 0.0
+
+  def begin(self) -> None:
+    """Report an attempt being sent."""
+    if self.observer is not None:
+      self.observer.on_request_start(self.route.method, self.route.path)
+      self.start = time.perf_counter()
+
+  def response(self, response: Any, status: int, body: Any, size: int) -> Optional[float]:
+    """
+    Report the response to an attempt.
+
+    Returns:
+      float: Seconds to wait before retrying, or None if the response is the result.
+
+    Raises:
+      HTTPException: The response is an error that is not retried.
+      RateLimited: The server asked to wait longer than the retry policy allows.
+    """
+    route = self.route
+    if self.observer is not None:
+      self.observer.on_request_end(route.method, route.path, status, time.perf_counter() - self.start, size)
+    if status in {200, 202}:
+      return None
+    delay = self.retry.delay_for_status(route.method, status, response.headers.get('Retry-After'), self.attempt, self.backoff)
+    if delay is None:
+      raise http_error(status, response, body)
+    return self._retrying(delay)
+
+  def error(self, error: Exception) -> Optional[float]:
+    """
+    Report an exception raised by an attempt, including those raised by `response`.
+
+    Returns:
+      float: Seconds to wait before retrying, or None if the exception is to be raised.
+    """
+    if isinstance(error, self.retryable_errors):
+      delay = self.retry.delay_for_error(self.route.method, self.attempt, self.backoff)
+      if delay is not None:
+        return self._retrying(delay)
+    if self.observer is not None:
+      self.observer.on_error(self.route.method, self.route.path, error)
+    return None
+
+  def _retrying(self, delay: float) -> float:
+    self.attempt += 1
+    if self.observer is not None:
+      self.observer.on_retry(self.route.method, self.route.path, self.attempt, delay)
+    return delay
+
+
+class BaseClient:
+  """Options and state shared by Sync and Async."""
+
+  def __init__(
+    self, private_key: Optional[bytes] = None, executor: Optional[Executor] = None,
+    cache: Optional[EmailCache] = None, retry: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None,
+    observer: Optional[Observer] = None, base_url: str = DEFAULT_BASE_URL, archive: Optional[Archive] = None,
+    keyring: Optional[KeyRing] = None, index: Optional[InboxIndex] = None
+  ) -> None:
+    self.private_key = private_key.decode('utf-8') if private_key else None
+    self.decryptor: Optional[crypto.Decryptor] = None
+    if private_key:
+      # cryptography is only loaded by clients that decrypt
+      from .crypto import get_decryptor
+      self.decryptor = get_decryptor(private_key)
+    self.executor = executor
+    self.cache = cache
+    self.retry = retry if retry is not None else RetryPolicy(total=0)
+    self.rate_limiter = rate_limiter
+    self.observer = observer
+    self.archive = archive
+    self.keyring = keyring
+    self.index = index
+    self.BASE_URL = base_url
+
+  def _shared(self, route_name: str, result: Any, shared: bool) -> Any:
+    """
+    Hand a coalesced call's result to one caller, reporting it to the observer if it was shared.
+
+    Every caller, the one that made the call included, gets its own copy of a list, so none of them
+    can modify the list the others are given.
+    """
+    if shared and self.observer is not None:
+      route = getattr(self.routes, route_name)
+      self.observer.on_coalesce(route.method, route.path)
+    return list(result) if isinstance(result, list) else result
+
+  def decryptor_for(self, alias: str) -> Optional[crypto.Decryptor]:
+    """The key that decrypts an encrypted alias: its key in `keyring`, else `private_key`, else None."""
+    if self.keyring is not None:
+      decryptor = self.keyring.get(alias)
+      if decryptor is not None:
+        return decryptor
+    return self.decryptor
+
+  def _ingest(self, alias: str, emails: Sequence[Any]) -> None:
+    """Append fetched emails to `archive` and add them to `index`, if they are set."""
+    if self.archive is not None:
+      self.archive.extend(alias, (email for email in emails if email is not None))
+    if self.index is not None:
+      self.index.add(alias, emails)
+
+  def _unindex(self, alias: str, email_id: str) -> None:
+    """Drop a deleted email from `index`, if one is set."""
+    if self.index is not None:
+      self.index.remove(alias, email_id)
+
+  @property
+  def BASE_URL(self) -> str:
+    return self._base_url
+
+  @BASE_URL.setter
+  def BASE_URL(self, base_url: str) -> None:
+    # Routes are rebuilt only when the base URL changes, never per request
+    self._base_url = base_url
+    self.routes = Routes(base_url)
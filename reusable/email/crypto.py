@@ -1,10 +1,15 @@
 import base64
+import binascii
+import hashlib
+import multiprocessing
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 from .types import Email  
-from typing import Union
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 
 def generate_keys(public_exponent=65537, key_size=2048) -> Union[bytes, bytes]:
@@ -38,48 +43,229 @@ def generate_keys(public_exponent=65537, key_size=2048) -> Union[bytes, bytes]:
   return public_key, private_key
 
 
-def decrypt_email(encrypted_email, rsa_private_key_pem):
+def _generate_key_pair(key_size: int) -> Tuple[bytes, bytes]:
+  return generate_keys(key_size=key_size)
+
+
+def generate_key_pairs(count: int, executor: Optional[Executor] = None, key_size: int = 2048) -> List[Tuple[bytes, bytes]]:
   """
-  Decrypt an email using RSA and AES encryption.
+  Generate many RSA key pairs in parallel.
+
+  RSA key generation is CPU bound and holds the GIL, so the pairs are generated on a process pool.
   Args:
-    encrypted_email (dict): Dictionary containing encrypted AES key, IV, and email data (Base64 encoded).
-    rsa_private_key_pem (str): RSA private key in PEM format as a string.
+    count (int): Number of key pairs.
+    executor (Executor, optional): Process pool to generate on. A pool with one worker per CPU is started and shut down when None.
+    key_size (int): Size of each key in bits.
 
   Returns:
-    Email: Decrypted email object, or None if decryption fails.
+    list: ``(public_key, private_key)`` pairs in PEM format.
   """
-  try:
-    # Decode Base64-encoded encrypted parts
-    encrypted_aes_key = base64.b64decode(encrypted_email['encrypted_aes_key'])
-    encrypted_iv = base64.b64decode(encrypted_email['encrypted_iv'])
-    encrypted_email_data = base64.b64decode(encrypted_email['encrypted_email_data'])
-
-    # Load the RSA private key
-    private_key = serialization.load_pem_private_key(
-      rsa_private_key_pem.encode('utf-8'),
+  if count <= 0:
+    return []
+  if executor is None:
+    # Spawned, not forked: callers are often worker threads, and forking a threaded process can deadlock the child
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn')) as pool:
+      return generate_key_pairs(count, pool, key_size)
+  chunksize = max(1, count // (4 * (getattr(executor, '_max_workers', None) or 1)))
+  return list(executor.map(_generate_key_pair, repeat(key_size, count), chunksize=chunksize))
+
+
+# Base64 characters decoded per step when decrypting large emails; a multiple of 4
+_CHUNK = 1 << 20
+
+
+def _decoded_length(encoded: Union[str, bytes]) -> int:
+  """Length of the bytes a padded base64 string decodes to."""
+  n = len(encoded)
+  padding_length = 0
+  if n and encoded[-1] in ('=', 61):
+    padding_length = 2 if encoded[-2] in ('=', 61) else 1
+  return n // 4 * 3 - padding_length
+
+
+def _decrypt_into(cipher_context, encoded: Union[str, bytes]) -> bytearray:
+  """
+  Base64-decode and decrypt `encoded` straight into one preallocated buffer.
+
+  Large payloads are decoded a chunk at a time, so only the buffer, the encoded
+  input and one chunk of ciphertext are alive at once, however large the email.
+  """
+  if len(encoded) <= _CHUNK or len(encoded) % 4 or (b'\n' if isinstance(encoded, bytes) else '\n') in encoded:
+    chunks = (binascii.a2b_base64(encoded),)
+    size = len(chunks[0])
+  else:
+    chunks = (binascii.a2b_base64(encoded[i:i + _CHUNK]) for i in range(0, len(encoded), _CHUNK))
+    size = _decoded_length(encoded)
+  # update_into needs block_size - 1 bytes of slack past the output
+  buffer = bytearray(size + 15)
+  written = 0
+  with memoryview(buffer) as view:
+    for chunk in chunks:
+      written += cipher_context.update_into(chunk, view[written:])
+    tail = cipher_context.finalize()
+  del buffer[written:]
+  buffer += tail
+  return buffer
+
+
+class Decryptor:
+  """
+  Decrypts encrypted emails with a single, pre-parsed RSA private key.
+
+  Parsing a PEM is far more expensive than the RSA-OAEP unwrap itself, so the
+  key and the OAEP padding are built once here and reused for every email.
+  """
+
+  __slots__ = ('pem', 'private_key', 'fingerprint', 'padding')
+
+  def __init__(self, rsa_private_key_pem: Union[str, bytes]) -> None:
+    """
+    Args:
+      rsa_private_key_pem (str | bytes): RSA private key in PEM format.
+    """
+    pem = self.pem = _pem_bytes(rsa_private_key_pem)
+    self.fingerprint = key_fingerprint(pem)
+    self.private_key = serialization.load_pem_private_key(
+      pem,
       password=None,
       backend=default_backend()
     )
-
-    # Decrypt the AES key using RSA-OAEP
-    aes_key = private_key.decrypt(
-      encrypted_aes_key,
-      padding.OAEP(
-        mgf=padding.MGF1(algorithm=hashes.SHA256()),
-        algorithm=hashes.SHA256(),
-        label=None
-      )
+    self.padding = padding.OAEP(
+      mgf=padding.MGF1(algorithm=hashes.SHA256()),
+      algorithm=hashes.SHA256(),
+      label=None
     )
 
-    # Decrypt the email content using AES-CFB
-    cipher = Cipher(algorithms.AES(aes_key), modes.CFB(encrypted_iv), backend=default_backend())
-    decryptor = cipher.decryptor()
-    decrypted_email_data = decryptor.update(encrypted_email_data) + decryptor.finalize()
+  def decrypt(self, encrypted_email: dict) -> Optional[Email]:
+    """
+    Decrypt an email using RSA and AES encryption.
+    Args:
+      encrypted_email (dict): Dictionary containing encrypted AES key, IV, and email data (Base64 encoded).
+
+    Returns:
+      Email: Decrypted email object, or None if decryption fails.
+    """
+    try:
+      # Decode Base64-encoded encrypted parts
+      encrypted_aes_key = base64.b64decode(encrypted_email['encrypted_aes_key'])
+      encrypted_iv = base64.b64decode(encrypted_email['encrypted_iv'])
+
+      # Decrypt the AES key using RSA-OAEP
+      aes_key = self.private_key.decrypt(encrypted_aes_key, self.padding)
+
+      # Decrypt the email content using AES-CFB, into a single buffer
+      cipher = Cipher(algorithms.AES(aes_key), modes.CFB(encrypted_iv), backend=default_backend())
+      decrypted_email_data = _decrypt_into(cipher.decryptor(), encrypted_email['encrypted_email_data'])
+
+      # Deserialize the decrypted email JSON to an Email object, parsing the buffer in place
+      email = Email.from_json(decrypted_email_data)
+      return email
+
+    except Exception as e:
+      print(f"Error decrypting email: {e}")
+      return None
+
+  def decrypt_many(self, encrypted_emails: Iterable[dict], executor: Optional[Executor] = None) -> List[Optional[Email]]:
+    """
+    Decrypt a batch of emails, optionally spread over an executor.
+    Args:
+      encrypted_emails (Iterable[dict]): Encrypted email payloads.
+      executor (Executor, optional): Thread or process pool to decrypt on. Decrypts in the calling thread when None.
+
+    Returns:
+      list: Decrypted emails in input order, None for each email that failed to decrypt.
+    """
+    if executor is None:
+      return [self.decrypt(email) for email in encrypted_emails]
+    if isinstance(executor, ProcessPoolExecutor):
+      encrypted_emails = list(encrypted_emails)
+      chunksize = max(1, len(encrypted_emails) // (4 * (getattr(executor, '_max_workers', None) or 1)))
+      return list(executor.map(self.decrypt, encrypted_emails, chunksize=chunksize))
+    return list(executor.map(self.decrypt, encrypted_emails))
+
+  def __reduce__(self):
+    # Only the PEM crosses process boundaries; each worker parses it once into its own cache
+    return (get_decryptor, (self.pem,))
+
+
+# Per-process cache of Decryptors, keyed by key fingerprint
+_decryptors: Dict[str, Decryptor] = {}
+
 
-    # Deserialize the decrypted email JSON to an Email object
-    email = Email.from_json(decrypted_email_data.decode('utf-8'))
-    return email
+def _pem_bytes(rsa_private_key_pem: Union[str, bytes]) -> bytes:
+  """Normalise a PEM given as str or bytes to bytes."""
+  if isinstance(rsa_private_key_pem, str):
+    return rsa_private_key_pem.encode('utf-8')
+  return bytes(rsa_private_key_pem)
 
+
+def key_fingerprint(rsa_private_key_pem: Union[str, bytes]) -> str:
+  """
+  Compute a stable fingerprint for a PEM encoded key.
+  Args:
+    rsa_private_key_pem (str | bytes): Key in PEM format.
+
+  Returns:
+    str: Hex encoded SHA-256 digest of the PEM.
+  """
+  return hashlib.sha256(_pem_bytes(rsa_private_key_pem)).hexdigest()
+
+
+def get_decryptor(rsa_private_key_pem: Union[str, bytes]) -> Decryptor:
+  """
+  Return the cached Decryptor for a key, parsing the PEM on first use only.
+  Args:
+    rsa_private_key_pem (str | bytes): RSA private key in PEM format.
+
+  Returns:
+    Decryptor: Decryptor holding the parsed key.
+  """
+  fingerprint = key_fingerprint(rsa_private_key_pem)
+  decryptor = _decryptors.get(fingerprint)
+  if decryptor is None:
+    decryptor = _decryptors[fingerprint] = Decryptor(rsa_private_key_pem)
+  return decryptor
+
+
+def clear_decryptor_cache() -> None:
+  """Drop every cached Decryptor."""
+  _decryptors.clear()
+
+
+def decrypt_email(encrypted_email, rsa_private_key_pem):
+  """
+  Decrypt an email using RSA and AES encryption.
+  Args:
+    encrypted_email (dict): Dictionary containing encrypted AES key, IV, and email data (Base64 encoded).
+    rsa_private_key_pem (str): RSA private key in PEM format as a string.
+
+  Returns:
+    Email: Decrypted email object, or None if decryption fails.
+  """
+  try:
+    decryptor = get_decryptor(rsa_private_key_pem)
   except Exception as e:
     print(f"Error decrypting email: {e}")
     return None
+  return decryptor.decrypt(encrypted_email)
+
+
+def decrypt_emails(encrypted_emails: Iterable[dict], rsa_private_key_pem: Union[str, bytes, Decryptor], executor: Optional[Executor] = None) -> List[Optional[Email]]:
+  """
+  Decrypt a batch of emails, optionally on a thread or process pool.
+
+  ``cryptography`` releases the GIL while decrypting, so a ThreadPoolExecutor scales
+  with cores. A ProcessPoolExecutor works too; the key is parsed once per worker.
+  Args:
+    encrypted_emails (Iterable[dict]): Encrypted email payloads.
+    rsa_private_key_pem (str | bytes | Decryptor): RSA private key in PEM format, or a Decryptor.
+    executor (Executor, optional): Pool to decrypt on. Decrypts in the calling thread when None.
+
+  Returns:
+    list: Decrypted emails in input order, None for each email that failed to decrypt.
+  """
+  if isinstance(rsa_private_key_pem, Decryptor):
+    decryptor = rsa_private_key_pem
+  else:
+    decryptor = get_decryptor(rsa_private_key_pem)
+  return decryptor.decrypt_many(encrypted_emails, executor)
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from . import core
+from .types import Email, Inbox
+
+
+class Cursor(NamedTuple):
+  """Where the sync of an alias is up to."""
+  # Newest email seen, sent as the ``after`` cursor, and its timestamp (None if no email seen had one)
+  email_id: str
+  timestamp: Optional[float]
+  # Ids of the most recently delivered emails, so emails sharing the newest timestamp, or
+  # without a timestamp, are never delivered twice
+  seen: Tuple[str, ...] = ()
+
+
+class CursorStore:
+  """Base class for stores that remember the newest email seen per alias."""
+
+  def get(self, alias: str) -> Optional[Cursor]:
+    """Return the cursor for an alias, or None if the alias was never synced."""
+    raise NotImplementedError
+
+  def set(self, alias: str, email_id: str, timestamp: Optional[float], seen: Iterable[str] = ()) -> None:
+    """Record the newest email seen for an alias, and the ids of the emails delivered most recently."""
+    raise NotImplementedError
+
+  def delete(self, alias: str) -> None:
+    """Forget an alias so its next sync starts from the beginning."""
+    raise NotImplementedError
+
+  def close(self) -> None:
+    """Release any resources held by the store."""
+
+
+class MemoryCursorStore(CursorStore):
+  """Keeps cursors in a dict for the lifetime of the process."""
+
+  def __init__(self) -> None:
+    self.cursors: Dict[str, Cursor] = {}
+
+  def get(self, alias: str) -> Optional[Cursor]:
+    return self.cursors.get(alias)
+
+  def set(self, alias: str, email_id: str, timestamp: Optional[float], seen: Iterable[str] = ()) -> None:
+    self.cursors[alias] = Cursor(email_id, timestamp, tuple(seen))
+
+  def delete(self, alias: str) -> None:
+    self.cursors.pop(alias, None)
+
+
+class JSONCursorStore(MemoryCursorStore):
+  """Keeps cursors in memory and persists them to a JSON file."""
+
+  def __init__(self, path: Union[str, os.PathLike], autoflush: bool = True) -> None:
+    """
+    Args:
+      path (str | PathLike): JSON file to load from and save to.
+      autoflush (bool): Rewrite the file on every change. Otherwise call `flush` yourself.
+    """
+    super().__init__()
+    self.path = os.fspath(path)
+    self.autoflush = autoflush
+    self.lock = threading.Lock()
+    if os.path.exists(self.path):
+      with open(self.path, 'r', encoding='utf-8') as f:
+        self.cursors = {alias: Cursor(email_id, timestamp, tuple(seen)) for alias, (email_id, timestamp, seen) in json.load(f).items()}
+
+  # Changes and writes share the lock, so a flush never iterates the cursors while another thread changes them
+  def get(self, alias: str) -> Optional[Cursor]:
+    with self.lock:
+      return super().get(alias)
+
+  def set(self, alias: str, email_id: str, timestamp: Optional[float], seen: Iterable[str] = ()) -> None:
+    with self.lock:
+      super().set(alias, email_id, timestamp, seen)
+      if self.autoflush:
+        self._write()
+
+  def delete(self, alias: str) -> None:
+    with self.lock:
+      super().delete(alias)
+      if self.autoflush:
+        self._write()
+
+  def flush(self) -> None:
+    """Atomically write every cursor to the file."""
+    with self.lock:
+      self._write()
+
+  def _write(self) -> None:
+    tmp = f"{self.path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+      json.dump(self.cursors, f, separators=(",", ":"))
+    os.replace(tmp, self.path)
+
+  def close(self) -> None:
+    self.flush()
+
+
+class SQLiteCursorStore(CursorStore):
+  """Persists cursors in a SQLite database, safe to share between threads."""
+
+  def __init__(self, path: Union[str, os.PathLike], timeout: float = 30) -> None:
+    """
+    Args:
+      path (str | PathLike): SQLite database file, created if missing.
+      timeout (float): Seconds to wait for another process holding the database lock, e.g. the other workers of a `Poller`.
+    """
+    self.lock = threading.Lock()
+    self.connection = sqlite3.connect(os.fspath(path), timeout=timeout, check_same_thread=False)
+    # Readers do not wait on writers, and writers only on each other
+    self.connection.execute("PRAGMA journal_mode=WAL")
+    with self.connection:
+      self.connection.execute(
+        "CREATE TABLE IF NOT EXISTS cursors (alias TEXT PRIMARY KEY, email_id TEXT NOT NULL, timestamp REAL, seen TEXT)"
+      )
+
+  def get(self, alias: str) -> Optional[Cursor]:
+    with self.lock:
+      row = self.connection.execute("SELECT email_id, timestamp, seen FROM cursors WHERE alias = ?", (alias,)).fetchone()
+    return Cursor(row[0], row[1], tuple(json.loads(row[2])) if row[2] else ()) if row else None
+
+  def set(self, alias: str, email_id: str, timestamp: Optional[float], seen: Iterable[str] = ()) -> None:
+    with self.lock, self.connection:
+      self.connection.execute(
+        "INSERT OR REPLACE INTO cursors (alias, email_id, timestamp, seen) VALUES (?, ?, ?, ?)",
+        (alias, email_id, timestamp, json.dumps(list(seen), separators=(",", ":")))
+      )
+
+  def delete(self, alias: str) -> None:
+    with self.lock, self.connection:
+      self.connection.execute("DELETE FROM cursors WHERE alias = ?", (alias,))
+
+  def close(self) -> None:
+    self.connection.close()
+
+
+class _BaseInboxSyncer:
+  """Cursor bookkeeping shared by InboxSyncer and AsyncInboxSyncer."""
+
+  def __init__(self, client, store: Optional[CursorStore] = None, encrypted: bool = False, seen_limit: int = 1024) -> None:
+    """
+    Args:
+      client (Sync | Async): Client used to fetch inboxes.
+      store (CursorStore, optional): Where cursors are kept. Defaults to a MemoryCursorStore.
+      encrypted (bool): Sync encrypted inboxes through `view_encrypted_inbox` instead of `view_inbox`.
+      seen_limit (int): Ids of delivered emails remembered per alias to filter out repeats.
+    """
+    self.client = client
+    self.store = store if store is not None else MemoryCursorStore()
+    self.encrypted = encrypted
+    self.seen_limit = seen_limit
+
+  def _fetch(self):
+    return self.client.view_encrypted_inbox if self.encrypted else self.client.view_inbox
+
+  def _after(self, alias: str) -> Optional[str]:
+    cursor = self.store.get(alias)
+    return cursor.email_id if cursor else None
+
+  def _advance(self, alias: str, inbox: Inbox) -> List[Email]:
+    """Drop emails already seen, then move the cursor to the newest remaining email."""
+    cursor = self.store.get(alias)
+    emails = [email for email in inbox if email is not None]
+    if cursor:
+      seen = set(cursor.seen)
+      emails = [
+        email for email in emails
+        if email.id not in seen
+        and (email.timestamp is None or cursor.timestamp is None or email.timestamp >= cursor.timestamp)
+      ]
+    if not emails:
+      return emails
+    email_id, timestamp = (cursor.email_id, cursor.timestamp) if cursor else (None, None)
+    for email in emails:
+      email_id, timestamp = core.advance_cursor(email_id, timestamp, email)
+    # Oldest first, so the limit drops the ids least likely to be returned again
+    seen_ids = list(dict.fromkeys([*(cursor.seen if cursor else ()), *(email.id for email in emails)]))
+    self.store.set(alias, email_id, timestamp, seen_ids[-self.seen_limit:])
+    return emails
+
+  def reset(self, alias: str) -> None:
+    """Forget the cursor of an alias so the next sync returns its whole inbox."""
+    self.store.delete(alias)
+
+
+class InboxSyncer(_BaseInboxSyncer):
+  """Fetches only the emails a `Sync` client has not seen yet, per alias."""
+
+  def sync(self, alias: str) -> List[Email]:
+    """
+    Fetch the emails received since the last sync of this alias.
+
+    Args:
+      alias (str): Alias of the inbox.
+
+    Returns:
+      list: New emails, or the raw response if the inbox could not be read.
+    """
+    inbox = self._fetch()(alias, after=self._after(alias))
+    if not isinstance(inbox, list):
+      return inbox
+    return self._advance(alias, inbox)
+
+
+class AsyncInboxSyncer(_BaseInboxSyncer):
+  """Fetches only the emails an `Async` client has not seen yet, per alias."""
+
+  async def sync(self, alias: str) -> List[Email]:
+    """
+    Fetch the emails received since the last sync of this alias.
+
+    Args:
+      alias (str): Alias of the inbox.
+
+    Returns:
+      list: New emails, or the raw response if the inbox could not be read.
+    """
+    # The store may read and write a database, so it is used from the loop's default pool
+    loop = asyncio.get_running_loop()
+    inbox = await self._fetch()(alias, after=await loop.run_in_executor(None, self._after, alias))
+    if not isinstance(inbox, list):
+      return inbox
+    return await loop.run_in_executor(None, self._advance, alias, inbox)
@@ -0,0 +1,113 @@
+"""
+Long-lived decryption workers for the Async client.
+
+Each worker process parses the private key once, when it starts, and then only
+receives the base64 payloads. At most ``max_pending`` emails are queued or in
+flight at a time; `DecryptionPool.submit` waits for a free slot, so a burst of
+encrypted mail pushes back on the producer instead of piling up in memory.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from . import crypto
+from .types import Email
+
+# The worker's Decryptor, set once by `_init_worker`
+_worker_decryptor: Optional[crypto.Decryptor] = None
+
+
+def _init_worker(pem: bytes) -> None:
+  global _worker_decryptor
+  _worker_decryptor = crypto.get_decryptor(pem)
+
+
+def _decrypt_in_worker(encrypted_email: Dict[str, Any]) -> Optional[Email]:
+  return _worker_decryptor.decrypt(encrypted_email)
+
+
+class DecryptionPool:
+  """
+  A pool of worker processes, each holding the parsed private key, that decrypt emails off the event loop.
+
+  Owned by an `Async` client when it is created with ``decrypt_workers``, or shared between clients.
+  """
+
+  def __init__(
+    self, private_key: Union[str, bytes], workers: Optional[int] = None, max_pending: Optional[int] = None,
+    executor: Optional[Executor] = None
+  ) -> None:
+    """
+    Args:
+      private_key (str | bytes): RSA private key in PEM format.
+      workers (int, optional): Number of worker processes. Defaults to the CPU count.
+      max_pending (int, optional): Emails queued or in flight before `submit` waits. Defaults to 4 per worker.
+      executor (Executor, optional): Pool to use instead of starting worker processes. It must be able to run
+        `crypto.Decryptor.decrypt`; the key is then sent with every email instead of once per worker.
+    """
+    self.pem = crypto._pem_bytes(private_key)
+    self.workers = workers or os.cpu_count() or 1
+    self.max_pending = max_pending or 4 * self.workers
+    self.executor_owner = executor is None
+    if executor is None:
+      self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.pem,))
+      self.function = _decrypt_in_worker
+    else:
+      self.executor = executor
+      self.function = crypto.get_decryptor(self.pem).decrypt
+    self._slots: Optional[asyncio.Semaphore] = None
+    self.closed = False
+
+  @property
+  def slots(self) -> asyncio.Semaphore:
+    # Created on first use so the pool can be built outside the event loop
+    if self._slots is None:
+      self._slots = asyncio.Semaphore(self.max_pending)
+    return self._slots
+
+  async def submit(self, encrypted_email: Dict[str, Any]) -> 'asyncio.Future[Optional[Email]]':
+    """
+    Queue one email, waiting while `max_pending` emails are already queued or in flight.
+
+    Returns:
+      Future: Resolves to the decrypted email, or None if it failed to decrypt.
+    """
+    if self.closed:
+      raise RuntimeError("DecryptionPool is closed")
+    slots = self.slots
+    await slots.acquire()
+    try:
+      future = asyncio.get_running_loop().run_in_executor(self.executor, self.function, encrypted_email)
+    except BaseException:
+      slots.release()
+      raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+  async def decrypt(self, encrypted_email: Dict[str, Any]) -> Optional[Email]:
+    """Decrypt one email on the pool."""
+    return await (await self.submit(encrypted_email))
+
+  async def decrypt_many(self, encrypted_emails: Iterable[Dict[str, Any]]) -> List[Optional[Email]]:
+    """
+    Decrypt a batch on the pool, feeding it no faster than the workers drain it.
+
+    Returns:
+      list: Decrypted emails in input order, None for each email that failed to decrypt.
+    """
+    futures = [await self.submit(email) for email in encrypted_emails]
+    return list(await asyncio.gather(*futures))
+
+  def close(self, wait: bool = True) -> None:
+    """Stop the worker processes. A shared executor is left running."""
+    self.closed = True
+    if self.executor_owner:
+      self.executor.shutdown(wait=wait, cancel_futures=True)
+
+  def __enter__(self) -> 'DecryptionPool':
+    return self
+
+  def __exit__(self, *exc_info: Any) -> None:
+    self.close()
@@ -0,0 +1,238 @@
+"""
+Verification code and link extraction from emails.
+
+An `Extractor` compiles its rules once, strips HTML with a single regex pass
+(keeping link targets), and merges every rule's matches over an email's
+subject and body by position. Results are memoized by email id, and batches
+can be spread over a process pool.
+"""
+
+import html
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .types import Email
+
+
+class Rule(NamedTuple):
+  """
+  One thing to extract.
+
+  Attributes:
+    name (str): Name reported with every match.
+    pattern (str): Regular expression. If it has a group named ``value``, that group is the match value.
+    kind (str): Kind of match, e.g. ``'code'`` or ``'link'``.
+    sender (str, optional): Regular expression the sender must contain for the rule to apply. Applies to every email when None.
+  """
+  name: str
+  pattern: str
+  kind: str = 'code'
+  sender: Optional[str] = None
+
+
+class Match(NamedTuple):
+  """One extracted value."""
+  rule: str
+  kind: str
+  value: str
+
+
+class Extraction(NamedTuple):
+  """Everything extracted from one email, in the order it appears."""
+  email_id: Optional[str]
+  matches: Tuple[Match, ...]
+
+  @property
+  def codes(self) -> List[str]:
+    return [m.value for m in self.matches if m.kind == 'code']
+
+  @property
+  def links(self) -> List[str]:
+    return [m.value for m in self.matches if m.kind == 'link']
+
+  @property
+  def code(self) -> Optional[str]:
+    """The first code, if any."""
+    return next((m.value for m in self.matches if m.kind == 'code'), None)
+
+  @property
+  def link(self) -> Optional[str]:
+    """The first link, if any."""
+    return next((m.value for m in self.matches if m.kind == 'link'), None)
+
+
+_URL = r"https?://[^\s<>\"'()]+[^\s<>\"'().,;:!?]"
+
+# Earlier rules win where several match at the same position. The leading lookaheads let a
+# rule reject most positions on one character instead of trying the whole rule there.
+DEFAULT_RULES: Tuple[Rule, ...] = (
+  Rule('confirmation_link', r"(?P<value>https?://[^\s<>\"'()]*(?:verif|confirm|activat|magic|reset|token|auth|login)[^\s<>\"'()]*[^\s<>\"'().,;:!?])", 'link'),
+  Rule('link', _URL, 'link'),
+  Rule(
+    'otp',
+    r"(?=[CcOoPpSsVv])(?i:\b(?:code|otp|pin|passcode|password|verification|security|one[- ]time)\b[^0-9A-Za-z\n]{0,3}"
+    r"(?:\w+\s){0,3}?[^0-9A-Za-z\n]{0,3})(?P<value>\d{3}[- ]\d{3}|\d{4,8}|(?=[A-Z0-9]{0,7}\d)[A-Z0-9]{6,8})\b",
+    'code'
+  ),
+  Rule('code', r"(?=\d)(?<![\w#$€£.,/:-])(?P<value>\d{6})\b(?![.,]\d)", 'code'),
+)
+
+# Tags become spaces in one pass; an anchor's href is kept in their place so links survive stripping
+_TAGS = re.compile(
+  r"<(?:script|style)\b.*?</(?:script|style)\s*>|<a\s[^>]*?href\s*=\s*[\"']([^\"']*)[\"'][^>]*>|<[^>]*>",
+  re.IGNORECASE | re.DOTALL
+)
+
+
+def strip_html(text: str) -> str:
+  """Cheaply turn an HTML body into text, keeping link targets. Plain text is returned unchanged."""
+  if '<' not in text:
+    return html.unescape(text) if '&' in text else text
+  text = _TAGS.sub(lambda m: f" {m.group(1)} " if m.group(1) else " ", text)
+  return html.unescape(text) if '&' in text else text
+
+
+class _Compiled(NamedTuple):
+  rule: Rule
+  pattern: 're.Pattern[str]'
+  sender: Optional['re.Pattern[str]']
+  value: Union[str, int]
+
+
+class Extractor:
+  """
+  Extracts verification codes and links from emails with a compiled rule set.
+
+  Results are memoized by email id, up to `cache_size` emails. Safe to share between threads.
+  """
+
+  def __init__(self, rules: Sequence[Rule] = DEFAULT_RULES, cache_size: int = 4096) -> None:
+    """
+    Args:
+      rules (Sequence[Rule]): Rules in priority order. Defaults to codes, OTPs and links.
+      cache_size (int): Number of results memoized by email id, 0 to disable.
+    """
+    self.rules = tuple(rules)
+    self.cache_size = cache_size
+    self.lock = threading.Lock()
+    self.cache: 'OrderedDict[str, Extraction]' = OrderedDict()
+    # Each rule keeps its own pattern: CPython's re only skips ahead to a pattern's literal prefix, which
+    # one alternation of every rule would lose, so separate passes beat a single combined pattern
+    self.compiled: List[_Compiled] = []
+    for rule in self.rules:
+      pattern = re.compile(rule.pattern)
+      sender = re.compile(rule.sender, re.IGNORECASE) if rule.sender is not None else None
+      self.compiled.append(_Compiled(rule, pattern, sender, 'value' if 'value' in pattern.groupindex else 0))
+
+  def extract_text(self, text: str, sender: Optional[str] = None) -> Tuple[Match, ...]:
+    """
+    Extract from a subject or body, e.g. the result of `fetch_email_body`. HTML is stripped first.
+
+    Args:
+      text (str): Text or HTML to scan.
+      sender (str, optional): Sender of the email, to apply sender-specific rules.
+    """
+    text = strip_html(text)
+    found: List[Tuple[int, int, int, Match]] = []
+    for priority, (rule, pattern, rule_sender, value) in enumerate(self.compiled):
+      if rule_sender is not None and (sender is None or not rule_sender.search(sender)):
+        continue
+      found.extend(
+        (m.start(), priority, m.end(), Match(rule.name, rule.kind, m.group(value))) for m in pattern.finditer(text)
+      )
+    found.sort()
+    # Keep the leftmost match, and the earliest rule's where several start together, dropping any it overlaps
+    matches: Dict[Match, None] = {}
+    end = 0
+    for match_start, _, match_end, match in found:
+      if match_start >= end:
+        # dict keys also drop repeats, e.g. a link that appears as both an href and the anchor text
+        matches.setdefault(match)
+        end = match_end
+    return tuple(matches)
+
+  def extract(self, email: Email) -> Extraction:
+    """Extract from an email's subject and body, memoized by email id."""
+    email_id = email.id
+    if email_id is not None and self.cache_size:
+      with self.lock:
+        cached = self.cache.get(email_id)
+        if cached is not None:
+          self.cache.move_to_end(email_id)
+          return cached
+    text = f"{email.subject or ''}\n{email.body or ''}"
+    result = Extraction(email_id, self.extract_text(text, email.sender))
+    if email_id is not None and self.cache_size:
+      self._remember(result)
+    return result
+
+  def _remember(self, result: Extraction) -> None:
+    with self.lock:
+      self.cache[result.email_id] = result
+      self.cache.move_to_end(result.email_id)
+      while len(self.cache) > self.cache_size:
+        self.cache.popitem(last=False)
+
+  def iter_extract(self, emails: Iterable[Optional[Email]]) -> Iterator[Extraction]:
+    """Lazily extract from a stream of emails, e.g. `iter_inbox` or `watch`. Emails that failed to decrypt are skipped."""
+    for email in emails:
+      if email is not None:
+        yield self.extract(email)
+
+  def extract_many(self, emails: Iterable[Optional[Email]], executor: Optional[Executor] = None) -> List[Extraction]:
+    """
+    Extract from a batch of emails, such as an `Inbox`, optionally on a process pool.
+
+    Regular expressions hold the GIL, so only a ProcessPoolExecutor speeds this up. Emails
+    already memoized are not sent to the pool, and the pool's results are memoized here.
+
+    Returns:
+      list: One extraction per email, in order. Emails that failed to decrypt are skipped.
+    """
+    emails = [email for email in emails if email is not None]
+    if executor is None:
+      return [self.extract(email) for email in emails]
+    results: List[Optional[Extraction]] = [None] * len(emails)
+    pending = []
+    with self.lock:
+      for i, email in enumerate(emails):
+        cached = self.cache.get(email.id) if email.id is not None else None
+        if cached is not None:
+          results[i] = cached
+        else:
+          pending.append(i)
+    if pending:
+      chunksize = 1
+      if isinstance(executor, ProcessPoolExecutor):
+        chunksize = max(1, len(pending) // (4 * (getattr(executor, '_max_workers', None) or 1)))
+      for i, result in zip(pending, executor.map(self._extract_uncached, [emails[i] for i in pending], chunksize=chunksize)):
+        results[i] = result
+        if result.email_id is not None and self.cache_size:
+          self._remember(result)
+    return results
+
+  def _extract_uncached(self, email: Email) -> Extraction:
+    return Extraction(email.id, self.extract_text(f"{email.subject or ''}\n{email.body or ''}", email.sender))
+
+  def clear(self) -> None:
+    """Drop every memoized result."""
+    with self.lock:
+      self.cache.clear()
+
+  def __reduce__(self):
+    # Workers get the rules and compile them once; the memo cache stays in this process
+    return (Extractor, (self.rules, 0))
+
+
+_default: Optional[Extractor] = None
+
+
+def extract(email: Email) -> Extraction:
+  """Extract codes and links from one email with the default rules."""
+  global _default
+  if _default is None:
+    _default = Extractor()
+  return _default.extract(email)
@@ -0,0 +1,93 @@
+"""
+Optional httpx transport for the Async client.
+
+With ``http2=True`` one connection multiplexes every concurrent request instead of
+opening a TCP socket per request in flight. httpx only negotiates HTTP/2 over TLS,
+so ``http://`` URLs are spoken to with cleartext HTTP/2 from the first byte (prior
+knowledge), which the server must accept. Exposes the small part of the
+``aiohttp.ClientSession`` interface the Async client uses, so the rest of the
+client is unchanged. Requires ``httpx[http2]``.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import aiohttp
+import httpx
+
+
+class HTTPXResponse:
+  """An httpx response behind the aiohttp response attributes the Async client reads."""
+
+  def __init__(self, response: Any) -> None:
+    self.raw = response
+    self.status: int = response.status_code
+    self.reason: str = response.reason_phrase
+    self.headers = response.headers
+    self.payload: Any = None
+
+  async def read(self) -> bytes:
+    return self.raw.content
+
+  def get_encoding(self) -> str:
+    return self.raw.encoding or 'utf-8'
+
+  async def text(self, encoding: Optional[str] = None) -> str:
+    return self.raw.content.decode(encoding or self.get_encoding())
+
+
+class _RequestContext:
+  """Async context manager returned by `HTTPXSession.request`, like aiohttp's."""
+
+  def __init__(self, client: Any, method: str, url: str, kwargs: Dict[str, Any]) -> None:
+    self.client = client
+    self.method = method
+    self.url = url
+    self.kwargs = kwargs
+
+  async def __aenter__(self) -> HTTPXResponse:
+    try:
+      return HTTPXResponse(await self.client.request(self.method, self.url, **self.kwargs))
+    except httpx.TimeoutException as e:
+      raise asyncio.TimeoutError(str(e)) from e
+    except httpx.TransportError as e:
+      raise aiohttp.ClientConnectionError(str(e)) from e
+
+  async def __aexit__(self, *exc_info: Any) -> None:
+    pass
+
+
+class HTTPXSession:
+  """`httpx.AsyncClient` with the aiohttp session interface used by the Async client."""
+
+  def __init__(
+    self, headers: Dict[str, str], http2: bool = True, limit: int = 100, keepalive_timeout: float = 15,
+    connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None, http1: bool = True
+  ) -> None:
+    """
+    Args:
+      http2 (bool): Offer HTTP/2. Over TLS it is negotiated, falling back to HTTP/1.1.
+      http1 (bool): Allow HTTP/1.1. With ``http2`` and ``http1=False``, cleartext URLs use HTTP/2 with prior knowledge.
+    """
+    self.client = httpx.AsyncClient(
+      headers=headers,
+      http1=http1,
+      http2=http2,
+      limits=httpx.Limits(max_connections=limit or None, keepalive_expiry=keepalive_timeout),
+      timeout=httpx.Timeout(None, connect=connect_timeout, read=read_timeout),
+    )
+
+  def request(
+    self, method: str, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, str]] = None,
+    json: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None
+  ) -> _RequestContext:
+    return _RequestContext(self.client, method.upper(), url, {
+      'headers': headers, 'params': params, 'json': json, 'data': data,
+    })
+
+  @property
+  def closed(self) -> bool:
+    return self.client.is_closed
+
+  async def close(self) -> None:
+    await self.client.aclose()
@@ -1,210 +1,605 @@
-import requests
-from typing import Any, Dict, Optional, Union
-import json
-from . import crypto
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+import warnings
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from . import core
+from .core import DEFAULT_BASE_URL, INTERNAL_API_VERSION, USER_AGENT, BaseClient, Route, Utils
 from .errors import *
-from .types import Inbox, Email
-import aiohttp
+from .types import DeleteReport, Inbox, Email
+from .backoff import Backoff
+from .retry import RateLimiter, RetryPolicy
+from .singleflight import AsyncSingleFlight, SingleFlight
 
+# requests, aiohttp and cryptography are imported by the client, or the feature, that uses them,
+# so importing the package or using only one client stays cheap
+if TYPE_CHECKING:
+  import aiohttp
+  import requests
+  from requests.adapters import HTTPAdapter
+  from . import crypto
+  from .archive import Archive
+  from .cache import EmailCache
+  from .decrypt_pool import DecryptionPool
+  from .index import InboxIndex
+  from .keypool import KeyPool
+  from .keyring import KeyRing
+  from .metrics import Observer
 
-# API Version Constant
-INTERNAL_API_VERSION = 1
 
-# Utility Class for JSON Handling
-class Utils:
-  """Utility methods for handling JSON operations."""
+def _watch_delay(backoff: Backoff, deadline: Optional[float]) -> Optional[float]:
+  """Next poll delay for a watch, clipped to the deadline, or None once the deadline has passed."""
+  delay = backoff.next()
+  if deadline is not None:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+      return None
+    delay = min(delay, remaining)
+  return delay
 
-  @staticmethod
-  def handle_metadata(obj: Any) -> dict:
-    """Convert an object to a JSON-serializable dictionary."""
-    try:
-      return dict(obj)
-    except Exception:
-      raise TypeError(f"Type {obj.__class__.__name__} is not JSON serializable")
+def _coalesced(route_name: str) -> Callable:
+  """Let identical concurrent calls of a Sync method share one call when the client coalesces. `route_name` is reported to the observer."""
+  def decorator(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: 'Sync', *args: Any, **kwargs: Any) -> Any:
+      if self.flights is None:
+        return method(self, *args, **kwargs)
+      key = (method.__name__, args, tuple(sorted(kwargs.items())))
+      result, shared = self.flights.do(key, lambda: method(self, *args, **kwargs))
+      return self._shared(route_name, result, shared)
+    return wrapper
+  return decorator
 
-  @staticmethod
-  def to_json(obj: Any) -> str:
-    """Convert an object to a JSON string."""
-    return json.dumps(obj, separators=(",", ":"), ensure_ascii=True, default=Utils.handle_metadata)
 
-  from_json = staticmethod(json.loads)  # Parse JSON string to Python object
-
-# Route Class for API Requests
-class Route:
-  """Represents an API route."""
-
-  def __init__(self, base: str, method: str, path: str) -> None:
-    self.BASE = base
-    self.path = path
-    self.method = method
-    self.url = f"{self.BASE}{self.path}"
+def _acoalesced(route_name: str) -> Callable:
+  """Let identical concurrent calls of an Async method share one call when the client coalesces. `route_name` is reported to the observer."""
+  def decorator(method: Callable) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(self: 'Async', *args: Any, **kwargs: Any) -> Any:
+      if self.flights is None:
+        return await method(self, *args, **kwargs)
+      key = (method.__name__, args, tuple(sorted(kwargs.items())))
+      result, shared = await self.flights.do(key, lambda: method(self, *args, **kwargs))
+      return self._shared(route_name, result, shared)
+    return wrapper
+  return decorator
 
 # Synchronous API Session Handler
-class Sync:
+class Sync(BaseClient):
   """Manages a synchronized session with the API."""
 
-  def __init__(self, authorization: str, private_key: Optional[bytes] = None) -> None:
-    self.private_key = private_key.decode('utf-8') if private_key else None
+  def __init__(
+    self, authorization: str, private_key: Optional[bytes] = None, executor: Optional[Executor] = None, *,
+    cache: Optional[EmailCache] = None, retry: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None,
+    observer: Optional[Observer] = None, base_url: str = DEFAULT_BASE_URL, archive: Optional[Archive] = None,
+    keyring: Optional[KeyRing] = None, index: Optional[InboxIndex] = None,
+    adapter: Optional[HTTPAdapter] = None, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+    connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None, coalesce: bool = False
+  ) -> None:
+    """
+    Args:
+      authorization (str): API key.
+      private_key (bytes, optional): RSA private key in PEM format, used to decrypt encrypted inboxes.
+      executor (Executor, optional): Pool used to decrypt encrypted inboxes.
+      cache (EmailCache, optional): Cache for email bodies and decrypted emails, keyed by alias and email id.
+      retry (RetryPolicy, optional): When and how failed requests are retried. Requests are not retried when None.
+      rate_limiter (RateLimiter, optional): Token bucket every request of this client waits on.
+      observer (Observer, optional): Receives request, retry, error and decrypt events, e.g. a MetricsCollector.
+      base_url (str): API root, e.g. a local mock server.
+      archive (Archive, optional): Every email fetched by this client is appended to it.
+      keyring (KeyRing, optional): Per-alias private keys for encrypted inboxes; aliases without one use `private_key`.
+      index (InboxIndex, optional): Every email fetched by this client is added to it, and deleted emails are dropped.
+      adapter (HTTPAdapter, optional): Adapter to mount instead of building one; share it between clients to share one pool.
+      pool_connections (int): Number of per-host connection pools to cache.
+      pool_maxsize (int): Maximum number of connections kept alive per host.
+      pool_block (bool): Block when the pool is exhausted instead of opening throwaway connections.
+      connect_timeout (float, optional): Seconds to wait for a connection.
+      read_timeout (float, optional): Seconds to wait for the server between bytes.
+      coalesce (bool): Identical concurrent inbox and email fetches from several threads share one request and one decrypt.
+    """
+    super().__init__(private_key, executor, cache, retry, rate_limiter, observer, base_url, archive, keyring, index)
+    self.flights: Optional[SingleFlight] = SingleFlight() if coalesce else None
+    import requests
+    self.retryable_errors = (requests.ConnectionError, requests.Timeout)
+    self.adapter_owner = adapter is None
+    self.adapter = adapter or self.create_adapter(pool_connections, pool_maxsize, pool_block)
+    self.timeout = (connect_timeout, read_timeout)
     self.session: Optional[requests.Session] = None
-    self.BASE_URL = f"http://api.reusable.email/v{INTERNAL_API_VERSION}"
     self.generate_session(authorization)
 
+  @staticmethod
+  def create_adapter(pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False) -> HTTPAdapter:
+    """Create a keep-alive connection pool that can be shared by several Sync clients."""
+    from requests.adapters import HTTPAdapter
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+
   def generate_session(self, authorization: str) -> None:
     """Initialize the API session with the necessary headers."""
+    import requests
     self.session = requests.Session()
+    self.session.mount('http://', self.adapter)
+    self.session.mount('https://', self.adapter)
     self.session.headers.update({
-      'User-Agent': 'Python-SDK-Package/1.0',
+      'User-Agent': USER_AGENT,
       'Authorization': authorization
     })
 
+  def close(self) -> None:
+    """Close the session. A shared adapter is left open for the other clients."""
+    if self.session:
+      if not self.adapter_owner:
+        # Unmount first so Session.close() does not close a shared adapter
+        self.session.adapters.clear()
+      self.session.close()
+
+  def __enter__(self) -> 'Sync':
+    return self
+
+  def __exit__(self, *exc_info: Any) -> None:
+    self.close()
+
   @staticmethod
   def json_or_text(response: requests.Response) -> Union[Dict[str, Any], str]:
     """Extract JSON or text response from an HTTP response."""
-    text = response.text
-    try:
-      if response.headers.get('Content-Type', '').startswith('application/json'):
-        return Utils.from_json(text)
-    except KeyError:
-      pass
-    return text
+    return core.json_or_text(response.headers.get('Content-Type', ''), response.content, lambda: response.text)
 
   def request(self, route: Route, headers: Optional[Dict[str, str]] = None,
         params: Optional[Dict[str, str]] = None, json: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None) -> requests.Response:
     """Send an HTTP request based on the given route and parameters."""
-    methods = {
-      'get': self.session.get,
-      'post': self.session.post,
-      'put': self.session.put,
-      'delete': self.session.delete
-    }
-
-    if route.method not in methods:
-      raise ValueError(f"Unsupported HTTP method: {route.method}")
-
-    with methods[route.method](route.url, headers=headers, params=params, json=json, data=data) as response:
-      data = self.json_or_text(response)
-      if response.status_code in {200, 202}:
-        return response
-      elif response.status_code == 403:
-        raise Forbidden(response, data)
-      elif response.status_code == 404:
-        raise NotFound(response, data)
-      elif response.status_code == 400:
-        raise InvalidParams(response, data)
-      elif response.status_code >= 500:
-        raise FetchFail(response, data)
-      elif response.status_code >= 401:
-        raise HTTPException(response, data)
-      else:
-        raise HTTPException(response, data)
+    attempts = core.Attempts(self, route)
+    while True:
+      if self.rate_limiter is not None:
+        self.rate_limiter.acquire()
+      attempts.begin()
+      try:
+        with self.session.request(route.method, route.url, headers=headers, params=params, json=json, data=data, timeout=self.timeout) as response:
+          # Parsed once here and reused by the error path and the caller
+          body = response.payload = self.json_or_text(response)
+          delay = attempts.response(response, response.status_code, body, len(response.content))
+          if delay is None:
+            return response
+      except Exception as e:
+        delay = attempts.error(e)
+        if delay is None:
+          raise
+      time.sleep(delay)
 
   # Reg Inboxes
+  @_coalesced('inbox')
   def view_inbox(self, alias: str, after: Optional[str] = None) -> Union[list[Email], requests.Response]:
     """View the content of an inbox."""
-    params = {"alias": alias}
-    if after:
-      params["after"] = after
-    response = self.request(route=Route(self.BASE_URL, 'get', "/inbox"), params=params)
+    params = core.inbox_params(alias, after)
+    response = self.request(route=self.routes.inbox, params=params)
     if response.status_code == 200:
-      inbox: Inbox = []
-      json_response = response.json()
-      for email in json_response.get('inbox', []):
-        inbox.append(Email.from_json(json.dumps(email)))
+      inbox: Inbox = Email.from_dicts(core.inbox_items(response))
+      self._ingest(alias, inbox)
       return inbox
     return response
 
+  @_coalesced('email')
   def fetch_email_body(self, alias: str, email_id: str) -> Union[str, requests.Response]:
     """Fetch a specific email's body from the inbox."""
-    params = {"alias": alias, "id": email_id}
-    response = self.request(route=Route(self.BASE_URL, 'get', "/email"), params=params)
+    if self.cache is not None:
+      cached = self.cache.get(alias, email_id)
+      if isinstance(cached, str):
+        return cached
+    params = core.email_params(alias, email_id)
+    response = self.request(route=self.routes.email, params=params)
     if response.status_code == 200:
-      return response.text
+      body = response.payload if isinstance(response.payload, str) else response.text
+      if self.cache is not None:
+        self.cache.set(alias, email_id, body)
+      return body
     return response
 
   def delete_email(self, alias: str, email_id: str) -> Union[bool, requests.Response]:
     """Delete a specific email from the inbox."""
-    params = {"alias": alias, "id": email_id}
-    response = self.request(route=Route(self.BASE_URL, 'delete', "/email"), params=params)
+    if self.cache is not None:
+      self.cache.invalidate(alias, email_id)
+    self._unindex(alias, email_id)
+    params = core.email_params(alias, email_id)
+    response = self.request(route=self.routes.delete_email, params=params)
     if response.status_code == 200:
-      return response.json().get('success', False)
+      return core.success(response)
     return response
       
   # Encrypted Inboxes
   def create_encrypted_inbox(self, alias: str, public_key: bytes) -> Union[bool, requests.Response]:
     """Create a new encrypted inbox."""
-    json_data = {"publicKey": public_key.decode('utf-8'), "inboxName": alias.upper()}
-    response = self.request(route=Route(self.BASE_URL, 'post', "/encrypted/inbox"), data=json_data)
+    json_data = core.encrypted_inbox_data(alias, public_key)
+    response = self.request(route=self.routes.create_encrypted_inbox, data=json_data)
     if response.status_code == 200:
       return True
     return response
 
+  def _decrypt(self, encrypted_email: Dict[str, Any], decryptor: Optional[crypto.Decryptor] = None) -> Optional[Email]:
+    """Decrypt one email in the calling thread, reporting the time taken to the observer."""
+    decryptor = decryptor or self.decryptor
+    if self.observer is None:
+      return decryptor.decrypt(encrypted_email)
+    start = time.perf_counter()
+    email = decryptor.decrypt(encrypted_email)
+    self.observer.on_decrypt(1, time.perf_counter() - start)
+    return email
+
+  def _decrypt_many(self, encrypted_emails: List[Dict[str, Any]], decryptor: Optional[crypto.Decryptor] = None) -> List[Optional[Email]]:
+    """Decrypt a batch on `executor`, reporting the time taken to the observer."""
+    decryptor = decryptor or self.decryptor
+    if self.observer is None:
+      return decryptor.decrypt_many(encrypted_emails, self.executor)
+    start = time.perf_counter()
+    emails = decryptor.decrypt_many(encrypted_emails, self.executor)
+    self.observer.on_decrypt(len(emails), time.perf_counter() - start)
+    return emails
+
+  @_coalesced('encrypted_inbox')
   def view_encrypted_inbox(self, alias: str, after: Optional[str] = None) -> Union[list[Email], requests.Response]:
     """View the content of an inbox."""
-    params = {"alias": alias.upper()}
-    if after:
-      params["after"] = after
-    response = self.request(route=Route(self.BASE_URL, 'get', "/encrypted/inbox"), params=params)
-    if response.status_code == 200 and self.private_key:
-      inbox: Inbox = []
-      for email in response.json().get('inbox', []):
-        decrypted_email = crypto.decrypt_email(email, self.private_key)
-        inbox.append(decrypted_email)
+    params = core.inbox_params(alias, after, encrypted=True)
+    response = self.request(route=self.routes.encrypted_inbox, params=params)
+    decryptor = self.decryptor_for(alias)
+    if response.status_code == 200 and decryptor is not None:
+      inbox: Inbox = self._decrypt_many(core.inbox_items(response), decryptor)
+      self._ingest(alias, inbox)
       return inbox
     return response
 
+  @_coalesced('encrypted_email')
   def fetch_encrypted_email(self, alias: str, email_id: str) -> Union[Email, requests.Response]:
     """Fetch a specific email from the inbox."""
-    params = {"alias": alias.upper(), "id": email_id}
+    if self.cache is not None:
+      cached = self.cache.get(alias.upper(), email_id)
+      if isinstance(cached, Email):
+        return cached
+    params = core.email_params(alias, email_id, encrypted=True)
     try: # Server side is broken LMFAO
-      response = self.request(route=Route(self.BASE_URL, 'get', "/encrypted/email"), params=params)
+      response = self.request(route=self.routes.encrypted_email, params=params)
     except NotFound as e:
       response = e.response
     
     # if response.status == 200 and self.private_key:
-    if self.private_key:
+    decryptor = self.decryptor_for(alias)
+    if decryptor is not None:
       try:
-        json_response = response.json()
-        return crypto.decrypt_email(json_response, self.private_key)
+        json_response = core.payload_json(response)
+        email = self._decrypt(json_response, decryptor)
+        if email is not None and self.cache is not None:
+          self.cache.set(alias.upper(), email_id, email)
+        self._ingest(alias, (email,))
+        return email
       except:
         pass
     return response
 
   def delete_encrypted_email(self, alias: str, email_id: str) -> Union[bool, requests.Response]:
     """Delete a specific email from the inbox."""
-    params = {"alias": alias.upper(), "id": email_id}
-    response = self.request(route=Route(self.BASE_URL, 'delete', "/encrypted/email"), params=params)
+    if self.cache is not None:
+      self.cache.invalidate(alias.upper(), email_id)
+    self._unindex(alias, email_id)
+    params = core.email_params(alias, email_id, encrypted=True)
+    response = self.request(route=self.routes.delete_encrypted_email, params=params)
     if response.status_code == 200:
-      return response.json().get('success', False)
+      return core.success(response)
     return response
-      
-class Async:
+
+  # Streaming
+  def iter_inbox(self, alias: str, encrypted: bool = False, after: Optional[str] = None) -> Iterator[Email]:
+    """
+    Lazily iterate over an inbox, one page at a time.
+
+    Pages are fetched with the newest yielded email as the ``after`` cursor, and each email is
+    built, or decrypted, only when the iteration reaches it, so stopping early skips the rest.
+    Every email is yielded once, and iteration stops on a page with nothing new, so a server
+    that ignores ``after`` ends the iteration instead of repeating the inbox.
+
+    Args:
+      alias (str): Alias of the inbox.
+      encrypted (bool): Iterate over an encrypted inbox. Requires a private key.
+      after (str, optional): Start after this email id.
+    """
+    decryptor = self.decryptor_for(alias) if encrypted else None
+    if encrypted and decryptor is None:
+      raise ValueError("Iterating an encrypted inbox requires a private_key or a key for it in the keyring")
+    route = self.routes.encrypted_inbox if encrypted else self.routes.inbox
+    cursor, timestamp = after, None
+    yielded: Set[str] = set()
+    while True:
+      params = core.inbox_params(alias, cursor, encrypted)
+      response = self.request(route=route, params=params)
+      page = core.inbox_items(response) if response.status_code == 200 else []
+      fresh = False
+      for item in page:
+        email = self._decrypt(item, decryptor) if encrypted else Email.from_dict(item)
+        if email is not None and email.id not in yielded:
+          yielded.add(email.id)
+          fresh = True
+          cursor, timestamp = core.advance_cursor(cursor, timestamp, email)
+          self._ingest(alias, (email,))
+          yield email
+      # Stop on a page with nothing new: it is empty, or the server did not move past the cursor
+      if not fresh:
+        return
+
+  # Provisioning
+  def provision_encrypted_inboxes(
+    self, aliases: Iterable[str], key_pool: Optional[KeyPool] = None, executor: Optional[Executor] = None,
+    concurrency: int = 10
+  ) -> Dict[str, Tuple[bytes, bytes]]:
+    """
+    Create many encrypted inboxes, each with its own new key pair.
+
+    Key pairs are taken from `key_pool`, or generated in parallel on a process pool, and the inboxes
+    are then registered concurrently on a thread pool. The keys are added to `keyring` if the client has one.
+
+    Args:
+      aliases (Iterable[str]): Aliases of the inboxes to create.
+      key_pool (KeyPool, optional): Pool of pre-generated key pairs to take from.
+      executor (Executor, optional): Process pool to generate key pairs on when there is no `key_pool`.
+      concurrency (int): Maximum number of registrations in flight. Keep it at or below the pool size.
+
+    Returns:
+      dict: ``(public_key, private_key)`` by upper case alias, for every inbox created. Aliases that failed are left out.
+    """
+    aliases = [alias.upper() for alias in aliases]
+    if key_pool is not None:
+      key_pairs = key_pool.take(len(aliases))
+    else:
+      from .crypto import generate_key_pairs
+      key_pairs = generate_key_pairs(len(aliases), executor)
+
+    def create_one(alias: str, key_pair: Tuple[bytes, bytes]) -> bool:
+      try:
+        return self.create_encrypted_inbox(alias, key_pair[0]) is True
+      except Exception:
+        return False
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(aliases) or 1))) as pool:
+      created = list(pool.map(create_one, aliases, key_pairs))
+    provisioned = {alias: key_pair for alias, key_pair, ok in zip(aliases, key_pairs, created) if ok}
+    if self.keyring is not None:
+      for alias, (public_key, private_key) in provisioned.items():
+        self.keyring.add(alias, private_key, public_key)
+    return provisioned
+
+  # Bulk deletes
+  def delete_emails(self, alias: str, email_ids: Iterable[str], encrypted: bool = False, concurrency: int = 10) -> DeleteReport:
+    """
+    Delete many emails concurrently on a thread pool.
+
+    Failures, including `NotFound`, are recorded in the report instead of being raised.
+
+    Args:
+      alias (str): Alias of the inbox.
+      email_ids (Iterable[str]): Ids of the emails to delete.
+      encrypted (bool): Delete from an encrypted inbox.
+      concurrency (int): Maximum number of deletes in flight. Keep it at or below the pool size.
+
+    Returns:
+      DeleteReport: Deleted ids and failed ids with their error.
+    """
+    delete = self.delete_encrypted_email if encrypted else self.delete_email
+
+    def delete_one(email_id: str) -> Any:
+      try:
+        return delete(alias, email_id)
+      except Exception as e:
+        return e
+
+    email_ids = list(email_ids)
+    report = DeleteReport()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(email_ids) or 1))) as pool:
+      for email_id, result in zip(email_ids, pool.map(delete_one, email_ids)):
+        report.record(email_id, result)
+    return report
+
+  def purge_inbox(self, alias: str, encrypted: bool = False, concurrency: int = 10) -> DeleteReport:
+    """
+    Delete every email in an inbox.
+
+    Args:
+      alias (str): Alias of the inbox.
+      encrypted (bool): Purge an encrypted inbox. Requires a private key, since email ids are encrypted.
+      concurrency (int): Maximum number of deletes in flight.
+
+    Returns:
+      DeleteReport: Deleted ids and failed ids with their error.
+    """
+    if encrypted and self.decryptor_for(alias) is None:
+      raise ValueError("Purging an encrypted inbox requires a private_key or a key for it in the keyring")
+    inbox = self.view_encrypted_inbox(alias) if encrypted else self.view_inbox(alias)
+    if not isinstance(inbox, list):
+      return DeleteReport()
+    return self.delete_emails(alias, [email.id for email in inbox if email is not None], encrypted, concurrency)
+
+  # Watching
+  def watch(
+    self, alias: str, encrypted: bool = False, timeout: Optional[float] = None,
+    min_interval: float = 1.0, max_interval: float = 30.0, skip_existing: bool = False
+  ) -> Iterator[Email]:
+    """
+    Yield emails as they arrive in an inbox.
+
+    Polls with the newest seen email as the ``after`` cursor. The poll interval starts at
+    `min_interval`, backs off exponentially with jitter up to `max_interval` while the inbox
+    is quiet, and drops back to `min_interval` when new mail arrives.
+
+    Args:
+      alias (str): Alias of the inbox.
+      encrypted (bool): Watch an encrypted inbox through `view_encrypted_inbox`.
+      timeout (float, optional): Stop after this many seconds. Watches forever when None.
+      min_interval (float): Shortest delay between polls in seconds.
+      max_interval (float): Longest delay between polls in seconds.
+      skip_existing (bool): Only yield emails received after the watch started.
+    """
+    from .cursors import InboxSyncer
+    syncer = InboxSyncer(self, encrypted=encrypted)
+    backoff = Backoff(min_interval, max_interval)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if skip_existing:
+      syncer.sync(alias)
+    while True:
+      emails = syncer.sync(alias)
+      if isinstance(emails, list) and emails:
+        backoff.reset()
+        yield from emails
+      delay = _watch_delay(backoff, deadline)
+      if delay is None:
+        return
+      time.sleep(delay)
+
+  def wait_for(
+    self, alias: str, predicate: Optional[Callable[[Email], bool]] = None, timeout: float = 60.0,
+    encrypted: bool = False, **kwargs: Any
+  ) -> Email:
+    """
+    Wait for the first email in an inbox matching `predicate`.
+
+    Args:
+      alias (str): Alias of the inbox.
+      predicate (callable, optional): Returns True for the wanted email. Any email matches when None.
+      timeout (float): Seconds to wait before giving up.
+      encrypted (bool): Wait on an encrypted inbox.
+      **kwargs: Passed to `watch`.
+
+    Raises:
+      TimeoutError: No matching email arrived within `timeout`.
+    """
+    for email in self.watch(alias, encrypted=encrypted, timeout=timeout, **kwargs):
+      if predicate is None or predicate(email):
+        return email
+    raise TimeoutError(f"No matching email in {alias} within {timeout} seconds")
+
+class Async(BaseClient):
   """Manages an asynchronous session with the API."""
 
-  def __init__(self, authorization: str, private_key: Optional[bytes] = None) -> None:
-    self.private_key = private_key.decode('utf-8') if private_key else None
+  def __init__(
+    self, authorization: str, private_key: Optional[bytes] = None, executor: Optional[Executor] = None, *,
+    cache: Optional[EmailCache] = None, retry: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None,
+    observer: Optional[Observer] = None, base_url: str = DEFAULT_BASE_URL, archive: Optional[Archive] = None,
+    keyring: Optional[KeyRing] = None, index: Optional[InboxIndex] = None,
+    connector: Optional[aiohttp.TCPConnector] = None, limit: int = 100, limit_per_host: int = 0,
+    keepalive_timeout: float = 15, ttl_dns_cache: Optional[int] = 10,
+    connect_timeout: Optional[float] = 30, read_timeout: Optional[float] = None, total_timeout: Optional[float] = 300,
+    http2: bool = False,
+    decrypt_workers: int = 0, decrypt_queue: Optional[int] = None, decryption_pool: Optional[DecryptionPool] = None,
+    coalesce: bool = False
+  ) -> None:
+    """
+    Args:
+      authorization (str): API key.
+      private_key (bytes, optional): RSA private key in PEM format, used to decrypt encrypted inboxes.
+      executor (Executor, optional): Pool used to decrypt encrypted inboxes.
+      cache (EmailCache, optional): Cache for email bodies and decrypted emails, keyed by alias and email id.
+      retry (RetryPolicy, optional): When and how failed requests are retried. Requests are not retried when None.
+      rate_limiter (RateLimiter, optional): Token bucket every request of this client waits on.
+      observer (Observer, optional): Receives request, retry, error and decrypt events, e.g. a MetricsCollector.
+      base_url (str): API root, e.g. a local mock server.
+      archive (Archive, optional): Every email fetched by this client is appended to it.
+      keyring (KeyRing, optional): Per-alias private keys for encrypted inboxes; aliases without one use `private_key`.
+      index (InboxIndex, optional): Every email fetched by this client is added to it, and deleted emails are dropped.
+      connector (TCPConnector, optional): Connector to use instead of building one; share it between clients to share one pool.
+      limit (int): Maximum number of simultaneous connections, 0 for no limit.
+      limit_per_host (int): Maximum number of simultaneous connections per host, 0 for no limit.
+      keepalive_timeout (float): Seconds an idle connection is kept alive.
+      ttl_dns_cache (int, optional): Seconds DNS lookups are cached, None to cache forever.
+      connect_timeout (float, optional): Seconds to wait for a connection. No limit when None.
+      read_timeout (float, optional): Seconds to wait for the server between bytes. No limit when None.
+      total_timeout (float, optional): Seconds a whole request, retries aside, may take. No limit when None. The defaults match aiohttp's.
+      http2 (bool): Use httpx over HTTP/2, multiplexing concurrent requests over one connection. Requires ``httpx[http2]``; `connector`, `total_timeout` and the DNS options do not apply. HTTP/2 is negotiated over ``https://``; an ``http://`` base URL gets cleartext HTTP/2 with prior knowledge and a RuntimeWarning.
+      decrypt_workers (int): Decrypt on a `DecryptionPool` of this many worker processes, owned by this client and started on first use. 0 decrypts on `executor`.
+      decrypt_queue (int, optional): Emails queued or in flight on the owned pool before decrypting waits. Defaults to 4 per worker.
+      decryption_pool (DecryptionPool, optional): Pool to decrypt on instead of starting one; share it between clients.
+        Its key is used as `private_key` when none is given, and must be `private_key` when one is.
+      coalesce (bool): Identical concurrent inbox and email fetches share one request and one decrypt.
+
+    Raises:
+      ValueError: `decryption_pool` holds a different key than `private_key`.
+    """
+    if decryption_pool is not None and private_key is None:
+      private_key = decryption_pool.pem
+    super().__init__(private_key, executor, cache, retry, rate_limiter, observer, base_url, archive, keyring, index)
+    if decryption_pool is not None:
+      # Compare the keys rather than the PEM text, which can differ in formatting for the same key
+      from .crypto import get_decryptor
+      pool_key = get_decryptor(decryption_pool.pem).private_key.public_key().public_numbers()
+      if self.decryptor.private_key.public_key().public_numbers() != pool_key:
+        raise ValueError("decryption_pool holds a different key than private_key")
+    self.flights: Optional[AsyncSingleFlight] = AsyncSingleFlight() if coalesce else None
+    import aiohttp
+    self.retryable_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+    self.connector = connector
+    self.connector_options = {
+      'limit': limit,
+      'limit_per_host': limit_per_host,
+      'keepalive_timeout': keepalive_timeout,
+      'ttl_dns_cache': ttl_dns_cache,
+    }
+    self.timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+    self.http2 = http2
+    self.decrypt_workers = decrypt_workers
+    self.decrypt_queue = decrypt_queue
+    self.decryption_pool_owner = decryption_pool is None
+    self.decryption_pool = decryption_pool
     self.session: Optional[aiohttp.ClientSession] = None
-    self.BASE_URL = f"http://api.reusable.email/v{INTERNAL_API_VERSION}"
     self.authorization = authorization
 
+  @staticmethod
+  def create_connector(limit: int = 100, limit_per_host: int = 0, keepalive_timeout: float = 15,
+      ttl_dns_cache: Optional[int] = 10) -> aiohttp.TCPConnector:
+    """Create a keep-alive connection pool that can be shared by several Async clients. Must be called inside a running event loop."""
+    import aiohttp
+    return aiohttp.TCPConnector(
+      limit=limit, limit_per_host=limit_per_host, keepalive_timeout=keepalive_timeout,
+      ttl_dns_cache=ttl_dns_cache, use_dns_cache=True
+    )
+
   async def generate_session(self) -> None:
     """Initialize the API session with the necessary headers."""
+    headers = {
+      'User-Agent': USER_AGENT,
+      'Authorization': self.authorization,
+    }
+    if self.http2:
+      from .httpx_session import HTTPXSession
+      # httpx only negotiates HTTP/2 over TLS; over cleartext it has to be spoken from the first byte
+      cleartext = self.BASE_URL.startswith('http://')
+      if cleartext:
+        warnings.warn(
+          f"HTTP/2 over cleartext {self.BASE_URL} uses prior knowledge, which the server must support; "
+          "use an https:// base_url to negotiate HTTP/2 over TLS", RuntimeWarning, stacklevel=3
+        )
+      self.session = HTTPXSession(
+        headers, limit=self.connector_options['limit'], keepalive_timeout=self.connector_options['keepalive_timeout'],
+        connect_timeout=self.timeout.sock_connect, read_timeout=self.timeout.sock_read, http1=not cleartext
+      )
+      return
+    import aiohttp
+    shared = self.connector is not None
     self.session = aiohttp.ClientSession(
-      headers={
-        'User-Agent': 'Python-SDK-Package/1.0',
-        'Authorization': self.authorization,
-      }
+      connector=self.connector if shared else self.create_connector(**self.connector_options),
+      connector_owner=not shared,
+      timeout=self.timeout,
+      headers=headers
     )
 
+  async def __aenter__(self) -> 'Async':
+    if not self.session:
+      await self.generate_session()
+    return self
+
+  async def __aexit__(self, *exc_info: Any) -> None:
+    await self.close()
+
   @staticmethod
   async def json_or_text(response: aiohttp.ClientResponse) -> Union[Dict[str, Any], str]:
     """Extract JSON or text response from an HTTP response."""
-    text = await response.text()
-    try:
-      if response.headers.get('Content-Type', '').startswith('application/json'):
-        return await response.json()
-    except KeyError:
-      pass
-    return text
+    content = await response.read()
+    return core.json_or_text(
+      response.headers.get('Content-Type', ''), content, lambda: content.decode(response.get_encoding())
+    )
 
   async def request(
     self, route: Route, headers: Optional[Dict[str, str]] = None,
@@ -214,120 +609,440 @@ class Async:
     if not self.session:
       await self.generate_session()
 
-    methods = {
-      'get': self.session.get,
-      'post': self.session.post,
-      'put': self.session.put,
-      'delete': self.session.delete
-    }
-
-    if route.method not in methods:
-      raise ValueError(f"Unsupported HTTP method: {route.method}")
-
-    async with methods[route.method](
-      route.url, headers=headers, params=params, json=json, data=data
-    ) as response:
-      data = await self.json_or_text(response)
-      if response.status in {200, 202}:
-        return response
-      elif response.status == 403:
-        raise Forbidden(response, data)
-      elif response.status == 404:
-        raise NotFound(response, data)
-      elif response.status == 400:
-        raise InvalidParams(response, data)
-      elif response.status >= 500:
-        raise FetchFail(response, data)
-      elif response.status >= 401:
-        raise HTTPException(response, data)
-      else:
-        raise HTTPException(response, data)
+    attempts = core.Attempts(self, route)
+    while True:
+      if self.rate_limiter is not None:
+        await self.rate_limiter.acquire_async()
+      attempts.begin()
+      try:
+        async with self.session.request(
+          route.method, route.url, headers=headers, params=params, json=json, data=data
+        ) as response:
+          # Parsed once here and reused by the error path and the caller
+          body = response.payload = await self.json_or_text(response)
+          delay = attempts.response(response, response.status, body, len(await response.read()))
+          if delay is None:
+            return response
+      except Exception as e:
+        delay = attempts.error(e)
+        if delay is None:
+          raise
+      await asyncio.sleep(delay)
 
+  @_acoalesced('inbox')
   async def view_inbox(self, alias: str, after: Optional[str] = None) -> Union[list[Email], aiohttp.ClientResponse]:
     """View the content of an inbox."""
-    params = {"alias": alias}
-    if after:
-      params["after"] = after
-    response = await self.request(route=Route(self.BASE_URL, 'get', "/inbox"), params=params)
+    params = core.inbox_params(alias, after)
+    response = await self.request(route=self.routes.inbox, params=params)
     if response.status == 200:
-      inbox: Inbox = []
-      json_response = await response.json()
-      for email in json_response.get('inbox', []):
-        inbox.append(Email.from_json(json.dumps(email)))
+      inbox: Inbox = Email.from_dicts(core.inbox_items(response))
+      await self._aingest(alias, inbox)
       return inbox
     return response
 
+  @_acoalesced('email')
   async def fetch_email_body(self, alias: str, email_id: str) -> Union[str, aiohttp.ClientResponse]:
     """Fetch a specific email from the inbox."""
-    params = {"alias": alias, "id": email_id}
-    response = await self.request(route=Route(self.BASE_URL, 'get', "/email"), params=params)
+    if self.cache is not None:
+      cached = self.cache.get(alias, email_id)
+      if isinstance(cached, str):
+        return cached
+    params = core.email_params(alias, email_id)
+    response = await self.request(route=self.routes.email, params=params)
     if response.status == 200:
-      return await response.text('utf-8')
+      body = await response.text('utf-8')
+      if self.cache is not None:
+        self.cache.set(alias, email_id, body)
+      return body
     return response
 
   async def delete_email(self, alias: str, email_id: str) -> Union[bool, aiohttp.ClientResponse]:
     """Delete a specific email from the inbox."""
-    params = {"alias": alias, "id": email_id}
-    response = await self.request(route=Route(self.BASE_URL, 'delete', "/email"), params=params)
+    if self.cache is not None:
+      self.cache.invalidate(alias, email_id)
+    self._unindex(alias, email_id)
+    params = core.email_params(alias, email_id)
+    response = await self.request(route=self.routes.delete_email, params=params)
     if response.status == 200:
-      return (await response.json()).get('success', False)
+      return core.success(response)
     return response
 
 
   async def create_encrypted_inbox(self, alias: str, public_key: bytes) -> Union[bool, aiohttp.ClientResponse]:
     """Create a new encrypted inbox."""
-    json_data = {"publicKey": public_key.decode('utf-8'), "inboxName": alias.upper()}
-    response = await self.request(route=Route(self.BASE_URL, 'post', "/encrypted/inbox"), data=json_data)
+    json_data = core.encrypted_inbox_data(alias, public_key)
+    response = await self.request(route=self.routes.create_encrypted_inbox, data=json_data)
     if response.status == 200:
       return True
     return response
 
+  def _decryption_pool(self) -> Optional[DecryptionPool]:
+    """The pool to decrypt on, starting the owned one on first use."""
+    if self.decryption_pool is None and self.decrypt_workers and self.private_key:
+      from .decrypt_pool import DecryptionPool
+      self.decryption_pool = DecryptionPool(self.private_key, self.decrypt_workers, self.decrypt_queue)
+    return self.decryption_pool
+
+  async def decrypt_emails(self, encrypted_emails: List[Dict[str, Any]], decryptor: Optional[crypto.Decryptor] = None) -> List[Optional[Email]]:
+    """
+    Decrypt a batch of emails off the event loop, on the decryption pool, `executor` or the loop's default pool.
+
+    The decryption pool only holds `private_key`; emails for another key from the key ring go to `executor`.
+    """
+    start = time.perf_counter()
+    decryptor = decryptor or self.decryptor
+    pool = self._decryption_pool() if decryptor is self.decryptor else None
+    if pool is not None:
+      emails = await pool.decrypt_many(encrypted_emails)
+    else:
+      loop = asyncio.get_running_loop()
+      emails = list(await asyncio.gather(*(
+        loop.run_in_executor(self.executor, decryptor.decrypt, email) for email in encrypted_emails
+      )))
+    if self.observer is not None:
+      self.observer.on_decrypt(len(emails), time.perf_counter() - start)
+    return emails
+
+  async def _decrypt(self, encrypted_email: Dict[str, Any], decryptor: Optional[crypto.Decryptor] = None) -> Optional[Email]:
+    """Decrypt one email off the event loop, reporting the time taken to the observer."""
+    start = time.perf_counter()
+    decryptor = decryptor or self.decryptor
+    pool = self._decryption_pool() if decryptor is self.decryptor else None
+    if pool is not None:
+      email = await pool.decrypt(encrypted_email)
+    else:
+      email = await asyncio.get_running_loop().run_in_executor(self.executor, decryptor.decrypt, encrypted_email)
+    if self.observer is not None:
+      self.observer.on_decrypt(1, time.perf_counter() - start)
+    return email
+
+  async def _decryptor_for(self, alias: str) -> Optional[crypto.Decryptor]:
+    """`decryptor_for` with the key ring's file reads and key parsing on the loop's default pool."""
+    if self.keyring is None:
+      return self.decryptor
+    return await asyncio.get_running_loop().run_in_executor(None, self.decryptor_for, alias)
+
+  async def _aingest(self, alias: str, emails: Sequence[Optional[Email]]) -> None:
+    """`_ingest` with the archive write, its index commit, file writes and encryption, on the loop's default pool."""
+    if self.archive is not None:
+      archived = [email for email in emails if email is not None]
+      if archived:
+        await asyncio.get_running_loop().run_in_executor(None, self.archive.extend, alias, archived)
+    if self.index is not None:
+      self.index.add(alias, emails)
+
+  @_acoalesced('encrypted_inbox')
   async def view_encrypted_inbox(self, alias: str, after: Optional[str] = None) -> Union[list[Email], aiohttp.ClientResponse]:
     """View the content of an inbox."""
-    params = {"alias": alias.upper()}
-    if after:
-      params["after"] = after
-    response = await self.request(route=Route(self.BASE_URL, 'get', "/encrypted/inbox"), params=params)
+    params = core.inbox_params(alias, after, encrypted=True)
+    response = await self.request(route=self.routes.encrypted_inbox, params=params)
     
-    if response.status == 200 and self.private_key:
-      inbox: Inbox = []
-      json_response = await response.json()
-      for email in json_response.get('inbox', []):
-        decrypted_email = crypto.decrypt_email(email, self.private_key)
-        inbox.append(decrypted_email)
+    decryptor = await self._decryptor_for(alias)
+    if response.status == 200 and decryptor is not None:
+      inbox: Inbox = await self.decrypt_emails(core.inbox_items(response), decryptor)
+      await self._aingest(alias, inbox)
       return inbox
     return response
   
+  @_acoalesced('encrypted_email')
   async def fetch_encrypted_email(self, alias: str, email_id: str) -> Union[Email, aiohttp.ClientResponse]:
     """Fetch a specific email from the inbox."""
-    params = {"alias": alias.upper(), "id": email_id}
+    if self.cache is not None:
+      cached = self.cache.get(alias.upper(), email_id)
+      if isinstance(cached, Email):
+        return cached
+    params = core.email_params(alias, email_id, encrypted=True)
     try: # Server side is broken LMFAO
-      response = await self.request(route=Route(self.BASE_URL, 'get', "/encrypted/email"), params=params)
+      response = await self.request(route=self.routes.encrypted_email, params=params)
     except NotFound as e:
       response = e.response
     
     # if response.status == 200 and self.private_key:
-    if self.private_key:
+    decryptor = await self._decryptor_for(alias)
+    if decryptor is not None:
       try:
-        json_response = await response.json()
-        return crypto.decrypt_email(json_response, self.private_key)
+        json_response = core.payload_json(response)
+        email = await self._decrypt(json_response, decryptor)
+        if email is not None and self.cache is not None:
+          self.cache.set(alias.upper(), email_id, email)
+        await self._aingest(alias, (email,))
+        return email
       except:
         pass
     return response
 
   async def delete_encrypted_email(self, alias: str, email_id: str) -> Union[bool, aiohttp.ClientResponse]:
     """Delete a specific email from the inbox."""
-    params = {"alias": alias.upper(), "id": email_id}
-    response = await self.request(route=Route(self.BASE_URL, 'delete', "/encrypted/email"), params=params)
+    if self.cache is not None:
+      self.cache.invalidate(alias.upper(), email_id)
+    self._unindex(alias, email_id)
+    params = core.email_params(alias, email_id, encrypted=True)
+    response = await self.request(route=self.routes.delete_encrypted_email, params=params)
     
     if response.status == 200:
-      json_response = await response.json()
-      return json_response.get('success', False)
+      return core.success(response)
     return response
 
+  # Streaming
+  async def aiter_inbox(self, alias: str, encrypted: bool = False, after: Optional[str] = None) -> AsyncIterator[Email]:
+    """
+    Lazily iterate over an inbox, one page at a time.
+
+    Pages are fetched with the newest yielded email as the ``after`` cursor, and each email is
+    built, or decrypted, only when the iteration reaches it, so stopping early skips the rest.
+    Every email is yielded once, and iteration stops on a page with nothing new, so a server
+    that ignores ``after`` ends the iteration instead of repeating the inbox.
+
+    Args:
+      alias (str): Alias of the inbox.
+      encrypted (bool): Iterate over an encrypted inbox. Requires a private key.
+      after (str, optional): Start after this email id.
+    """
+    decryptor = await self._decryptor_for(alias) if encrypted else None
+    if encrypted and decryptor is None:
+      raise ValueError("Iterating an encrypted inbox requires a private_key or a key for it in the keyring")
+    route = self.routes.encrypted_inbox if encrypted else self.routes.inbox
+    cursor, timestamp = after, None
+    yielded: Set[str] = set()
+    while True:
+      params = core.inbox_params(alias, cursor, encrypted)
+      response = await self.request(route=route, params=params)
+      page = core.inbox_items(response) if response.status == 200 else []
+      fresh = False
+      for item in page:
+        if encrypted:
+          email = await self._decrypt(item, decryptor)
+        else:
+          email = Email.from_dict(item)
+        if email is not None and email.id not in yielded:
+          yielded.add(email.id)
+          fresh = True
+          cursor, timestamp = core.advance_cursor(cursor, timestamp, email)
+          await self._aingest(alias, (email,))
+          yield email
+      # Stop on a page with nothing new: it is empty, or the server did not move past the cursor
+      if not fresh:
+        return
+
+  # Provisioning
+  async def provision_encrypted_inboxes(
+    self, aliases: Iterable[str], key_pool: Optional[KeyPool] = None, executor: Optional[Executor] = None,
+    concurrency: int = 10
+  ) -> Dict[str, Tuple[bytes, bytes]]:
+    """
+    Create many encrypted inboxes, each with its own new key pair.
+
+    Key pairs are taken from `key_pool`, or generated in parallel on a process pool, off the event loop,
+    and the inboxes are then registered concurrently. The keys are added to `keyring` if the client has one.
+
+    Args:
+      aliases (Iterable[str]): Aliases of the inboxes to create.
+      key_pool (KeyPool, optional): Pool of pre-generated key pairs to take from.
+      executor (Executor, optional): Process pool to generate key pairs on when there is no `key_pool`.
+      concurrency (int): Maximum number of registrations in flight.
+
+    Returns:
+      dict: ``(public_key, private_key)`` by upper case alias, for every inbox created. Aliases that failed are left out.
+    """
+    aliases = [alias.upper() for alias in aliases]
+    loop = asyncio.get_running_loop()
+    if key_pool is not None:
+      key_pairs = await loop.run_in_executor(None, key_pool.take, len(aliases))
+    else:
+      from .crypto import generate_key_pairs
+      key_pairs = await loop.run_in_executor(None, generate_key_pairs, len(aliases), executor)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def create_one(alias: str, key_pair: Tuple[bytes, bytes]) -> bool:
+      async with semaphore:
+        try:
+          return await self.create_encrypted_inbox(alias, key_pair[0]) is True
+        except Exception:
+          return False
+
+    created = await asyncio.gather(*(create_one(alias, key_pair) for alias, key_pair in zip(aliases, key_pairs)))
+    provisioned = {alias: key_pair for alias, key_pair, ok in zip(aliases, key_pairs, created) if ok}
+    if self.keyring is not None:
+      for alias, (public_key, private_key) in provisioned.items():
+        self.keyring.add(alias, private_key, public_key)
+    return provisioned
+
+  # Bulk deletes
+  async def delete_emails(self, alias: str, email_ids: Iterable[str], encrypted: bool = False, concurrency: int = 10) -> DeleteReport:
+    """
+    Delete many emails concurrently, at most `concurrency` at a time.
+
+    Failures, including `NotFound`, are recorded in the report instead of being raised.
+
+    Args:
+      alias (str): Alias of the inbox.
+      email_ids (Iterable[str]): Ids of the emails to delete.
+      encrypted (bool): Delete from an encrypted inbox.
+      concurrency (int): Maximum number of deletes in flight.
+
+    Returns:
+      DeleteReport: Deleted ids and failed ids with their error.
+    """
+    delete = self.delete_encrypted_email if encrypted else self.delete_email
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def delete_one(email_id: str) -> Any:
+      async with semaphore:
+        try:
+          return await delete(alias, email_id)
+        except Exception as e:
+          return e
+
+    email_ids = list(email_ids)
+    report = DeleteReport()
+    for email_id, result in zip(email_ids, await asyncio.gather(*(delete_one(email_id) for email_id in email_ids))):
+      report.record(email_id, result)
+    return report
+
+  async def purge_inbox(self, alias: str, encrypted: bool = False, concurrency: int = 10) -> DeleteReport:
+    """
+    Delete every email in an inbox.
+
+    Args:
+      alias (str): Alias of the inbox.
+      encrypted (bool): Purge an encrypted inbox. Requires a private key, since email ids are encrypted.
+      concurrency (int): Maximum number of deletes in flight.
+
+    Returns:
+      DeleteReport: Deleted ids and failed ids with their error.
+    """
+    if encrypted and await self._decryptor_for(alias) is None:
+      raise ValueError("Purging an encrypted inbox requires a private_key or a key for it in the keyring")
+    inbox = await (self.view_encrypted_inbox(alias) if encrypted else self.view_inbox(alias))
+    if not isinstance(inbox, list):
+      return DeleteReport()
+    return await self.delete_emails(alias, [email.id for email in inbox if email is not None], encrypted, concurrency)
+
+  # Multi-alias polling
+  async def view_inboxes(
+    self, aliases: Iterable[str], after: Union[None, str, Dict[str, str]] = None, concurrency: int = 50
+  ) -> AsyncIterator[Tuple[str, Union[Inbox, Exception]]]:
+    """
+    View many inboxes concurrently, yielding each result as soon as it completes.
+
+    Args:
+      aliases (Iterable[str]): Aliases to poll. Consumed lazily, so a generator of any size is fine.
+      after (str | dict, optional): Cursor for every alias, or a mapping of alias to cursor.
+      concurrency (int): Maximum number of inboxes fetched at once.
+
+    Yields:
+      tuple: ``(alias, inbox)``, or ``(alias, exception)`` if that alias failed.
+    """
+    async for result in self._fan_out(self.view_inbox, aliases, after, concurrency):
+      yield result
+
+  async def view_encrypted_inboxes(
+    self, aliases: Iterable[str], after: Union[None, str, Dict[str, str]] = None, concurrency: int = 50
+  ) -> AsyncIterator[Tuple[str, Union[Inbox, Exception]]]:
+    """Encrypted variant of `view_inboxes`, built on `view_encrypted_inbox`."""
+    async for result in self._fan_out(self.view_encrypted_inbox, aliases, after, concurrency):
+      yield result
+
+  async def _fan_out(
+    self, fetch: Callable[[str, Optional[str]], Awaitable[Any]], aliases: Iterable[str],
+    after: Union[None, str, Dict[str, str]], concurrency: int
+  ) -> AsyncIterator[Tuple[str, Any]]:
+    """Run `fetch` over `aliases` on a bounded pool of workers, yielding results as they complete."""
+    pending = iter(aliases)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+    async def worker() -> None:
+      # All workers share one iterator, so each alias is fetched exactly once
+      for alias in pending:
+        cursor = after.get(alias) if isinstance(after, dict) else after
+        try:
+          result = await fetch(alias, cursor)
+        except Exception as e:
+          result = e
+        await results.put((alias, result))
+      await results.put(None)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+    try:
+      running = len(workers)
+      while running:
+        result = await results.get()
+        if result is None:
+          running -= 1
+        else:
+          yield result
+    finally:
+      for task in workers:
+        task.cancel()
+      await asyncio.gather(*workers, return_exceptions=True)
+
+  # Watching
+  async def watch(
+    self, alias: str, encrypted: bool = False, timeout: Optional[float] = None,
+    min_interval: float = 1.0, max_interval: float = 30.0, skip_existing: bool = False
+  ) -> AsyncIterator[Email]:
+    """
+    Yield emails as they arrive in an inbox.
+
+    Polls with the newest seen email as the ``after`` cursor. The poll interval starts at
+    `min_interval`, backs off exponentially with jitter up to `max_interval` while the inbox
+    is quiet, and drops back to `min_interval` when new mail arrives.
+
+    Args:
+      alias (str): Alias of the inbox.
+      encrypted (bool): Watch an encrypted inbox through `view_encrypted_inbox`.
+      timeout (float, optional): Stop after this many seconds. Watches forever when None.
+      min_interval (float): Shortest delay between polls in seconds.
+      max_interval (float): Longest delay between polls in seconds.
+      skip_existing (bool): Only yield emails received after the watch started.
+    """
+    from .cursors import AsyncInboxSyncer
+    syncer = AsyncInboxSyncer(self, encrypted=encrypted)
+    backoff = Backoff(min_interval, max_interval)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if skip_existing:
+      await syncer.sync(alias)
+    while True:
+      emails = await syncer.sync(alias)
+      if isinstance(emails, list) and emails:
+        backoff.reset()
+        for email in emails:
+          yield email
+      delay = _watch_delay(backoff, deadline)
+      if delay is None:
+        return
+      await asyncio.sleep(delay)
+
+  async def wait_for(
+    self, alias: str, predicate: Optional[Callable[[Email], bool]] = None, timeout: float = 60.0,
+    encrypted: bool = False, **kwargs: Any
+  ) -> Email:
+    """
+    Wait for the first email in an inbox matching `predicate`.
+
+    Args:
+      alias (str): Alias of the inbox.
+      predicate (callable, optional): Returns True for the wanted email. Any email matches when None.
+      timeout (float): Seconds to wait before giving up.
+      encrypted (bool): Wait on an encrypted inbox.
+      **kwargs: Passed to `watch`.
+
+    Raises:
+      TimeoutError: No matching email arrived within `timeout`.
+    """
+    async for email in self.watch(alias, encrypted=encrypted, timeout=timeout, **kwargs):
+      if predicate is None or predicate(email):
+        return email
+    raise TimeoutError(f"No matching email in {alias} within {timeout} seconds")
+
   async def close(self) -> None:
-    """Close the session."""
+    """Close the session and the owned decryption pool. A shared connector or pool is left open for the other clients."""
     if self.session:
       await self.session.close()
+      self.session = None
+    if self.decryption_pool is not None and self.decryption_pool_owner:
+      pool, self.decryption_pool = self.decryption_pool, None
+      # Joining the worker processes blocks, so wait for it off the event loop
+      await asyncio.get_running_loop().run_in_executor(None, pool.close)
     
     
\ No newline at end of file
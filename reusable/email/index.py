@@ -0,0 +1,216 @@
+"""
+In-memory search over fetched emails.
+
+An `InboxIndex` keeps the emails of every alias a client polls in timestamp
+order, with inverted indexes on sender and on subject trigrams, so lookups by
+sender, subject substring and time window touch only the candidate emails
+instead of scanning every inbox. It is bounded by an email count and an
+optional maximum age, evicting the oldest emails first.
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .types import Email
+
+
+class _Entry(NamedTuple):
+  alias: str
+  email: Email
+  # Sort key in the timelines: (timestamp, insertion order)
+  key: Tuple[float, int]
+  sender: str
+  subject: str
+
+
+def _trigrams(text: str) -> Set[str]:
+  return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class InboxIndex:
+  """
+  Emails of many aliases indexed by alias, time, sender and subject.
+
+  Pass it to `Sync` or `Async` as ``index`` to add every fetched email and drop deleted ones.
+  Aliases, senders and subject searches are case-insensitive. Safe to share between threads.
+  """
+
+  def __init__(self, maxsize: Optional[int] = 100_000, max_age: Optional[float] = None) -> None:
+    """
+    Args:
+      maxsize (int, optional): Maximum number of emails kept; the oldest are evicted first. Unbounded when None.
+      max_age (float, optional): Seconds after its timestamp an email is evicted. Emails never expire when None.
+    """
+    self.maxsize = maxsize
+    self.max_age = max_age
+    self.lock = threading.Lock()
+    self.counter = 0
+    self.entries: Dict[int, _Entry] = {}
+    self.ids: Dict[Tuple[str, str], int] = {}
+    # (timestamp, seq) in ascending order, over every alias and per alias
+    self.timeline: List[Tuple[float, int]] = []
+    self.aliases: Dict[str, List[Tuple[float, int]]] = {}
+    self.senders: Dict[str, Set[int]] = {}
+    self.subjects: Dict[str, Set[int]] = {}
+
+  def add(self, alias: str, emails: Iterable[Optional[Email]]) -> int:
+    """
+    Add fetched emails to an alias. Emails already indexed, and emails that failed to decrypt, are skipped.
+
+    Args:
+      alias (str): Alias the emails were fetched from.
+      emails (Iterable[Email]): Emails, e.g. the `Inbox` returned by `view_inbox`.
+
+    Returns:
+      int: Number of emails added.
+    """
+    alias = alias.upper()
+    added = 0
+    with self.lock:
+      for email in emails:
+        if email is None or email.id is None or (alias, email.id) in self.ids:
+          continue
+        self.counter += 1
+        seq = self.counter
+        timestamp = email.timestamp if email.timestamp is not None else time.time()
+        entry = self.entries[seq] = _Entry(
+          alias, email, (timestamp, seq), (email.sender or '').lower(), (email.subject or '').lower()
+        )
+        self.ids[(alias, email.id)] = seq
+        insort(self.timeline, entry.key)
+        insort(self.aliases.setdefault(alias, []), entry.key)
+        self.senders.setdefault(entry.sender, set()).add(seq)
+        for trigram in _trigrams(entry.subject):
+          self.subjects.setdefault(trigram, set()).add(seq)
+        added += 1
+      self._evict()
+    return added
+
+  def _unlink(self, seq: int) -> None:
+    entry = self.entries.pop(seq)
+    del self.ids[(entry.alias, entry.email.id)]
+    for timeline in (self.timeline, self.aliases[entry.alias]):
+      del timeline[bisect_left(timeline, entry.key)]
+    if not self.aliases[entry.alias]:
+      del self.aliases[entry.alias]
+    self._discard(self.senders, entry.sender, seq)
+    for trigram in _trigrams(entry.subject):
+      self._discard(self.subjects, trigram, seq)
+
+  @staticmethod
+  def _discard(postings: Dict[str, Set[int]], term: str, seq: int) -> None:
+    seqs = postings[term]
+    seqs.discard(seq)
+    if not seqs:
+      del postings[term]
+
+  def _evict(self) -> None:
+    if self.max_age is not None:
+      cutoff = time.time() - self.max_age
+      while self.timeline and self.timeline[0][0] < cutoff:
+        self._unlink(self.timeline[0][1])
+    if self.maxsize is not None:
+      while len(self.timeline) > self.maxsize:
+        self._unlink(self.timeline[0][1])
+
+  def remove(self, alias: str, email_id: str) -> bool:
+    """Drop one email, e.g. after `delete_email`. Returns whether it was indexed."""
+    with self.lock:
+      seq = self.ids.get((alias.upper(), email_id))
+      if seq is None:
+        return False
+      self._unlink(seq)
+      return True
+
+  def remove_alias(self, alias: str) -> int:
+    """Drop every email of an alias. Returns the number dropped."""
+    with self.lock:
+      keys = list(self.aliases.get(alias.upper(), ()))
+      for _, seq in keys:
+        self._unlink(seq)
+      return len(keys)
+
+  def get(self, alias: str, email_id: str) -> Optional[Email]:
+    """Return an indexed email, or None."""
+    with self.lock:
+      seq = self.ids.get((alias.upper(), email_id))
+      return self.entries[seq].email if seq is not None else None
+
+  def find(
+    self, alias: Optional[str] = None, sender: Optional[str] = None, subject_contains: Optional[str] = None,
+    since: Optional[float] = None, until: Optional[float] = None, limit: Optional[int] = None,
+    newest_first: bool = False
+  ) -> List[Email]:
+    """
+    Find indexed emails matching every given condition.
+
+    The sender and subject indexes narrow the search to their candidates, and a time window alone
+    is a binary search of the timeline, so no query scans every email unless it has no conditions.
+
+    Args:
+      alias (str, optional): Only emails of this alias.
+      sender (str, optional): Only emails from this sender.
+      subject_contains (str, optional): Only emails whose subject contains this text.
+      since (float, optional): Only emails with a timestamp at or after this.
+      until (float, optional): Only emails with a timestamp before this.
+      limit (int, optional): Maximum number of emails returned.
+      newest_first (bool): Return the newest emails first instead of the oldest.
+
+    Returns:
+      list: Matching emails in timestamp order.
+    """
+    with self.lock:
+      self._evict()
+      timeline = self.timeline if alias is None else self.aliases.get(alias.upper(), [])
+      candidates = self._candidates(sender, subject_contains)
+      if candidates is None:
+        # Only a time window: its emails are a contiguous slice of the timeline
+        start = 0 if since is None else bisect_left(timeline, (since,))
+        end = len(timeline) if until is None else bisect_left(timeline, (until,))
+        keys = timeline[start:end]
+      else:
+        alias = alias.upper() if alias is not None else None
+        keys = []
+        for seq in candidates:
+          entry = self.entries[seq]
+          timestamp = entry.key[0]
+          if (alias is None or entry.alias == alias) and (since is None or timestamp >= since) and (until is None or timestamp < until):
+            keys.append(entry.key)
+        keys.sort()
+      if newest_first:
+        keys.reverse()
+      if limit is not None:
+        keys = keys[:limit]
+      return [self.entries[seq].email for _, seq in keys]
+
+  def _candidates(self, sender: Optional[str], subject_contains: Optional[str]) -> Optional[Set[int]]:
+    """Emails matching the sender and subject conditions, or None when there are none."""
+    postings: List[Set[int]] = []
+    if sender is not None:
+      postings.append(self.senders.get(sender.lower(), set()))
+    needle = subject_contains.lower() if subject_contains is not None else None
+    if needle is not None:
+      if len(needle) >= 3:
+        postings.extend(self.subjects.get(trigram, set()) for trigram in _trigrams(needle))
+      elif not postings:
+        # Too short for the trigram index
+        postings.append(set(self.entries))
+    if not postings:
+      return None
+    # Intersect from the smallest posting list so the work is bounded by the rarest term
+    postings.sort(key=len)
+    candidates = postings[0].intersection(*postings[1:])
+    if needle is not None:
+      # Trigrams can all be present without the text being contiguous
+      candidates = {seq for seq in candidates if needle in self.entries[seq].subject}
+    return candidates
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def __contains__(self, key: Tuple[str, str]) -> bool:
+    """Whether an ``(alias, email_id)`` pair is indexed."""
+    alias, email_id = key
+    return (alias.upper(), email_id) in self.ids
@@ -0,0 +1,129 @@
+"""
+JSON backend used for every response, email and cache entry.
+
+Uses orjson or msgspec when one is installed and falls back to the standard library.
+All backends parse straight from ``bytes``, so response bodies never need decoding first.
+Whatever the backend, malformed input raises `json.JSONDecodeError` (a ``ValueError``), and
+`dumps` escapes non-ASCII characters like ``json.dumps`` unless ``ensure_ascii=False``.
+"""
+
+import json
+import re
+from typing import Any, Callable, Optional, Union
+
+name: str = 'json'
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def _escape(match: 're.Match[str]') -> str:
+  code = ord(match.group())
+  if code > 0xFFFF:
+    # Outside the BMP: a surrogate pair, as json.dumps writes it
+    code -= 0x10000
+    return '\\u%04x\\u%04x' % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+  return '\\u%04x' % code
+
+
+def _ascii(text: str) -> str:
+  """Escape the non-ASCII characters of encoded JSON, which can only occur inside strings."""
+  return text if text.isascii() else _NON_ASCII.sub(_escape, text)
+
+
+def _decode_error(error: Exception, data: Union[bytes, bytearray, memoryview, str]) -> json.JSONDecodeError:
+  """A backend's parse error as the standard library's, so callers catch the same type with every backend."""
+  document = data if isinstance(data, str) else bytes(data).decode('utf-8', 'replace')
+  return json.JSONDecodeError(str(error), document, 0)
+
+
+def _json_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+  if isinstance(data, memoryview):
+    data = bytes(data)
+  try:
+    return json.loads(data)
+  except UnicodeDecodeError as e:
+    raise _decode_error(e, data) from e
+
+
+def _json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, ensure_ascii: bool = True) -> str:
+  return json.dumps(obj, separators=(",", ":"), ensure_ascii=ensure_ascii, default=default)
+
+
+loads: Callable[[Union[bytes, bytearray, memoryview, str]], Any] = _json_loads
+dumps: Callable[..., str] = _json_dumps
+
+
+def _use_orjson() -> None:
+  import orjson
+
+  def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, ensure_ascii: bool = True) -> str:
+    text = orjson.dumps(obj, default=default).decode('utf-8')
+    return _ascii(text) if ensure_ascii else text
+
+  # orjson.JSONDecodeError already subclasses json.JSONDecodeError
+  _install('orjson', orjson.loads, dumps)
+
+
+def _use_msgspec() -> None:
+  import msgspec
+
+  decoder = msgspec.json.Decoder()
+
+  def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    try:
+      return decoder.decode(data)
+    except msgspec.DecodeError as e:
+      raise _decode_error(e, data) from e
+
+  def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, ensure_ascii: bool = True) -> str:
+    text = msgspec.json.encode(obj, enc_hook=default).decode('utf-8')
+    return _ascii(text) if ensure_ascii else text
+
+  _install('msgspec', loads, dumps)
+
+
+def _use_json() -> None:
+  _install('json', _json_loads, _json_dumps)
+
+
+def _install(backend: str, backend_loads: Callable[[Any], Any], backend_dumps: Callable[..., str]) -> None:
+  global name, loads, dumps
+  name, loads, dumps = backend, backend_loads, backend_dumps
+
+
+_BACKENDS = {
+  'orjson': _use_orjson,
+  'msgspec': _use_msgspec,
+  'json': _use_json,
+}
+
+
+def set_backend(backend: Optional[str] = None) -> str:
+  """
+  Select the JSON backend.
+
+  Args:
+    backend (str, optional): ``'orjson'``, ``'msgspec'`` or ``'json'``. Picks the fastest installed one when None.
+
+  Returns:
+    str: Name of the backend in use.
+
+  Raises:
+    ImportError: The requested backend is not installed.
+  """
+  if backend is not None:
+    if backend not in _BACKENDS:
+      raise ValueError(f"Unknown JSON backend: {backend}")
+    _BACKENDS[backend]()
+    return name
+  for candidate in ('orjson', 'msgspec'):
+    try:
+      _BACKENDS[candidate]()
+      return name
+    except ImportError:
+      continue
+  _use_json()
+  return name
+
+
+set_backend()
@@ -0,0 +1,105 @@
+"""
+Background pre-generation of RSA key pairs.
+
+A `KeyPool` keeps up to ``size`` key pairs ready, generating them on a process
+pool from a background thread, so provisioning encrypted inboxes takes keys
+that already exist instead of waiting on key generation.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from . import crypto
+
+
+class KeyPool:
+  """
+  A bounded pool of pre-generated RSA key pairs, refilled in the background.
+
+  Pass it to `provision_encrypted_inboxes` as ``key_pool``. Safe to share between threads.
+  """
+
+  def __init__(self, size: int = 256, workers: Optional[int] = None, key_size: int = 2048, start: bool = True) -> None:
+    """
+    Args:
+      size (int): Number of key pairs kept ready.
+      workers (int, optional): Worker processes generating keys. Defaults to the CPU count.
+      key_size (int): Size of each key in bits.
+      start (bool): Start filling the pool right away; otherwise call `start`.
+    """
+    self.size = size
+    self.workers = workers or os.cpu_count() or 1
+    self.key_size = key_size
+    self.keys: 'queue.Queue[Tuple[bytes, bytes]]' = queue.Queue(maxsize=size)
+    self.executor: Optional[ProcessPoolExecutor] = None
+    self.thread: Optional[threading.Thread] = None
+    self.closed = threading.Event()
+    if start:
+      self.start()
+
+  def start(self) -> None:
+    """Start the worker processes and the thread refilling the pool."""
+    if self.thread is None:
+      # Workers are started from the refill thread; forking a threaded process can deadlock the child
+      self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+      self.thread = threading.Thread(target=self._fill, name='reusable-email-keypool', daemon=True)
+      self.thread.start()
+
+  def _fill(self) -> None:
+    while not self.closed.is_set():
+      batch = min(4 * self.workers, self.size - self.keys.qsize())
+      if batch <= 0:
+        # Full; wake up again once keys have been taken
+        self.closed.wait(0.05)
+        continue
+      try:
+        pairs = crypto.generate_key_pairs(batch, self.executor, self.key_size)
+      except (CancelledError, RuntimeError):
+        # The executor was shut down by close()
+        return
+      for pair in pairs:
+        try:
+          self.keys.put_nowait(pair)
+        except queue.Full:
+          break
+
+  def take(self, count: int = 1, timeout: Optional[float] = None) -> List[Tuple[bytes, bytes]]:
+    """
+    Take key pairs from the pool, waiting for the background thread if it has fewer ready.
+
+    Args:
+      count (int): Number of key pairs.
+      timeout (float, optional): Seconds to wait for each missing pair. Waits forever when None.
+
+    Returns:
+      list: ``(public_key, private_key)`` pairs in PEM format.
+
+    Raises:
+      queue.Empty: The timeout expired.
+    """
+    if self.thread is None:
+      self.start()
+    return [self.keys.get(timeout=timeout) for _ in range(count)]
+
+  def __len__(self) -> int:
+    """Number of key pairs ready."""
+    return self.keys.qsize()
+
+  def close(self) -> None:
+    """Stop refilling and shut the worker processes down."""
+    self.closed.set()
+    if self.executor is not None:
+      self.executor.shutdown(wait=False, cancel_futures=True)
+    if self.thread is not None:
+      self.thread.join()
+      self.thread = None
+
+  def __enter__(self) -> 'KeyPool':
+    return self
+
+  def __exit__(self, *exc_info: Any) -> None:
+    self.close()
@@ -0,0 +1,188 @@
+"""
+Private keys for many encrypted aliases.
+
+A `KeyRing` maps aliases to PEMs, from a mapping or a directory of
+``<ALIAS>.pem`` files, and parses each key only when an email for that alias is
+first decrypted. At most ``maxsize`` parsed keys are kept; the least recently
+used are evicted and re-parsed on their next use. Keys are read and parsed
+outside the ring's lock, once per alias however many threads ask, and aliases
+without a key are remembered for ``miss_ttl`` seconds so they do not hit the
+file system on every lookup.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Mapping, MutableMapping, Optional, Union
+
+from cryptography.hazmat.primitives import serialization
+
+from . import crypto
+from .singleflight import SingleFlight
+
+
+def public_key_fingerprint(public_key: Union[str, bytes, object]) -> str:
+  """
+  Fingerprint of a public key, the same however it is encoded.
+  Args:
+    public_key (str | bytes | RSAPublicKey): Public key in PEM format, or a loaded key.
+
+  Returns:
+    str: Hex encoded SHA-256 digest of the DER SubjectPublicKeyInfo.
+  """
+  if isinstance(public_key, (str, bytes)):
+    public_key = serialization.load_pem_public_key(crypto._pem_bytes(public_key))
+  der = public_key.public_bytes(
+    encoding=serialization.Encoding.DER,
+    format=serialization.PublicFormat.SubjectPublicKeyInfo
+  )
+  return hashlib.sha256(der).hexdigest()
+
+
+class KeyRing:
+  """
+  Parsed private keys indexed by alias and public key fingerprint, loaded lazily.
+
+  Pass it to `Sync` or `Async` as ``keyring`` to decrypt each encrypted alias with its own key.
+  Aliases are case-insensitive, like encrypted inbox names. Safe to share between threads.
+  """
+
+  def __init__(
+    self, source: Union[str, os.PathLike, Mapping[str, Union[str, bytes]], None] = None, maxsize: int = 1024,
+    miss_ttl: float = 60
+  ) -> None:
+    """
+    Args:
+      source (str | PathLike | Mapping, optional): Directory of ``<ALIAS>.pem`` private keys, with optional
+        ``<ALIAS>.pub`` public keys for fingerprint lookups, or a mapping of alias to private key PEM.
+      maxsize (int): Maximum number of parsed keys kept in memory, and of aliases remembered as having no key.
+      miss_ttl (float): Seconds an alias without a key is remembered as such before the directory is checked again.
+    """
+    self.directory: Optional[str] = None
+    self.pems: MutableMapping[str, bytes] = {}
+    if isinstance(source, (str, os.PathLike)):
+      self.directory = os.fspath(source)
+    elif source is not None:
+      for alias, pem in source.items():
+        self.pems[alias.upper()] = crypto._pem_bytes(pem)
+    self.maxsize = maxsize
+    self.lock = threading.Lock()
+    self.parsed: 'OrderedDict[str, crypto.Decryptor]' = OrderedDict()
+    self.fingerprints: Dict[str, str] = {}
+    self.scanned = False
+    self.miss_ttl = miss_ttl
+    # Alias without a key: when to look for it again
+    self.missing: 'OrderedDict[str, float]' = OrderedDict()
+    self.loads = SingleFlight()
+
+  def add(self, alias: str, private_key: Union[str, bytes], public_key: Union[str, bytes, None] = None) -> None:
+    """
+    Add or replace the key of an alias. It is parsed on first use.
+    Args:
+      alias (str): Encrypted inbox alias.
+      private_key (str | bytes): RSA private key in PEM format.
+      public_key (str | bytes, optional): Matching public key, to index its fingerprint without parsing the private key.
+    """
+    alias = alias.upper()
+    with self.lock:
+      self.pems[alias] = crypto._pem_bytes(private_key)
+      self.parsed.pop(alias, None)
+      self.missing.pop(alias, None)
+      if public_key is not None:
+        self.fingerprints[public_key_fingerprint(public_key)] = alias
+
+  def remove(self, alias: str) -> None:
+    """Forget the key of an alias. Keys in the directory are left on disk."""
+    alias = alias.upper()
+    with self.lock:
+      self.pems.pop(alias, None)
+      self.parsed.pop(alias, None)
+      for fingerprint in [f for f, a in self.fingerprints.items() if a == alias]:
+        del self.fingerprints[fingerprint]
+
+  def _path(self, alias: str) -> Optional[str]:
+    """Path of the key file of an alias, or None for aliases that are not a plain file name, e.g. ``../x``."""
+    if self.directory is None or alias in ('', '.', '..') or '\0' in alias:
+      return None
+    if any(separator in alias for separator in (os.sep, os.altsep) if separator):
+      return None
+    return os.path.join(self.directory, f"{alias}.pem")
+
+  def _scan(self) -> None:
+    """Index the fingerprints of the public keys in the directory, once."""
+    fingerprints = {}
+    if self.directory is not None:
+      for name in os.listdir(self.directory):
+        if name.endswith('.pub'):
+          with open(os.path.join(self.directory, name), 'rb') as f:
+            fingerprints.setdefault(public_key_fingerprint(f.read()), name[:-4].upper())
+    with self.lock:
+      for fingerprint, alias in fingerprints.items():
+        self.fingerprints.setdefault(fingerprint, alias)
+      self.scanned = True
+
+  def _load(self, alias: str) -> Optional[crypto.Decryptor]:
+    """Read and parse the key of an alias without holding the lock, or remember that it has none."""
+    with self.lock:
+      pem = self.pems.get(alias)
+    path = self._path(alias) if pem is None else None
+    if path is not None:
+      try:
+        with open(path, 'rb') as f:
+          pem = f.read()
+      except FileNotFoundError:
+        pass
+    if pem is None:
+      with self.lock:
+        if alias not in self.pems:
+          self.missing[alias] = time.monotonic() + self.miss_ttl
+          self.missing.move_to_end(alias)
+          while len(self.missing) > self.maxsize:
+            self.missing.popitem(last=False)
+      return None
+    # Built directly rather than through crypto.get_decryptor, whose cache is unbounded
+    decryptor = crypto.Decryptor(pem)
+    fingerprint = public_key_fingerprint(decryptor.private_key.public_key())
+    with self.lock:
+      # Unless `add` replaced the key while it was parsed
+      if self.pems.get(alias, pem) == pem:
+        self.parsed[alias] = decryptor
+        self.fingerprints[fingerprint] = alias
+        while len(self.parsed) > self.maxsize:
+          self.parsed.popitem(last=False)
+    return decryptor
+
+  def get(self, alias_or_fingerprint: str) -> Optional[crypto.Decryptor]:
+    """
+    Return the parsed key for an alias or a public key fingerprint, parsing it if needed.
+
+    Returns:
+      Decryptor: Decryptor holding the key, or None if the key ring has no key for it.
+    """
+    if len(alias_or_fingerprint) == 64 and not self.scanned and alias_or_fingerprint not in self.fingerprints:
+      self.loads.do(None, self._scan)
+    with self.lock:
+      alias = self.fingerprints.get(alias_or_fingerprint) or alias_or_fingerprint.upper()
+      decryptor = self.parsed.get(alias)
+      if decryptor is not None:
+        self.parsed.move_to_end(alias)
+        return decryptor
+      retry_at = self.missing.get(alias)
+      if retry_at is not None:
+        if retry_at > time.monotonic():
+          return None
+        del self.missing[alias]
+    # Concurrent lookups of the same alias wait for one read and parse
+    return self.loads.do(alias, functools.partial(self._load, alias))[0]
+
+  def __contains__(self, alias: str) -> bool:
+    alias = alias.upper()
+    with self.lock:
+      if alias in self.pems:
+        return True
+    path = self._path(alias)
+    return path is not None and os.path.exists(path)
+
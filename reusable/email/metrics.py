@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class Observer:
+  """
+  Receives instrumentation events from a Sync or Async client.
+
+  Subclass it and override the events you need; every event is a no-op by default.
+  Clients only time requests when an observer is set, so there is no overhead without one.
+  """
+
+  def on_request_start(self, method: str, path: str) -> None:
+    """An HTTP request is about to be sent."""
+
+  def on_request_end(self, method: str, path: str, status: int, elapsed: float, nbytes: int) -> None:
+    """A response arrived, after `elapsed` seconds, with a body of `nbytes` bytes."""
+
+  def on_retry(self, method: str, path: str, attempt: int, delay: float) -> None:
+    """A request failed and is retried after `delay` seconds."""
+
+  def on_error(self, method: str, path: str, error: BaseException) -> None:
+    """A request failed for good and `error` is raised to the caller."""
+
+  def on_decrypt(self, count: int, elapsed: float) -> None:
+    """`count` emails were decrypted in `elapsed` seconds."""
+
+  def on_coalesce(self, method: str, path: str) -> None:
+    """A call shared the result of an identical call in flight instead of sending its own request."""
+
+
+class ObserverGroup(Observer):
+  """Forwards every event to several observers."""
+
+  def __init__(self, *observers: Observer) -> None:
+    self.observers = list(observers)
+
+  def on_request_start(self, method: str, path: str) -> None:
+    for observer in self.observers:
+      observer.on_request_start(method, path)
+
+  def on_request_end(self, method: str, path: str, status: int, elapsed: float, nbytes: int) -> None:
+    for observer in self.observers:
+      observer.on_request_end(method, path, status, elapsed, nbytes)
+
+  def on_retry(self, method: str, path: str, attempt: int, delay: float) -> None:
+    for observer in self.observers:
+      observer.on_retry(method, path, attempt, delay)
+
+  def on_error(self, method: str, path: str, error: BaseException) -> None:
+    for observer in self.observers:
+      observer.on_error(method, path, error)
+
+  def on_decrypt(self, count: int, elapsed: float) -> None:
+    for observer in self.observers:
+      observer.on_decrypt(count, elapsed)
+
+  def on_coalesce(self, method: str, path: str) -> None:
+    for observer in self.observers:
+      observer.on_coalesce(method, path)
+
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+  """Fixed bucket histogram, in the shape Prometheus expects."""
+
+  __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+  def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value: float) -> None:
+    for i, bound in enumerate(self.buckets):
+      if value <= bound:
+        self.counts[i] += 1
+        break
+    else:
+      self.counts[-1] += 1
+    self.sum += value
+    self.count += 1
+
+  def cumulative(self) -> List[Tuple[str, int]]:
+    """Return ``(le, count)`` pairs with cumulative counts, ending with ``+Inf``."""
+    total = 0
+    result = []
+    for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+      total += count
+      result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+    return result
+
+
+class MetricsCollector(Observer):
+  """
+  Collects per-route latency histograms, bytes transferred, retries,
+  error counts by exception class, coalesced calls, and decrypt time.
+  """
+
+  def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+    self.buckets = tuple(buckets)
+    self.lock = threading.Lock()
+    self.latency: Dict[str, Histogram] = {}
+    self.bytes: Dict[str, int] = defaultdict(int)
+    self.retries: Dict[str, int] = defaultdict(int)
+    self.errors: Dict[Tuple[str, str], int] = defaultdict(int)
+    self.coalesced: Dict[str, int] = defaultdict(int)
+    self.decrypted = 0
+    self.decrypt_seconds = 0.0
+
+  def on_request_end(self, method: str, path: str, status: int, elapsed: float, nbytes: int) -> None:
+    route = f"{method.upper()} {path}"
+    with self.lock:
+      histogram = self.latency.get(route)
+      if histogram is None:
+        histogram = self.latency[route] = Histogram(self.buckets)
+      histogram.observe(elapsed)
+      self.bytes[route] += nbytes
+
+  def on_retry(self, method: str, path: str, attempt: int, delay: float) -> None:
+    with self.lock:
+      self.retries[f"{method.upper()} {path}"] += 1
+
+  def on_error(self, method: str, path: str, error: BaseException) -> None:
+    with self.lock:
+      self.errors[(f"{method.upper()} {path}", error.__class__.__name__)] += 1
+
+  def on_decrypt(self, count: int, elapsed: float) -> None:
+    with self.lock:
+      self.decrypted += count
+      self.decrypt_seconds += elapsed
+
+  def on_coalesce(self, method: str, path: str) -> None:
+    with self.lock:
+      self.coalesced[f"{method.upper()} {path}"] += 1
+
+  def to_prometheus(self, prefix: str = 'reusable_email') -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    with self.lock:
+      name = f"{prefix}_request_duration_seconds"
+      lines += [f"# HELP {name} HTTP request latency.", f"# TYPE {name} histogram"]
+      for route, histogram in sorted(self.latency.items()):
+        for le, count in histogram.cumulative():
+          lines.append(f'{name}_bucket{{route="{route}",le="{le}"}} {count}')
+        lines.append(f'{name}_sum{{route="{route}"}} {histogram.sum}')
+        lines.append(f'{name}_count{{route="{route}"}} {histogram.count}')
+
+      name = f"{prefix}_response_bytes_total"
+      lines += [f"# HELP {name} Response body bytes received.", f"# TYPE {name} counter"]
+      lines += [f'{name}{{route="{route}"}} {count}' for route, count in sorted(self.bytes.items())]
+
+      name = f"{prefix}_retries_total"
+      lines += [f"# HELP {name} Requests retried.", f"# TYPE {name} counter"]
+      lines += [f'{name}{{route="{route}"}} {count}' for route, count in sorted(self.retries.items())]
+
+      name = f"{prefix}_errors_total"
+      lines += [f"# HELP {name} Requests that failed, by exception class.", f"# TYPE {name} counter"]
+      lines += [
+        f'{name}{{route="{route}",exception="{exception}"}} {count}'
+        for (route, exception), count in sorted(self.errors.items())
+      ]
+
+      name = f"{prefix}_coalesced_total"
+      lines += [f"# HELP {name} Calls that shared an identical in-flight request.", f"# TYPE {name} counter"]
+      lines += [f'{name}{{route="{route}"}} {count}' for route, count in sorted(self.coalesced.items())]
+
+      name = f"{prefix}_decrypted_emails_total"
+      lines += [f"# HELP {name} Emails decrypted.", f"# TYPE {name} counter", f"{name} {self.decrypted}"]
+      name = f"{prefix}_decrypt_seconds_total"
+      lines += [f"# HELP {name} Time spent decrypting emails.", f"# TYPE {name} counter", f"{name} {self.decrypt_seconds}"]
+    return '\n'.join(lines) + '\n'
+
+
+class OpenTelemetryObserver(Observer):
+  """Records every request and decrypt batch as an OpenTelemetry span. Requires ``opentelemetry-api``."""
+
+  def __init__(self, tracer: Optional[Any] = None) -> None:
+    """
+    Args:
+      tracer (Tracer, optional): Tracer to record spans with. Defaults to the global tracer for this package.
+    """
+    if tracer is None:
+      from opentelemetry import trace
+      tracer = trace.get_tracer('reusable.email')
+    self.tracer = tracer
+
+  def _span(self, name: str, elapsed: float, attributes: Dict[str, Any], error: Optional[BaseException] = None) -> None:
+    end = time.time_ns()
+    span = self.tracer.start_span(name, start_time=end - int(elapsed * 1e9), attributes=attributes)
+    if error is not None:
+      span.record_exception(error)
+    span.end(end_time=end)
+
+  def on_request_end(self, method: str, path: str, status: int, elapsed: float, nbytes: int) -> None:
+    self._span(f"{method.upper()} {path}", elapsed, {
+      'http.request.method': method.upper(),
+      'url.path': path,
+      'http.response.status_code': status,
+      'http.response.body.size': nbytes,
+    })
+
+  def on_error(self, method: str, path: str, error: BaseException) -> None:
+    self._span(f"{method.upper()} {path}", 0.0, {'error.type': error.__class__.__name__}, error)
+
+  def on_decrypt(self, count: int, elapsed: float) -> None:
+    self._span("decrypt", elapsed, {'reusable_email.decrypted': count})
@@ -0,0 +1,581 @@
+"""
+Sharded multi-process poller for large alias fleets.
+
+A `Poller` spreads aliases over worker processes with a consistent hash ring,
+so adding or removing an alias, or a worker, moves only the aliases that have
+to move. Every worker runs its own pooled `Async` client, watches its aliases
+with the same backoff as `watch`, and writes new emails straight to a local
+output: a JSONL file, a SQLite database or a Unix socket.
+
+Run it as a daemon with ``python -m reusable.email.poller --help``.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from . import json_backend
+from .core import DEFAULT_BASE_URL
+from .retry import RetryPolicy
+from .types import Email
+
+
+class HashRing:
+  """Consistent hash ring mapping aliases to shards."""
+
+  def __init__(self, shards: int, replicas: int = 64) -> None:
+    """
+    Args:
+      shards (int): Number of shards.
+      replicas (int): Points per shard on the ring. More points spread aliases more evenly.
+    """
+    self.shards = shards
+    points = sorted((self._hash(f"{shard}:{replica}"), shard) for shard in range(shards) for replica in range(replicas))
+    self.points = [point for point, _ in points]
+    self.owners = [shard for _, shard in points]
+
+  @staticmethod
+  def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+  def shard_for(self, alias: str) -> int:
+    """Shard owning an alias. Aliases are case-insensitive."""
+    i = bisect.bisect(self.points, self._hash(alias.upper()))
+    return self.owners[i % len(self.owners)]
+
+
+# Outputs
+class Sink:
+  """Base class for the outputs workers write new emails to. Each worker opens its own."""
+
+  def write(self, alias: str, emails: Sequence[Email]) -> None:
+    """Write a batch of new emails of one alias."""
+    raise NotImplementedError
+
+  def close(self) -> None:
+    """Release any resources held by the sink."""
+
+
+def _lines(alias: str, emails: Sequence[Email]) -> bytes:
+  return ''.join(f"{json_backend.dumps({'alias': alias, **email.to_dict()})}\n" for email in emails).encode('utf-8')
+
+
+class JSONLSink(Sink):
+  """Appends one JSON object per email to a file."""
+
+  def __init__(self, path: str) -> None:
+    # Each batch is one write() on an O_APPEND descriptor, so lines from several workers never interleave
+    self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+  def write(self, alias: str, emails: Sequence[Email]) -> None:
+    os.write(self.fd, _lines(alias, emails))
+
+  def close(self) -> None:
+    os.close(self.fd)
+
+
+class SQLiteSink(Sink):
+  """Inserts emails into an ``emails`` table, ignoring ones already stored."""
+
+  def __init__(self, path: str) -> None:
+    self.connection = sqlite3.connect(path, timeout=30)
+    self.connection.execute("PRAGMA journal_mode=WAL")
+    with self.connection:
+      self.connection.execute(
+        "CREATE TABLE IF NOT EXISTS emails (alias TEXT NOT NULL, id TEXT NOT NULL, timestamp REAL, sender TEXT, "
+        "subject TEXT, body TEXT, PRIMARY KEY (alias, id))"
+      )
+
+  def write(self, alias: str, emails: Sequence[Email]) -> None:
+    with self.connection:
+      self.connection.executemany(
+        "INSERT OR IGNORE INTO emails (alias, id, timestamp, sender, subject, body) VALUES (?, ?, ?, ?, ?, ?)",
+        [(alias, email.id, email.timestamp, email.sender, email.subject, email.body) for email in emails]
+      )
+
+  def close(self) -> None:
+    self.connection.close()
+
+
+class UnixSocketSink(Sink):
+  """Streams one JSON object per line to a Unix socket served by the consumer, reconnecting once if it drops."""
+
+  def __init__(self, path: str) -> None:
+    self.path = path
+    self.socket: Optional[socket.socket] = None
+
+  def write(self, alias: str, emails: Sequence[Email]) -> None:
+    data = _lines(alias, emails)
+    for attempt in range(2):
+      try:
+        if self.socket is None:
+          self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+          self.socket.connect(self.path)
+        self.socket.sendall(data)
+        return
+      except OSError:
+        self.close()
+        if attempt:
+          raise
+
+  def close(self) -> None:
+    if self.socket is not None:
+      self.socket.close()
+      self.socket = None
+
+
+SINKS = {'jsonl': JSONLSink, 'sqlite': SQLiteSink, 'unix': UnixSocketSink}
+
+
+def open_sink(spec: str) -> Sink:
+  """
+  Open an output from a ``kind:path`` spec, e.g. ``jsonl:emails.jsonl``, ``sqlite:emails.db`` or ``unix:/run/emails.sock``.
+
+  Raises:
+    ValueError: Unknown kind of output.
+  """
+  kind, _, path = spec.partition(':')
+  if kind not in SINKS or not path:
+    raise ValueError(f"Output must be one of {', '.join(f'{k}:PATH' for k in SINKS)}, got {spec!r}")
+  return SINKS[kind](path)
+
+
+# Workers
+class ShardStats(NamedTuple):
+  """What one shard did since its previous report."""
+  shard: int
+  aliases: int
+  interval: float
+  polls: int
+  emails: int
+  errors: int
+  lag_mean: float
+  lag_max: float
+  # Longest time any alias of the shard has gone without a successful poll
+  staleness: float
+
+  @property
+  def emails_per_second(self) -> float:
+    return self.emails / self.interval if self.interval else 0.0
+
+  @property
+  def polls_per_second(self) -> float:
+    return self.polls / self.interval if self.interval else 0.0
+
+
+class _Shard:
+  """The event loop of one worker process."""
+
+  def __init__(self, shard: int, options: Dict[str, Any], control: Any, reports: Any) -> None:
+    self.shard = shard
+    self.options = options
+    self.control = control
+    self.reports = reports
+    self.tasks: Dict[str, 'asyncio.Task[None]'] = {}
+    self.last_poll: Dict[str, float] = {}
+    self.reset_counters()
+
+  def reset_counters(self) -> None:
+    self.started = time.monotonic()
+    self.polls = self.emails = self.errors = 0
+    self.lag_sum = self.lag_max = 0.0
+
+  async def run(self, aliases: Iterable[str]) -> None:
+    from .cursors import AsyncInboxSyncer, MemoryCursorStore, SQLiteCursorStore
+    from .inbox_manager import Async
+    from .keyring import KeyRing
+
+    options = self.options
+    loop = asyncio.get_running_loop()
+    # Sink writes block on sockets, files and commits, so they run on a thread of their own; the sink is
+    # opened there too, as a SQLite connection may only be used from the thread that opened it
+    self.sink_thread = ThreadPoolExecutor(1, thread_name_prefix=f'reusable-email-sink-{self.shard}')
+    self.sink = await loop.run_in_executor(self.sink_thread, open_sink, options['output'])
+    # Every worker shares the cursor database; SQLiteCursorStore waits out the others' locks
+    self.store = SQLiteCursorStore(options['cursors']) if options['cursors'] else MemoryCursorStore()
+    keyring = KeyRing(options['keyring']) if options['keyring'] else None
+    client = Async(
+      options['authorization'], options['private_key'], base_url=options['base_url'], keyring=keyring,
+      limit=options['concurrency'], retry=RetryPolicy()
+    )
+    try:
+      async with client:
+        self.syncer = AsyncInboxSyncer(client, self.store, encrypted=options['encrypted'])
+        for alias in aliases:
+          self.add(alias)
+        try:
+          await self.serve()
+        finally:
+          for task in self.tasks.values():
+            task.cancel()
+          await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+    finally:
+      await loop.run_in_executor(self.sink_thread, self.sink.close)
+      self.sink_thread.shutdown()
+      self.store.close()
+
+  def add(self, alias: str) -> None:
+    if alias not in self.tasks:
+      self.last_poll[alias] = time.monotonic()
+      self.tasks[alias] = asyncio.ensure_future(self.poll(alias))
+
+  def remove(self, alias: str) -> None:
+    task = self.tasks.pop(alias, None)
+    if task is not None:
+      task.cancel()
+    self.last_poll.pop(alias, None)
+
+  async def serve(self) -> None:
+    """Apply add, remove and stop messages from the parent, and report stats every interval."""
+    interval = self.options['stats_interval']
+    while True:
+      while True:
+        try:
+          command, aliases = self.control.get_nowait()
+        except queue.Empty:
+          break
+        if command == 'stop':
+          return
+        for alias in aliases:
+          if command == 'add':
+            self.add(alias)
+          else:
+            self.remove(alias)
+      now = time.monotonic()
+      if now - self.started >= interval:
+        self.report(now)
+      await asyncio.sleep(0.1)
+
+  def report(self, now: float) -> None:
+    staleness = max((now - last for last in self.last_poll.values()), default=0.0)
+    self.reports.put(ShardStats(
+      self.shard, len(self.tasks), now - self.started, self.polls, self.emails, self.errors,
+      self.lag_sum / self.emails if self.emails else 0.0, self.lag_max, staleness
+    ))
+    self.reset_counters()
+
+  async def poll(self, alias: str) -> None:
+    from .backoff import Backoff
+    backoff = Backoff(self.options['min_interval'], self.options['max_interval'])
+    loop = asyncio.get_running_loop()
+    if self.options['skip_existing'] and await loop.run_in_executor(None, self.store.get, alias) is None:
+      try:
+        await self.syncer.sync(alias)
+      except Exception:
+        self.errors += 1
+    while True:
+      cursor = await loop.run_in_executor(None, self.store.get, alias)
+      try:
+        emails = await self.syncer.sync(alias)
+      except Exception:
+        emails = None
+      self.polls += 1
+      if not isinstance(emails, list):
+        self.errors += 1
+      else:
+        self.last_poll[alias] = time.monotonic()
+        if emails:
+          try:
+            await loop.run_in_executor(self.sink_thread, self.sink.write, alias, emails)
+          except Exception:
+            # Put the cursor back so the emails are fetched again instead of lost
+            self.errors += 1
+            if cursor is None:
+              await loop.run_in_executor(None, self.store.delete, alias)
+            else:
+              await loop.run_in_executor(None, self.store.set, alias, *cursor)
+          else:
+            self.delivered(emails)
+            backoff.reset()
+      await asyncio.sleep(backoff.next())
+
+  def delivered(self, emails: List[Email]) -> None:
+    now = time.time()
+    self.emails += len(emails)
+    for email in emails:
+      if email.timestamp is not None:
+        lag = max(0.0, now - email.timestamp)
+        self.lag_sum += lag
+        self.lag_max = max(self.lag_max, lag)
+
+
+def _run_shard(shard: int, options: Dict[str, Any], aliases: List[str], control: Any, reports: Any) -> None:
+  # The parent handles Ctrl-C and stops workers through their control queue
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  asyncio.run(_Shard(shard, options, control, reports).run(aliases))
+
+
+class Poller:
+  """
+  Polls many aliases from several worker processes, each owning a consistent-hash shard of them.
+
+  Workers are restarted if they die. With ``cursors`` set, an alias picks up where it left off after
+  a restart or a move to another shard; otherwise its inbox is written again from the beginning.
+  """
+
+  def __init__(
+    self, authorization: str, output: str, workers: Optional[int] = None, *, private_key: Optional[bytes] = None,
+    keyring: Optional[str] = None, encrypted: bool = False, cursors: Optional[str] = None,
+    base_url: str = DEFAULT_BASE_URL, concurrency: int = 100, min_interval: float = 1.0, max_interval: float = 30.0,
+    skip_existing: bool = False, stats_interval: float = 10.0, replicas: int = 64
+  ) -> None:
+    """
+    Args:
+      authorization (str): API key.
+      output (str): Where new emails go: ``jsonl:PATH``, ``sqlite:PATH`` or ``unix:PATH``.
+      workers (int, optional): Number of worker processes. Defaults to the CPU count.
+      private_key (bytes, optional): RSA private key in PEM format for encrypted aliases.
+      keyring (str, optional): Directory of ``<ALIAS>.pem`` private keys for encrypted aliases.
+      encrypted (bool): Poll encrypted inboxes.
+      cursors (str, optional): SQLite file keeping each alias's cursor, shared by every worker.
+      base_url (str): API root, e.g. a local mock server.
+      concurrency (int): Connections per worker.
+      min_interval (float): Shortest delay between polls of an alias in seconds.
+      max_interval (float): Longest delay between polls of a quiet alias in seconds.
+      skip_existing (bool): Only write emails received after an alias was first polled.
+      stats_interval (float): Seconds between the stats reports of each worker.
+      replicas (int): Points per worker on the hash ring.
+    """
+    self.options = {
+      'authorization': authorization, 'output': output, 'private_key': private_key, 'keyring': keyring,
+      'encrypted': encrypted, 'cursors': cursors, 'base_url': base_url, 'concurrency': concurrency,
+      'min_interval': min_interval, 'max_interval': max_interval, 'skip_existing': skip_existing,
+      'stats_interval': stats_interval,
+    }
+    self.replicas = replicas
+    self.ring = HashRing(workers or os.cpu_count() or 1, replicas)
+    self.context = multiprocessing.get_context('spawn')
+    self.reports = self.context.Queue()
+    self.processes: Dict[int, Any] = {}
+    self.controls: Dict[int, Any] = {}
+    self.shards: Dict[int, Set[str]] = {shard: set() for shard in range(self.ring.shards)}
+    self.latest: Dict[int, ShardStats] = {}
+    self.started = False
+
+  @property
+  def aliases(self) -> Set[str]:
+    return set().union(*self.shards.values())
+
+  def start(self, aliases: Iterable[str] = ()) -> None:
+    """Start one worker per shard, polling `aliases`."""
+    for alias in aliases:
+      self.shards[self.ring.shard_for(alias)].add(alias.upper())
+    for shard in self.shards:
+      self._spawn(shard)
+    self.started = True
+
+  def _spawn(self, shard: int) -> None:
+    control = self.controls[shard] = self.context.Queue()
+    process = self.processes[shard] = self.context.Process(
+      target=_run_shard, args=(shard, self.options, sorted(self.shards[shard]), control, self.reports),
+      name=f"reusable-email-poller-{shard}", daemon=True
+    )
+    process.start()
+
+  def _send(self, shard: int, command: str, aliases: Iterable[str]) -> None:
+    aliases = list(aliases)
+    if aliases and self.started:
+      self.controls[shard].put((command, aliases))
+
+  def add(self, aliases: Iterable[str]) -> None:
+    """Start polling aliases on the shards that own them."""
+    moved: Dict[int, List[str]] = {}
+    for alias in aliases:
+      alias = alias.upper()
+      shard = self.ring.shard_for(alias)
+      if alias not in self.shards[shard]:
+        self.shards[shard].add(alias)
+        moved.setdefault(shard, []).append(alias)
+    for shard, batch in moved.items():
+      self._send(shard, 'add', batch)
+
+  def remove(self, aliases: Iterable[str]) -> None:
+    """Stop polling aliases."""
+    moved: Dict[int, List[str]] = {}
+    for alias in aliases:
+      alias = alias.upper()
+      shard = self.ring.shard_for(alias)
+      if alias in self.shards[shard]:
+        self.shards[shard].discard(alias)
+        moved.setdefault(shard, []).append(alias)
+    for shard, batch in moved.items():
+      self._send(shard, 'remove', batch)
+
+  def set_aliases(self, aliases: Iterable[str]) -> None:
+    """Poll exactly `aliases`, adding and removing only the difference."""
+    wanted = {alias.upper() for alias in aliases}
+    current = self.aliases
+    self.remove(current - wanted)
+    self.add(wanted - current)
+
+  def resize(self, workers: int) -> None:
+    """Change the number of workers. Only the aliases whose shard changes on the new ring are moved."""
+    ring = HashRing(workers, self.replicas)
+    shards: Dict[int, Set[str]] = {shard: set() for shard in range(workers)}
+    for alias in self.aliases:
+      shards[ring.shard_for(alias)].add(alias)
+    old = self.shards
+    self.ring, self.shards = ring, shards
+    if not self.started:
+      return
+    # Stop surplus workers first so no alias is polled by two workers at once
+    for shard in [shard for shard in self.processes if shard >= workers]:
+      self._stop(shard)
+    for shard, aliases in shards.items():
+      if shard in self.processes:
+        self._send(shard, 'remove', old[shard] - aliases)
+        self._send(shard, 'add', aliases - old[shard])
+      else:
+        self._spawn(shard)
+
+  def stats(self) -> List[ShardStats]:
+    """The latest report of every shard."""
+    while True:
+      try:
+        report = self.reports.get_nowait()
+      except queue.Empty:
+        break
+      if report.shard in self.shards:
+        self.latest[report.shard] = report
+    return [self.latest[shard] for shard in sorted(self.latest) if shard in self.shards]
+
+  def check(self) -> List[int]:
+    """Restart workers that died. Returns the restarted shards."""
+    restarted = [shard for shard, process in self.processes.items() if not process.is_alive()]
+    for shard in restarted:
+      self._spawn(shard)
+    return restarted
+
+  def _stop(self, shard: int, timeout: float = 10.0) -> None:
+    process = self.processes.pop(shard, None)
+    control = self.controls.pop(shard, None)
+    self.latest.pop(shard, None)
+    if process is None:
+      return
+    control.put(('stop', []))
+    process.join(timeout)
+    if process.is_alive():
+      process.terminate()
+      process.join()
+
+  def stop(self) -> None:
+    """Stop every worker."""
+    for shard in list(self.processes):
+      self._stop(shard)
+    self.started = False
+
+  def __enter__(self) -> 'Poller':
+    return self
+
+  def __exit__(self, *exc_info: Any) -> None:
+    self.stop()
+
+
+# Daemon
+def read_aliases(path: str) -> Set[str]:
+  """Aliases listed one per line in a file. Blank lines and ``#`` comments are ignored."""
+  with open(path, 'r', encoding='utf-8') as f:
+    return {line.split('#', 1)[0].strip() for line in f} - {''}
+
+
+def format_stats(stats: Sequence[ShardStats]) -> str:
+  lines = [f"{'shard':>5} {'aliases':>8} {'emails/s':>9} {'polls/s':>8} {'errors':>7} {'lag mean':>9} {'lag max':>8} {'stale':>7}"]
+  for s in stats:
+    lines.append(
+      f"{s.shard:>5} {s.aliases:>8} {s.emails_per_second:>9.1f} {s.polls_per_second:>8.1f} {s.errors:>7} "
+      f"{s.lag_mean:>8.1f}s {s.lag_max:>7.1f}s {s.staleness:>6.1f}s"
+    )
+  return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+  parser = argparse.ArgumentParser(
+    prog='python -m reusable.email.poller', description="Poll a fleet of aliases from several worker processes."
+  )
+  parser.add_argument('--aliases', required=True, help="File of aliases, one per line. Re-read when it changes or on SIGHUP")
+  parser.add_argument('--output', required=True, help="jsonl:PATH, sqlite:PATH or unix:PATH")
+  parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+  parser.add_argument('--token', default=os.environ.get('REUSABLE_EMAIL_TOKEN'), help="API key. Defaults to $REUSABLE_EMAIL_TOKEN")
+  parser.add_argument('--encrypted', action='store_true', help="Poll encrypted inboxes")
+  parser.add_argument('--private-key', help="PEM file of the private key for encrypted inboxes")
+  parser.add_argument('--keyring', help="Directory of <ALIAS>.pem private keys for encrypted inboxes")
+  parser.add_argument('--cursors', help="SQLite file to keep cursors in across restarts and rebalancing")
+  parser.add_argument('--base-url', default=DEFAULT_BASE_URL)
+  parser.add_argument('--concurrency', type=int, default=100, help="Connections per worker")
+  parser.add_argument('--min-interval', type=float, default=1.0)
+  parser.add_argument('--max-interval', type=float, default=30.0)
+  parser.add_argument('--skip-existing', action='store_true', help="Only output emails received after an alias was first polled")
+  parser.add_argument('--stats-interval', type=float, default=10.0, help="Seconds between per-shard stats reports")
+  args = parser.parse_args(argv)
+  if not args.token:
+    parser.error("an API key is required: pass --token or set REUSABLE_EMAIL_TOKEN")
+  try:
+    open_sink(args.output).close()
+  except (ValueError, OSError) as e:
+    parser.error(str(e))
+
+  private_key = None
+  if args.private_key:
+    with open(args.private_key, 'rb') as f:
+      private_key = f.read()
+
+  poller = Poller(
+    args.token, args.output, args.workers, private_key=private_key, keyring=args.keyring, encrypted=args.encrypted,
+    cursors=args.cursors, base_url=args.base_url, concurrency=args.concurrency, min_interval=args.min_interval,
+    max_interval=args.max_interval, skip_existing=args.skip_existing, stats_interval=args.stats_interval
+  )
+  reload = False
+
+  def on_hangup(*_: Any) -> None:
+    nonlocal reload
+    reload = True
+
+  def on_terminate(*_: Any) -> None:
+    raise KeyboardInterrupt
+
+  if hasattr(signal, 'SIGHUP'):
+    signal.signal(signal.SIGHUP, on_hangup)
+  signal.signal(signal.SIGTERM, on_terminate)
+
+  mtime = os.stat(args.aliases).st_mtime
+  poller.start(read_aliases(args.aliases))
+  print(f"polling {len(poller.aliases)} aliases on {args.workers} workers", file=sys.stderr)
+  next_report = time.monotonic() + args.stats_interval
+  try:
+    while True:
+      time.sleep(0.5)
+      for shard in poller.check():
+        print(f"worker {shard} died and was restarted", file=sys.stderr)
+      current = os.stat(args.aliases).st_mtime
+      if reload or current != mtime:
+        reload, mtime = False, current
+        before = poller.aliases
+        poller.set_aliases(read_aliases(args.aliases))
+        after = poller.aliases
+        print(f"aliases reloaded: {len(after - before)} added, {len(before - after)} removed", file=sys.stderr)
+      if time.monotonic() >= next_report:
+        next_report += args.stats_interval
+        stats = poller.stats()
+        if stats:
+          print(format_stats(stats), file=sys.stderr, flush=True)
+  except KeyboardInterrupt:
+    pass
+  finally:
+    poller.stop()
+
+
+if __name__ == '__main__':
+  # Run the copy imported as reusable.email.poller, so workers unpickle the same classes as the parent
+  from reusable.email.poller import main as _main
+  _main()
@@ -0,0 +1,123 @@
+import asyncio
+import email.utils
+import threading
+import time
+from typing import FrozenSet, Iterable, Optional
+from .backoff import Backoff
+from .errors import RateLimited
+
+
+class RetryPolicy:
+  """
+  Decides whether a failed request is retried, and how long to wait first.
+
+  Only idempotent methods are retried. The wait grows exponentially with jitter,
+  unless the server sent a ``Retry-After`` header, which is honoured instead.
+  """
+
+  def __init__(
+    self, total: int = 3, backoff_initial: float = 0.5, backoff_max: float = 30.0,
+    statuses: Iterable[int] = (429, 500, 502, 503, 504), methods: Iterable[str] = ('get', 'put', 'delete'),
+    max_retry_after: float = 60.0
+  ) -> None:
+    """
+    Args:
+      total (int): Maximum number of retries per request. 0 disables retries.
+      backoff_initial (float): Delay before the first retry in seconds.
+      backoff_max (float): Upper bound for the delay between retries in seconds.
+      statuses (Iterable[int]): Status codes that are retried.
+      methods (Iterable[str]): Lower case HTTP methods that are safe to retry.
+      max_retry_after (float): Longest ``Retry-After`` the client waits for; `RateLimited` is raised beyond it.
+    """
+    self.total = total
+    self.backoff_initial = backoff_initial
+    self.backoff_max = backoff_max
+    self.statuses: FrozenSet[int] = frozenset(statuses)
+    self.methods: FrozenSet[str] = frozenset(methods)
+    self.max_retry_after = max_retry_after
+
+  def backoff(self) -> Backoff:
+    """Create the backoff state for one request."""
+    return Backoff(self.backoff_initial, self.backoff_max)
+
+  def delay_for_status(self, method: str, status: int, retry_after: Optional[str], attempt: int, backoff: Backoff) -> Optional[float]:
+    """
+    Return the delay before retrying a response, or None if it must not be retried.
+
+    Raises:
+      RateLimited: The server asked to wait longer than `max_retry_after`.
+    """
+    if attempt >= self.total or method not in self.methods or status not in self.statuses:
+      return None
+    wait = parse_retry_after(retry_after)
+    if wait is None:
+      return backoff.next()
+    if wait > self.max_retry_after:
+      raise RateLimited(wait)
+    return wait
+
+  def delay_for_error(self, method: str, attempt: int, backoff: Backoff) -> Optional[float]:
+    """Return the delay before retrying a connection error or timeout, or None if it must not be retried."""
+    if attempt >= self.total or method not in self.methods:
+      return None
+    return backoff.next()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+  """
+  Parse a ``Retry-After`` header given in seconds or as an HTTP date.
+
+  Returns:
+    float: Seconds to wait, or None if the header is missing or malformed.
+  """
+  if not value:
+    return None
+  try:
+    return max(0.0, float(value))
+  except ValueError:
+    pass
+  try:
+    return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+  except (TypeError, ValueError):
+    return None
+
+
+class RateLimiter:
+  """
+  Client side token bucket, shared by every request of a client.
+
+  Safe to share between threads, and between Sync and Async clients.
+  """
+
+  def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+    """
+    Args:
+      rate (float): Requests per second allowed on average.
+      burst (int, optional): Requests allowed back to back before throttling. Defaults to `rate`, at least 1.
+    """
+    self.rate = rate
+    self.capacity = float(burst if burst is not None else max(1, int(rate)))
+    self.tokens = self.capacity
+    self.updated = time.monotonic()
+    self.lock = threading.Lock()
+
+  def reserve(self) -> float:
+    """Take a token and return how long to wait before using it."""
+    with self.lock:
+      now = time.monotonic()
+      self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+      self.updated = now
+      self.tokens -= 1
+      return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+  def acquire(self) -> None:
+    """Block until a request may be sent."""
+    delay = self.reserve()
+    if delay:
+      time.sleep(delay)
+
+  async def acquire_async(self) -> None:
+    """Wait, without blocking the event loop, until a request may be sent."""
+    delay = self.reserve()
+    if delay:
+      await asyncio.sleep(delay)
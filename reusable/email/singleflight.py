@@ -0,0 +1,80 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+While a call for a key is in flight, identical calls wait for it and share its
+result, or its exception, instead of running again. Used by `Sync` and `Async`
+with ``coalesce=True`` so a burst of identical inbox or email fetches sends one
+request and decrypts once.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+  __slots__ = ('done', 'result', 'error')
+
+  def __init__(self) -> None:
+    self.done = threading.Event()
+    self.result: Any = None
+    self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+  """Thread-safe single-flight group for blocking calls."""
+
+  def __init__(self) -> None:
+    self.lock = threading.Lock()
+    self.calls: Dict[Hashable, _Call] = {}
+
+  def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Run `function`, or wait for the identical call already in flight.
+
+    Returns:
+      tuple: The result, and whether it was shared from another call.
+    """
+    with self.lock:
+      call = self.calls.get(key)
+      leader = call is None
+      if leader:
+        call = self.calls[key] = _Call()
+    if not leader:
+      call.done.wait()
+      if call.error is not None:
+        raise call.error
+      return call.result, True
+    try:
+      call.result = function()
+      return call.result, False
+    except BaseException as e:
+      call.error = e
+      raise
+    finally:
+      with self.lock:
+        del self.calls[key]
+      call.done.set()
+
+
+class AsyncSingleFlight:
+  """Single-flight group for coroutines on one event loop."""
+
+  def __init__(self) -> None:
+    self.calls: Dict[Hashable, 'asyncio.Future[Any]'] = {}
+
+  async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+    """
+    Await `function()`, or the identical call already in flight.
+
+    The call runs as its own task, so cancelling one waiting caller does not cancel it for the others.
+
+    Returns:
+      tuple: The result, and whether it was shared from another call.
+    """
+    task = self.calls.get(key)
+    shared = task is not None
+    if not shared:
+      task = self.calls[key] = asyncio.ensure_future(function())
+      task.add_done_callback(lambda _: self.calls.pop(key, None) if self.calls.get(key) is task else None)
+    return await asyncio.shield(task), shared
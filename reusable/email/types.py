@@ -1,7 +1,9 @@
 # type: ignore 
-import json
+from . import json_backend
 
 class Email:
+  __slots__ = ('id', 'subject', 'sender', 'timestamp', 'body')
+
   def __init__(self, id: str, subject: str, sender: str, timestamp: float, body: str):
     self.id = id
     self.subject = subject
@@ -10,29 +12,96 @@ class Email:
     self.body = body
 
   @classmethod
-  def from_json(cls, decrypted_email_data: str):
-    '''Parse JSON and create an Email instance'''
-    email_json = json.loads(decrypted_email_data)
-    return cls(
-      id=email_json.get('id', None),
-      subject=email_json.get('subject', None),
-      sender=email_json.get('sender', None),
-      timestamp=email_json.get('timestamp', None),
-      body=email_json.get('body', None)
-    )
-  
+  def from_dict(cls, email_json: dict):
+    '''Create an Email instance from an already parsed JSON object'''
+    get = email_json.get
+    return cls(get('id'), get('subject'), get('sender'), get('timestamp'), get('body'))
+
+  @classmethod
+  def from_dicts(cls, emails: list) -> 'list':
+    '''Build a whole Inbox from the parsed `inbox` list of a response in one pass'''
+    return [cls(e.get('id'), e.get('subject'), e.get('sender'), e.get('timestamp'), e.get('body')) for e in emails]
+
+  @classmethod
+  def from_json(cls, decrypted_email_data):
+    '''Parse JSON (str, bytes or bytearray) and create an Email instance'''
+    return cls.from_dict(json_backend.loads(decrypted_email_data))
+
+  def to_dict(self) -> dict:
+    '''Convert Email instance to a JSON-serializable dict'''
+    return {
+        'id': self.id,
+        'subject': self.subject,
+        'sender': self.sender,
+        'timestamp': self.timestamp,
+        'body': self.body
+    }
+
   @staticmethod
   def to_json(email_instance):  
     '''Convert Email instance to JSON string'''
-    email_dict = {
-        'id': email_instance.id,
-        'subject': email_instance.subject,
-        'sender': email_instance.sender,
-        'timestamp': email_instance.timestamp,
-        'body': email_instance.body
-    }
-    return json.dumps(email_dict)
+    return json_backend.dumps(email_instance.to_dict())
+
+  def __reduce__(self):
+    return (self.__class__, (self.id, self.subject, self.sender, self.timestamp, self.body))
+
+  def __repr__(self):
+    return f'<{self.__class__.__name__} id={self.id!r} sender={self.sender!r} subject={self.subject!r}>'
+
+
+class FrozenEmail(Email):
+  '''Immutable, hashable Email'''
+
+  __slots__ = ()
+
+  def __init__(self, id: str, subject: str, sender: str, timestamp: float, body: str):
+    set_ = object.__setattr__
+    set_(self, 'id', id)
+    set_(self, 'subject', subject)
+    set_(self, 'sender', sender)
+    set_(self, 'timestamp', timestamp)
+    set_(self, 'body', body)
+
+  def __setattr__(self, name, value):
+    raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+  def __delattr__(self, name):
+    raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+  def _key(self):
+    return (self.id, self.subject, self.sender, self.timestamp, self.body)
+
+  def __eq__(self, other):
+    if not isinstance(other, Email):
+      return NotImplemented
+    return self._key() == (other.id, other.subject, other.sender, other.timestamp, other.body)
+
+  def __hash__(self):
+    return hash(self._key())
 
 
 Inbox = list[Email]
-  
\ No newline at end of file
+  
+
+class DeleteReport:
+  '''Outcome of a bulk delete: ids deleted and ids that failed with their error'''
+
+  __slots__ = ('deleted', 'failed')
+
+  def __init__(self):
+    self.deleted: list[str] = []
+    self.failed: dict[str, object] = {}
+
+  def record(self, email_id: str, result) -> None:
+    '''Record the result of one delete: True, or the falsy value/exception it produced'''
+    if result is True:
+      self.deleted.append(email_id)
+    else:
+      self.failed[email_id] = result
+
+  @property
+  def ok(self) -> bool:
+    return not self.failed
+
+  def __repr__(self) -> str:
+    return f'<DeleteReport deleted={len(self.deleted)} failed={len(self.failed)}>'
@@ -0,0 +1,170 @@
+"""
+Shared fixtures: a stub of the reusable.email API served from a background thread.
+
+The stub keeps one inbox in memory and can be told to misbehave: ignore the
+``after`` cursor, answer with error statuses and ``Retry-After`` headers, or
+respond slowly. Encrypted inboxes are encrypted the way the API encrypts them.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from aiohttp import web
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from reusable.email import generate_keys
+
+
+def encrypt_email(email: dict, public_key: bytes) -> dict:
+  """Encrypt an email dict into the API's encrypted email payload: an RSA-OAEP wrapped AES key and AES-CFB data."""
+  aes_key = os.urandom(32)
+  iv = os.urandom(16)
+  encryptor = Cipher(algorithms.AES(aes_key), modes.CFB(iv)).encryptor()
+  data = encryptor.update(json.dumps(email).encode('utf-8')) + encryptor.finalize()
+  oaep = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+  wrapped_key = serialization.load_pem_public_key(public_key).encrypt(aes_key, oaep)
+  return {
+    'encrypted_aes_key': base64.b64encode(wrapped_key).decode('ascii'),
+    'encrypted_iv': base64.b64encode(iv).decode('ascii'),
+    'encrypted_email_data': base64.b64encode(data).decode('ascii'),
+  }
+
+
+class StubServer:
+  """In-memory inbox served over HTTP on a free local port."""
+
+  def __init__(self, public_key: Optional[bytes] = None) -> None:
+    """
+    Args:
+      public_key (bytes, optional): Key the encrypted inbox is encrypted with.
+    """
+    self.public_key = public_key
+    self.emails: List[dict] = []
+    # Switches tests flip to make the server misbehave
+    self.honour_after = True
+    self.failures: List[Tuple[int, Dict[str, str]]] = []
+    self.delay = 0.0
+    # Query and path of every request received, in order
+    self.requests: List[Dict[str, str]] = []
+    self.paths: List[str] = []
+    # Public key of every encrypted inbox created, by alias
+    self.inboxes: Dict[str, str] = {}
+    self.loop = asyncio.new_event_loop()
+    self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    self.thread.start()
+    self.runner = asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+  async def _start(self) -> web.AppRunner:
+    app = web.Application(middlewares=[self.misbehave])
+    app.router.add_get('/v1/inbox', self.inbox)
+    app.router.add_get('/v1/email', self.email)
+    app.router.add_get('/v1/encrypted/inbox', self.encrypted_inbox)
+    app.router.add_get('/v1/encrypted/email', self.encrypted_email)
+    app.router.add_post('/v1/encrypted/inbox', self.create_encrypted_inbox)
+    app.router.add_delete('/v1/email', self.delete)
+    app.router.add_delete('/v1/encrypted/email', self.delete)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    self.port = runner.addresses[0][1]
+    return runner
+
+  @property
+  def url(self) -> str:
+    return f"http://127.0.0.1:{self.port}/v1"
+
+  @web.middleware
+  async def misbehave(self, request: web.Request, handler):
+    """Record every request, then add the configured delay and failures."""
+    self.requests.append(dict(request.query))
+    self.paths.append(request.path)
+    if self.delay:
+      await asyncio.sleep(self.delay)
+    if self.failures:
+      status, headers = self.failures.pop(0)
+      return web.json_response({'code': status, 'message': 'Stub failure'}, status=status, headers=headers)
+    return await handler(request)
+
+  def _find(self, request: web.Request) -> Optional[dict]:
+    return next((email for email in self.emails if email['id'] == request.query.get('id')), None)
+
+  @staticmethod
+  def _not_found() -> web.Response:
+    return web.json_response({'code': 404, 'message': 'Email not found'}, status=404)
+
+  def _listing(self, request: web.Request, encode) -> web.Response:
+    items = list(self.emails)
+    after = request.query.get('after')
+    if after and self.honour_after:
+      ids = [email['id'] for email in items]
+      if after in ids:
+        items = items[ids.index(after) + 1:]
+    return web.json_response({'alias': request.query.get('alias'), 'inbox': [encode(email) for email in items]})
+
+  async def inbox(self, request: web.Request) -> web.Response:
+    return self._listing(request, lambda email: email)
+
+  async def email(self, request: web.Request) -> web.Response:
+    email = self._find(request)
+    return web.Response(text=email['body'], content_type='text/html') if email else self._not_found()
+
+  async def encrypted_inbox(self, request: web.Request) -> web.Response:
+    return self._listing(request, lambda email: encrypt_email(email, self.public_key))
+
+  async def encrypted_email(self, request: web.Request) -> web.Response:
+    email = self._find(request)
+    return web.json_response(encrypt_email(email, self.public_key)) if email else self._not_found()
+
+  async def create_encrypted_inbox(self, request: web.Request) -> web.Response:
+    form = await request.post()
+    self.inboxes[form['inboxName']] = form['publicKey']
+    return web.json_response({'success': True})
+
+  async def delete(self, request: web.Request) -> web.Response:
+    email = self._find(request)
+    if email is None:
+      return self._not_found()
+    self.emails.remove(email)
+    return web.json_response({'success': True})
+
+  def close(self) -> None:
+    asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+    self.loop.call_soon_threadsafe(self.loop.stop)
+    self.thread.join()
+    self.loop.close()
+
+
+@pytest.fixture(scope='session')
+def keys() -> Tuple[bytes, bytes]:
+  return generate_keys()
+
+
+@pytest.fixture
+def server(keys):
+  stub = StubServer(public_key=keys[0])
+  yield stub
+  stub.close()
+
+
+@pytest.fixture
+def encrypt(keys):
+  """Encrypt a raw email dict with the session key pair."""
+  return lambda email: encrypt_email(email, keys[0])
+
+
+@pytest.fixture
+def make_email():
+  """Build a raw email dict as the API returns it."""
+  def make(email_id: str, timestamp: Optional[float] = 1734448240.0, subject: str = 'Hello') -> dict:
+    return {
+      'id': email_id, 'subject': subject, 'sender': 'noreply@example.com', 'timestamp': timestamp,
+      'body': f'Body of {email_id}',
+    }
+  return make
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from reusable.email import Archive, Sync
+from reusable.email.archive import MAGIC
+from reusable.email.types import Email
+
+
+def email(email_id: str, timestamp: float, sender: str = 'a@example.com') -> Email:
+  return Email(email_id, f'Subject {email_id}', sender, timestamp, f'Body of {email_id}')
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib', 'zstd'])
+def test_round_trip_and_reopen(tmp_path, compression):
+  if compression == 'zstd':
+    pytest.importorskip('zstandard')
+  with Archive(tmp_path, compression=compression) as archive:
+    assert archive.extend('alias', [email('a', 1.0), email('b', 2.0)]) == 2
+  with Archive(tmp_path) as archive:
+    copy = archive.get('alias', 'b')
+    assert (copy.id, copy.subject, copy.timestamp, copy.body) == ('b', 'Subject b', 2.0, 'Body of b')
+    assert len(archive) == 2
+
+
+def test_segments_start_with_the_magic(tmp_path):
+  with Archive(tmp_path, segment_size=1) as archive:
+    archive.extend('alias', [email('a', 1.0), email('b', 2.0)])
+  segments = sorted(name for name in os.listdir(tmp_path) if name.endswith('.log'))
+  assert segments == ['segment-000001.log', 'segment-000002.log']
+  for name in segments:
+    with open(tmp_path / name, 'rb') as f:
+      assert f.read(4) == MAGIC
+
+
+def test_encrypted_at_rest(tmp_path, keys):
+  with Archive(tmp_path, public_key=keys[0]) as archive:
+    archive.append('alias', email('a', 1.0))
+  with open(tmp_path / 'segment-000001.log', 'rb') as f:
+    assert b'Body of a' not in f.read()
+  with Archive(tmp_path) as archive:
+    with pytest.raises(ValueError):
+      archive.get('alias', 'a')
+  with Archive(tmp_path, private_key=keys[1]) as archive:
+    assert archive.get('alias', 'a').body == 'Body of a'
+
+
+def test_emails_are_keyed_by_alias(tmp_path):
+  with Archive(tmp_path) as archive:
+    assert archive.append('one', email('a', 1.0))
+    assert not archive.append('ONE', email('a', 1.0))
+    assert archive.append('two', email('a', 1.0))
+    assert ('One', 'a') in archive and ('two', 'a') in archive and ('three', 'a') not in archive
+    assert archive.get('three', 'a') is None
+    assert [e.id for e in archive.range(alias='two')] == ['a']
+
+
+def test_range_filters_and_orders(tmp_path):
+  with Archive(tmp_path) as archive:
+    archive.extend('alias', [email('c', 3.0, 'b@example.com'), email('a', 1.0), email('b', 2.0)])
+    archive.extend('other', [email('d', 4.0)])
+    assert [e.id for e in archive.range()] == ['a', 'b', 'c', 'd']
+    assert [e.id for e in archive.range(newest_first=True, limit=2)] == ['d', 'c']
+    assert [e.id for e in archive.range(since=2.0, until=4.0)] == ['b', 'c']
+    assert [e.id for e in archive.range(sender='a@example.com', alias='alias')] == ['a', 'b']
+
+
+def test_range_pages_through_many_rows(tmp_path):
+  with Archive(tmp_path) as archive:
+    archive.extend('alias', [email(str(n), float(n)) for n in range(600)])
+    emails = archive.range()
+    first = next(emails)
+    # Writes between pages do not disturb the iteration
+    archive.append('alias', email('late', 1000.0))
+    ids = [first.id] + [e.id for e in emails]
+  assert ids[:600] == [str(n) for n in range(600)]
+
+
+def test_client_archives_what_it_fetches(tmp_path, server, make_email):
+  server.emails.extend([make_email('a'), make_email('b')])
+  with Archive(tmp_path) as archive:
+    with Sync('token', base_url=server.url, archive=archive) as client:
+      client.view_inbox('alias')
+    assert ('alias', 'a') in archive and ('alias', 'b') in archive
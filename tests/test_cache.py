@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from reusable.email import Async, EmailCache, Sync
+from reusable.email.types import Email
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_round_trips_bodies_and_emails(compress):
+  cache = EmailCache(compress=compress)
+  cache.set('alias', 'body', 'Hello ✓')
+  cache.set('alias', 'email', Email('email', 'Subject', 'a@example.com', 1.5, 'Body'))
+  assert cache.get('alias', 'body') == 'Hello ✓'
+  email = cache.get('alias', 'email')
+  assert (email.id, email.subject, email.sender, email.timestamp, email.body) == ('email', 'Subject', 'a@example.com', 1.5, 'Body')
+
+
+def test_evicts_least_recently_used():
+  cache = EmailCache(maxsize=2)
+  cache.set('alias', 'a', 'A')
+  cache.set('alias', 'b', 'B')
+  cache.get('alias', 'a')
+  cache.set('alias', 'c', 'C')
+  assert cache.get('alias', 'b') is None
+  assert (cache.get('alias', 'a'), cache.get('alias', 'c')) == ('A', 'C')
+
+
+def test_entries_expire_after_ttl():
+  cache = EmailCache(ttl=0.05)
+  cache.set('alias', 'a', 'A')
+  assert cache.get('alias', 'a') == 'A'
+  time.sleep(0.1)
+  assert cache.get('alias', 'a') is None
+  assert len(cache) == 0
+
+
+def test_keys_include_the_alias():
+  cache = EmailCache()
+  cache.set('one', 'a', 'A')
+  assert cache.get('two', 'a') is None
+
+
+def test_stats_invalidate_and_clear():
+  cache = EmailCache()
+  cache.set('alias', 'a', 'A')
+  cache.get('alias', 'a')
+  cache.get('alias', 'b')
+  assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1, 'bytes': 1}
+  cache.invalidate('alias', 'a')
+  assert cache.get('alias', 'a') is None
+  cache.set('alias', 'a', 'A')
+  cache.clear()
+  assert cache.stats() == {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0}
+
+
+def test_sync_body_is_fetched_once(server, make_email):
+  server.emails.append(make_email('a'))
+  with Sync('token', base_url=server.url, cache=EmailCache()) as client:
+    assert client.fetch_email_body('alias', 'a') == 'Body of a'
+    assert client.fetch_email_body('alias', 'a') == 'Body of a'
+    assert server.paths.count('/v1/email') == 1
+
+
+def test_encrypted_email_is_decrypted_once(server, keys, make_email):
+  server.emails.append(make_email('a', subject='Secret'))
+
+  async def main():
+    async with Async('token', keys[1], base_url=server.url, cache=EmailCache(compress=True)) as client:
+      return [await client.fetch_encrypted_email('alias', 'a') for _ in range(3)]
+
+  emails = asyncio.run(main())
+  assert [email.subject for email in emails] == ['Secret'] * 3
+  assert server.paths.count('/v1/encrypted/email') == 1
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from reusable.email import Async, Observer, RetryPolicy, Sync
+from reusable.email.errors import NotFound
+
+RETRY = RetryPolicy(total=2, backoff_initial=0.01, backoff_max=0.02)
+
+
+class Recorder(Observer):
+  def __init__(self) -> None:
+    self.events = []
+
+  def on_request_start(self, method, path):
+    self.events.append(('start', method, path))
+
+  def on_request_end(self, method, path, status, elapsed, nbytes):
+    self.events.append(('end', method, path, status))
+
+  def on_retry(self, method, path, attempt, delay):
+    self.events.append(('retry', method, path, attempt))
+
+  def on_error(self, method, path, error):
+    self.events.append(('error', method, path, type(error).__name__))
+
+
+def sync_events(server) -> list:
+  recorder = Recorder()
+  with Sync('token', base_url=server.url, retry=RETRY, observer=recorder) as client:
+    client.view_inbox('alias')
+    with pytest.raises(NotFound):
+      client.fetch_email_body('alias', 'missing')
+  return recorder.events
+
+
+def async_events(server) -> list:
+  recorder = Recorder()
+
+  async def main():
+    async with Async('token', base_url=server.url, retry=RETRY, observer=recorder) as client:
+      await client.view_inbox('alias')
+      with pytest.raises(NotFound):
+        await client.fetch_email_body('alias', 'missing')
+
+  asyncio.run(main())
+  return recorder.events
+
+
+def test_sync_and_async_report_the_same_attempts(server, make_email):
+  server.emails.append(make_email('a'))
+  server.failures.append((503, {}))
+  expected = [
+    ('start', 'get', '/inbox'), ('end', 'get', '/inbox', 503), ('retry', 'get', '/inbox', 1),
+    ('start', 'get', '/inbox'), ('end', 'get', '/inbox', 200),
+    ('start', 'get', '/email'), ('end', 'get', '/email', 404), ('error', 'get', '/email', 'NotFound'),
+  ]
+  assert sync_events(server) == expected
+  server.failures.append((503, {}))
+  assert async_events(server) == expected
+
+
+def test_connection_errors_are_retried_then_raised():
+  recorder = Recorder()
+  # Nothing listens on port 1
+  with Sync('token', base_url='http://127.0.0.1:1/v1', retry=RETRY, observer=recorder) as client:
+    with pytest.raises(Exception):
+      client.view_inbox('alias')
+  assert [event[0] for event in recorder.events] == ['start', 'retry', 'start', 'retry', 'start', 'error']
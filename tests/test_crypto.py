@@ -0,0 +1,41 @@
+import base64
+
+import pytest
+
+from conftest import encrypt_email
+from reusable.email import crypto
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+  monkeypatch.setattr(crypto, '_CHUNK', 16)
+
+
+def large_email(size: int) -> dict:
+  return {'id': 'big', 'subject': 'Large', 'sender': 'a@example.com', 'timestamp': 1.0, 'body': 'Ünïcode ✓ ' * size}
+
+
+@pytest.mark.parametrize('size', [0, 1, 5, 1000])
+def test_chunked_decrypt_round_trips(keys, small_chunks, size):
+  email = crypto.get_decryptor(keys[1]).decrypt(encrypt_email(large_email(size), keys[0]))
+  assert email.body == 'Ünïcode ✓ ' * size
+
+
+def test_bytes_and_str_payloads_decrypt_alike(keys, small_chunks):
+  payload = encrypt_email(large_email(100), keys[0])
+  as_bytes = {name: value.encode('ascii') for name, value in payload.items()}
+  decryptor = crypto.get_decryptor(keys[1])
+  assert decryptor.decrypt(as_bytes).body == decryptor.decrypt(payload).body
+
+
+def test_wrapped_base64_falls_back_to_one_decode(keys, small_chunks):
+  payload = encrypt_email(large_email(100), keys[0])
+  data = payload['encrypted_email_data']
+  payload['encrypted_email_data'] = '\n'.join(data[i:i + 76] for i in range(0, len(data), 76))
+  assert crypto.get_decryptor(keys[1]).decrypt(payload).body == 'Ünïcode ✓ ' * 100
+
+
+@pytest.mark.parametrize('encoded', ['', 'QQ==', 'QUI=', 'QUJD', 'QUJDRA=='])
+def test_decoded_length(encoded):
+  assert crypto._decoded_length(encoded) == len(base64.b64decode(encoded))
+  assert crypto._decoded_length(encoded.encode('ascii')) == len(base64.b64decode(encoded))
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+import pytest
+
+from reusable.email import Async, AsyncInboxSyncer, InboxSyncer, JSONCursorStore, SQLiteCursorStore, Sync
+from reusable.email.cursors import Cursor
+
+
+def drain(syncer, alias: str = 'alias', syncs: int = 3) -> list:
+  """Ids delivered over several syncs."""
+  return [email.id for _ in range(syncs) for email in syncer.sync(alias)]
+
+
+@pytest.fixture(params=[True, False], ids=['honours-after', 'ignores-after'])
+def honour_after(request, server):
+  server.honour_after = request.param
+  return request.param
+
+
+def test_tied_timestamps_are_delivered_once(server, make_email, honour_after):
+  server.emails.extend([make_email('a', 5.0), make_email('b', 5.0), make_email('c', 5.0)])
+  with Sync('token', base_url=server.url) as client:
+    syncer = InboxSyncer(client)
+    assert drain(syncer) == ['a', 'b', 'c']
+    server.emails.append(make_email('d', 5.0))
+    assert drain(syncer) == ['d']
+
+
+def test_out_of_order_timestamps_are_delivered_once(server, make_email, honour_after):
+  server.emails.extend([make_email('a', 3.0), make_email('b', 1.0), make_email('c', 2.0)])
+  with Sync('token', base_url=server.url) as client:
+    syncer = InboxSyncer(client)
+    assert drain(syncer) == ['a', 'b', 'c']
+    assert syncer.store.get('alias').email_id == 'a'
+
+
+def test_missing_timestamps_are_delivered_once(server, make_email, honour_after):
+  server.emails.extend([make_email('a', None), make_email('b', None)])
+  with Sync('token', base_url=server.url) as client:
+    syncer = InboxSyncer(client)
+    assert drain(syncer) == ['a', 'b']
+    server.emails.extend([make_email('c', 4.0), make_email('d', None)])
+    assert drain(syncer) == ['c', 'd']
+
+
+def test_older_email_is_not_redelivered_after_restart(server, make_email, tmp_path):
+  server.honour_after = False
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  path = tmp_path / 'cursors.sqlite'
+  with Sync('token', base_url=server.url) as client:
+    assert drain(InboxSyncer(client, SQLiteCursorStore(path))) == ['a', 'b']
+    server.emails.append(make_email('c', 2.0))
+    assert drain(InboxSyncer(client, SQLiteCursorStore(path))) == ['c']
+
+
+def test_seen_ids_survive_json_store(server, make_email, tmp_path):
+  server.honour_after = False
+  server.emails.extend([make_email('a', None), make_email('b', None)])
+  path = tmp_path / 'cursors.json'
+  with Sync('token', base_url=server.url) as client:
+    assert drain(InboxSyncer(client, JSONCursorStore(path))) == ['a', 'b']
+    assert drain(InboxSyncer(client, JSONCursorStore(path))) == []
+
+
+def test_seen_limit_bounds_remembered_ids(server, make_email):
+  server.emails.extend(make_email(f'{i:02d}', 1.0) for i in range(10))
+  with Sync('token', base_url=server.url) as client:
+    syncer = InboxSyncer(client, seen_limit=4)
+    syncer.sync('alias')
+  assert syncer.store.get('alias').seen == ('06', '07', '08', '09')
+
+
+def test_async_syncer_tied_and_missing_timestamps(server, make_email, honour_after):
+  server.emails.extend([make_email('a', 5.0), make_email('b', 5.0), make_email('n', None)])
+
+  async def main():
+    async with Async('token', base_url=server.url) as client:
+      syncer = AsyncInboxSyncer(client)
+      ids = [email.id for _ in range(3) for email in await syncer.sync('alias')]
+      server.emails.append(make_email('c', 5.0))
+      return ids + [email.id for _ in range(3) for email in await syncer.sync('alias')]
+
+  assert asyncio.run(main()) == ['a', 'b', 'n', 'c']
+
+
+def test_json_store_flushes_while_other_threads_set(tmp_path):
+  path = tmp_path / 'cursors.json'
+  store = JSONCursorStore(path, autoflush=False)
+  errors = []
+
+  def write(worker: int) -> None:
+    for i in range(2000):
+      store.set(f'{worker}-{i}', f'id-{i}', float(i), [f'id-{i}'])
+      if worker == 0 and i % 50 == 0:
+        store.delete(f'{worker}-{i}')
+
+  def flush() -> None:
+    try:
+      while any(thread.is_alive() for thread in writers):
+        store.flush()
+    except RuntimeError as e:
+      errors.append(e)
+
+  writers = [threading.Thread(target=write, args=(worker,)) for worker in range(3)]
+  flusher = threading.Thread(target=flush)
+  for thread in writers:
+    thread.start()
+  flusher.start()
+  for thread in writers + [flusher]:
+    thread.join()
+  store.close()
+  assert not errors
+  reopened = JSONCursorStore(path)
+  assert reopened.get('2-1999') == Cursor('id-1999', 1999.0, ('id-1999',))
+  assert reopened.get('0-50') is None
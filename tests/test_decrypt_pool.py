@@ -0,0 +1,51 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from reusable.email import Async, DecryptionPool, generate_keys
+
+
+def test_decrypts_in_order_on_worker_processes(keys, encrypt, make_email):
+  async def main():
+    with DecryptionPool(keys[1], workers=1, max_pending=2) as pool:
+      return await pool.decrypt_many([encrypt(make_email(str(n))) for n in range(5)])
+
+  assert [email.id for email in asyncio.run(main())] == ['0', '1', '2', '3', '4']
+
+
+def test_bad_payload_decrypts_to_none(keys, encrypt, make_email):
+  async def main():
+    with ThreadPoolExecutor(2) as executor, DecryptionPool(keys[1], executor=executor) as pool:
+      return await pool.decrypt_many([encrypt(make_email('a')), {'encrypted_aes_key': 'bad'}])
+
+  emails = asyncio.run(main())
+  assert emails[0].id == 'a' and emails[1] is None
+
+
+def test_closed_pool_refuses_work(keys, encrypt, make_email):
+  pool = DecryptionPool(keys[1], executor=ThreadPoolExecutor(1))
+  pool.close()
+  with pytest.raises(RuntimeError):
+    asyncio.run(pool.decrypt(encrypt(make_email('a'))))
+
+
+def test_client_takes_the_key_from_the_pool(server, keys, make_email):
+  server.emails.append(make_email('a', subject='Secret'))
+
+  async def main():
+    with ThreadPoolExecutor(2) as executor, DecryptionPool(keys[1], executor=executor) as pool:
+      async with Async('token', base_url=server.url, decryption_pool=pool) as client:
+        inbox = await client.view_encrypted_inbox('alias')
+      # A shared pool outlives the clients using it
+      assert not pool.closed
+      return inbox
+
+  assert [email.subject for email in asyncio.run(main())] == ['Secret']
+
+
+def test_client_rejects_a_pool_with_another_key(keys):
+  with DecryptionPool(generate_keys()[1], executor=ThreadPoolExecutor(1)) as pool:
+    with pytest.raises(ValueError):
+      Async('token', keys[1], decryption_pool=pool)
+    Async('token', pool.pem, decryption_pool=pool)
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from reusable.email import Async, EmailCache, Sync
+from reusable.email.errors import NotFound
+
+
+def test_delete_emails_reports_each_id(server, make_email):
+  server.emails.extend(make_email(f'{i:02d}') for i in range(5))
+  with Sync('token', base_url=server.url) as client:
+    report = client.delete_emails('alias', ['00', '02', 'missing', '04'], concurrency=3)
+  assert sorted(report.deleted) == ['00', '02', '04']
+  assert list(report.failed) == ['missing']
+  assert isinstance(report.failed['missing'], NotFound)
+  assert not report.ok
+  assert [email['id'] for email in server.emails] == ['01', '03']
+
+
+def test_purge_inbox_deletes_everything(server, make_email):
+  server.emails.extend(make_email(f'{i:02d}') for i in range(8))
+
+  async def main():
+    async with Async('token', base_url=server.url) as client:
+      return await client.purge_inbox('alias', concurrency=4)
+
+  report = asyncio.run(main())
+  assert report.ok and sorted(report.deleted) == [f'{i:02d}' for i in range(8)]
+  assert server.emails == []
+
+
+def test_purge_encrypted_inbox(server, keys, make_email):
+  server.emails.extend(make_email(f'{i:02d}') for i in range(3))
+  with Sync('token', keys[1], base_url=server.url) as client:
+    report = client.purge_inbox('alias', encrypted=True)
+  assert sorted(report.deleted) == ['00', '01', '02']
+  assert server.emails == []
+
+
+def test_purge_encrypted_inbox_requires_a_key(server):
+  with Sync('token', base_url=server.url) as client:
+    with pytest.raises(ValueError):
+      client.purge_inbox('alias', encrypted=True)
+  assert server.requests == []
+
+
+def test_deletes_drop_cached_bodies(server, make_email):
+  server.emails.extend([make_email('a'), make_email('b')])
+  cache = EmailCache()
+  with Sync('token', base_url=server.url, cache=cache) as client:
+    client.fetch_email_body('alias', 'a')
+    client.fetch_email_body('alias', 'b')
+    client.delete_emails('alias', ['a'])
+  assert cache.get('alias', 'a') is None
+  assert cache.get('alias', 'b') == 'Body of b'
@@ -0,0 +1,85 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import pytest
+
+from reusable.email import Extractor, Rule
+from reusable.email.extract import extract, strip_html
+from reusable.email.types import Email
+
+
+def email(body: str, subject: str = 'Hello', sender: str = 'noreply@example.com', email_id: Optional[str] = None) -> Email:
+  # Results are memoized by id, so each body gets its own by default
+  return Email(email_id or body, subject, sender, 1.0, body)
+
+
+@pytest.mark.parametrize('body, code', [
+  ('Your verification code is 482913.', '482913'),
+  ('Your code: 123-456', '123-456'),
+  ('Use OTP 4821 to sign in', '4821'),
+  ('Security code: AB12CD', 'AB12CD'),
+  ('<p>Your code is <b>777123</b></p>', '777123'),
+  ('Order #123456 shipped, total $100.50', None),
+  ('Version 1.123456 released', None),
+])
+def test_codes(body, code):
+  assert extract(email(body)).code == code
+
+
+def test_links_survive_html_and_confirmation_links_win():
+  body = (
+    '<a href="https://example.com/verify?token=abc">Confirm</a> or visit https://example.com/help.'
+    ' <a href="https://example.com/about">https://example.com/about</a>'
+  )
+  result = extract(email(body))
+  assert result.link == 'https://example.com/verify?token=abc'
+  assert result.links == ['https://example.com/verify?token=abc', 'https://example.com/help', 'https://example.com/about']
+  assert [m.rule for m in result.matches] == ['confirmation_link', 'link', 'link']
+
+
+def test_strip_html():
+  assert strip_html('plain &amp; simple') == 'plain & simple'
+  assert strip_html('<style>p { color: red }</style><p>Hi&nbsp;there</p>').split() == ['Hi', 'there']
+
+
+def test_subject_is_scanned_before_the_body():
+  assert extract(email('Or use 222222', subject='Code 111111', email_id='subject')).codes == ['111111', '222222']
+
+
+def test_sender_rules():
+  extractor = Extractor([Rule('ticket', r'TICKET-(?P<value>\d+)', 'code', sender=r'@support\.example\.com$')])
+  assert extractor.extract(email('TICKET-42', sender='help@support.example.com', email_id='a')).code == '42'
+  assert extractor.extract(email('TICKET-42', sender='someone@example.com', email_id='b')).code is None
+
+
+def test_results_are_memoized_by_id():
+  extractor = Extractor(cache_size=1)
+  first = extractor.extract(email('code 123456', email_id='a'))
+  assert extractor.extract(email('code 654321', email_id='a')) is first
+  extractor.extract(email('code 111111', email_id='b'))
+  assert extractor.extract(email('code 654321', email_id='a')).code == '654321'
+  extractor.clear()
+  assert not extractor.cache
+
+
+@pytest.mark.parametrize('executor_type', [None, ThreadPoolExecutor, ProcessPoolExecutor])
+def test_extract_many_keeps_order_and_skips_failed_emails(executor_type):
+  emails = [email(f'Your code is {n:06d}', email_id=str(n)) for n in range(20)]
+  emails.insert(3, None)
+  extractor = Extractor()
+  extractor.extract(emails[0])
+  if executor_type is None:
+    results = extractor.extract_many(emails)
+  else:
+    with executor_type(2) as executor:
+      results = extractor.extract_many(emails, executor)
+  assert [result.code for result in results] == [f'{n:06d}' for n in range(20)]
+  assert len(extractor.cache) == 20
+
+
+def test_iter_extract_is_lazy():
+  def emails():
+    yield email('code 123456')
+    raise AssertionError('read past the first email')
+
+  assert next(Extractor().iter_extract(emails())).code == '123456'
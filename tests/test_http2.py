@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+h2 = pytest.importorskip('h2')
+pytest.importorskip('httpx')
+
+import h2.config
+import h2.connection
+import h2.events
+
+from reusable.email import Async
+
+
+class H2CServer(asyncio.Protocol):
+  """Cleartext HTTP/2 server answering every request with an empty inbox."""
+
+  connections = 0
+  streams = 0
+
+  def connection_made(self, transport) -> None:
+    H2CServer.connections += 1
+    self.transport = transport
+    self.connection = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+    self.connection.initiate_connection()
+    transport.write(self.connection.data_to_send())
+
+  def data_received(self, data: bytes) -> None:
+    for event in self.connection.receive_data(data):
+      if isinstance(event, h2.events.RequestReceived):
+        H2CServer.streams += 1
+        body = json.dumps({'alias': 'alias', 'inbox': [{'id': f'stream-{event.stream_id}'}]}).encode('utf-8')
+        self.connection.send_headers(event.stream_id, [
+          (':status', '200'), ('content-type', 'application/json'), ('content-length', str(len(body))),
+        ])
+        self.connection.send_data(event.stream_id, body, end_stream=True)
+    self.transport.write(self.connection.data_to_send())
+
+
+def test_cleartext_url_speaks_http2_with_a_warning():
+  H2CServer.connections = H2CServer.streams = 0
+
+  async def main():
+    server = await asyncio.get_running_loop().create_server(H2CServer, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+      async with Async('token', base_url=f'http://127.0.0.1:{port}/v1', http2=True) as client:
+        response = await client.request(client.routes.inbox, params={'alias': 'alias'})
+        inboxes = await asyncio.gather(*(client.view_inbox('alias') for _ in range(5)))
+      return response, inboxes
+    finally:
+      server.close()
+
+  with pytest.warns(RuntimeWarning, match='prior knowledge'):
+    response, inboxes = asyncio.run(main())
+  assert response.raw.http_version == 'HTTP/2'
+  assert all(len(inbox) == 1 for inbox in inboxes)
+  # Every request was a stream on one connection
+  assert (H2CServer.connections, H2CServer.streams) == (1, 6)
+
+
+def test_https_url_negotiates_without_warning(recwarn):
+  client = Async('token', base_url='https://127.0.0.1:1/v1', http2=True)
+
+  async def main():
+    await client.generate_session()
+    await client.close()
+
+  asyncio.run(main())
+  assert not [warning for warning in recwarn if issubclass(warning.category, RuntimeWarning)]
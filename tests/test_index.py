@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from reusable.email import Async, InboxIndex, Sync
+from reusable.email.types import Email
+
+
+def email(email_id: str, timestamp: float, sender: str = 'a@example.com', subject: str = 'Hello') -> Email:
+  return Email(email_id, subject, sender, timestamp, '')
+
+
+def test_find_by_alias_sender_subject_and_time():
+  index = InboxIndex()
+  index.add('one', [
+    email('a', 1.0, subject='Your login code'), email('b', 2.0, 'B@Example.com', 'Welcome'),
+    email('c', 3.0, subject='Password reset'),
+  ])
+  index.add('two', [email('d', 4.0, 'b@example.com', 'Your CODE')])
+  ids = lambda emails: [e.id for e in emails]
+  assert ids(index.find()) == ['a', 'b', 'c', 'd']
+  assert ids(index.find(alias='ONE')) == ['a', 'b', 'c']
+  assert ids(index.find(sender='b@example.com')) == ['b', 'd']
+  assert ids(index.find(subject_contains='code')) == ['a', 'd']
+  assert ids(index.find(subject_contains='pa', alias='one')) == ['c']
+  assert ids(index.find(since=2.0, until=4.0)) == ['b', 'c']
+  assert ids(index.find(sender='a@example.com', since=2.0)) == ['c']
+  assert ids(index.find(newest_first=True, limit=2)) == ['d', 'c']
+  # Trigrams present, but not contiguous
+  assert index.find(subject_contains='your reset') == []
+
+
+def test_skips_duplicates_and_failed_emails():
+  index = InboxIndex()
+  assert index.add('alias', [email('a', 1.0), None, email('a', 1.0)]) == 1
+  assert index.add('ALIAS', [email('a', 1.0)]) == 0
+  assert index.add('other', [email('a', 1.0)]) == 1
+  assert len(index) == 2 and ('Alias', 'a') in index
+
+
+def test_evicts_oldest_first():
+  index = InboxIndex(maxsize=2)
+  index.add('alias', [email('b', 2.0), email('a', 1.0), email('c', 3.0)])
+  assert [e.id for e in index.find()] == ['b', 'c']
+  assert ('alias', 'a') not in index
+
+
+def test_evicts_by_age():
+  index = InboxIndex(max_age=60)
+  index.add('alias', [email('old', time.time() - 120), email('new', time.time())])
+  assert [e.id for e in index.find()] == ['new']
+
+
+def test_remove_and_remove_alias():
+  index = InboxIndex()
+  index.add('one', [email('a', 1.0, subject='Code'), email('b', 2.0)])
+  index.add('two', [email('c', 3.0)])
+  assert index.remove('ONE', 'a')
+  assert not index.remove('one', 'a')
+  assert index.get('one', 'a') is None
+  assert index.find(subject_contains='code') == []
+  assert index.remove_alias('two') == 1
+  assert [e.id for e in index.find()] == ['b']
+
+
+def test_clients_index_fetched_and_drop_deleted_emails(server, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  index = InboxIndex()
+  with Sync('token', base_url=server.url, index=index) as client:
+    client.view_inbox('alias')
+    assert ('alias', 'a') in index and ('alias', 'b') in index
+    client.delete_email('alias', 'a')
+  assert ('alias', 'a') not in index
+
+  async def main():
+    async with Async('token', base_url=server.url, index=index) as client:
+      await client.delete_email('alias', 'b')
+
+  asyncio.run(main())
+  assert len(index) == 0
@@ -0,0 +1,46 @@
+import asyncio
+
+from reusable.email import Async, Sync
+
+
+def aiter_ids(server, alias: str = 'alias', **kwargs) -> list:
+  async def main():
+    async with Async('token', base_url=server.url) as client:
+      return [email.id async for email in client.aiter_inbox(alias, **kwargs)]
+  return asyncio.run(main())
+
+
+def test_iter_inbox_yields_each_email_once_when_after_is_ignored(server, make_email):
+  server.honour_after = False
+  server.emails.extend(make_email(f'{i:02d}', 1.0 + i) for i in range(5))
+  with Sync('token', base_url=server.url) as client:
+    ids = [email.id for email in client.iter_inbox('alias')]
+  assert ids == ['00', '01', '02', '03', '04']
+  assert len(server.requests) == 2
+
+
+def test_aiter_inbox_yields_each_email_once_when_after_is_ignored(server, make_email):
+  server.honour_after = False
+  server.emails.extend([make_email('a', 1.0), make_email('b', None), make_email('c', 2.0)])
+  assert aiter_ids(server) == ['a', 'b', 'c']
+  assert len(server.requests) == 2
+
+
+def test_iter_inbox_cursor_is_newest_by_timestamp(server, make_email):
+  server.emails.extend([make_email('a', 3.0), make_email('b', 1.0)])
+  with Sync('token', base_url=server.url) as client:
+    assert [email.id for email in client.iter_inbox('alias')] == ['a', 'b']
+  assert [request.get('after') for request in server.requests] == [None, 'a']
+
+
+def test_iter_inbox_starts_after_cursor(server, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0), make_email('c', 3.0)])
+  assert aiter_ids(server, after='a') == ['b', 'c']
+  assert server.requests[0]['after'] == 'a'
+
+
+def test_iter_inbox_stops_early(server, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  with Sync('token', base_url=server.url) as client:
+    assert next(iter(client.iter_inbox('alias'))).id == 'a'
+  assert len(server.requests) == 1
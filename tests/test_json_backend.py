@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from reusable.email import json_backend
+from reusable.email.core import Utils
+from reusable.email.types import Email
+
+DOCUMENT = {'subject': 'Café ✓ 😀', 'n': [1, 2.5, None, True], 'nested': {'body': '<p>"quoted"</p>\n'}}
+
+
+@pytest.fixture(params=['json', 'orjson', 'msgspec'])
+def backend(request):
+  default = json_backend.name
+  try:
+    json_backend.set_backend(request.param)
+  except ImportError:
+    pytest.skip(f"{request.param} is not installed")
+  yield request.param
+  json_backend.set_backend(default)
+
+
+def test_loads_every_buffer_type(backend):
+  text = json.dumps(DOCUMENT)
+  data = text.encode('utf-8')
+  for value in (text, data, bytearray(data), memoryview(data)):
+    assert json_backend.loads(value) == DOCUMENT
+
+
+@pytest.mark.parametrize('data', [b'{bad', b'', '{"a": 1', b'\xff'])
+def test_malformed_input_raises_json_decode_error(backend, data):
+  with pytest.raises(json.JSONDecodeError):
+    json_backend.loads(data)
+
+
+def test_dumps_matches_the_standard_library(backend):
+  expected = json.dumps(DOCUMENT, separators=(",", ":"), ensure_ascii=True)
+  assert json_backend.dumps(DOCUMENT) == expected
+  assert Utils.to_json(DOCUMENT) == expected
+
+
+def test_dumps_can_keep_non_ascii(backend):
+  assert json_backend.dumps({'s': 'Café 😀'}, ensure_ascii=False) == '{"s":"Café 😀"}'
+
+
+def test_email_round_trip(backend):
+  email = Email('id', 'Grüße', 'a@example.com', 1734448240.5, 'Body ✓')
+  copy = Email.from_json(Email.to_json(email).encode('utf-8'))
+  assert (copy.id, copy.subject, copy.sender, copy.timestamp, copy.body) == ('id', 'Grüße', 'a@example.com', 1734448240.5, 'Body ✓')
+
+
+def test_unknown_backend():
+  with pytest.raises(ValueError):
+    json_backend.set_backend('yaml')
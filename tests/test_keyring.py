@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+import pytest
+
+from reusable.email import Async, KeyRing
+from reusable.email.keyring import public_key_fingerprint
+
+
+@pytest.fixture
+def key_dir(tmp_path, keys):
+  keys_path = tmp_path / 'keys'
+  keys_path.mkdir()
+  (keys_path / 'ALIAS.pem').write_bytes(keys[1])
+  (keys_path / 'ALIAS.pub').write_bytes(keys[0])
+  # A key next to the directory, reachable only through a path traversal
+  (tmp_path / 'x.pem').write_bytes(keys[1])
+  return keys_path
+
+
+def test_loads_keys_by_alias_and_fingerprint(key_dir, keys):
+  keyring = KeyRing(key_dir)
+  assert keyring.get('alias') is keyring.get('ALIAS') is not None
+  assert KeyRing(key_dir).get(public_key_fingerprint(keys[0])) is not None
+  assert 'alias' in keyring and 'other' not in keyring
+
+
+@pytest.mark.parametrize('alias', ['../x', '..', '.', '', 'a\0b', 'keys/../../x'])
+def test_aliases_that_are_not_file_names_have_no_key(key_dir, alias):
+  keyring = KeyRing(key_dir)
+  assert keyring.get(alias) is None
+  assert alias not in keyring
+
+
+def test_evicts_least_recently_used(keys):
+  keyring = KeyRing({'a': keys[1], 'b': keys[1]}, maxsize=1)
+  first = keyring.get('a')
+  keyring.get('b')
+  assert list(keyring.parsed) == ['B']
+  assert keyring.get('a') is not first
+
+
+def test_misses_are_cached_until_the_ttl(key_dir, keys, monkeypatch):
+  keyring = KeyRing(key_dir, miss_ttl=60)
+  assert keyring.get('new') is None
+  (key_dir / 'NEW.pem').write_bytes(keys[1])
+  calls = []
+  monkeypatch.setattr(keyring, '_path', lambda alias: calls.append(alias))
+  assert keyring.get('new') is None
+  assert calls == []
+  # add() replaces a cached miss straight away
+  keyring.add('new', keys[1])
+  assert keyring.get('new') is not None
+
+
+def test_expired_misses_are_looked_up_again(key_dir, keys):
+  keyring = KeyRing(key_dir, miss_ttl=0)
+  assert keyring.get('new') is None
+  (key_dir / 'NEW.pem').write_bytes(keys[1])
+  assert keyring.get('new') is not None
+
+
+def test_concurrent_lookups_parse_once(key_dir, monkeypatch):
+  from reusable.email import crypto
+  parsed = []
+  decryptor = crypto.Decryptor
+
+  def counting(pem):
+    parsed.append(pem)
+    return decryptor(pem)
+
+  monkeypatch.setattr(crypto, 'Decryptor', counting)
+  keyring = KeyRing(key_dir)
+  barrier = threading.Barrier(8)
+  results = []
+
+  def look_up():
+    barrier.wait()
+    results.append(keyring.get('alias'))
+
+  threads = [threading.Thread(target=look_up) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert len(parsed) == 1
+  assert len(set(map(id, results))) == 1
+
+
+def test_async_client_decrypts_with_the_alias_key(server, key_dir, make_email):
+  server.emails.append(make_email('a', subject='Secret'))
+
+  async def main():
+    async with Async('token', base_url=server.url, keyring=KeyRing(key_dir)) as client:
+      return await client.view_encrypted_inbox('alias')
+
+  assert [email.subject for email in asyncio.run(main())] == ['Secret']
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from reusable.email.cursors import SQLiteCursorStore
+from reusable.email.poller import HashRing, JSONLSink, Poller, SQLiteSink, _Shard, open_sink
+from reusable.email.types import Email
+
+ALIASES = [f'alias{n}' for n in range(1000)]
+
+
+def test_hash_ring_is_stable_and_case_insensitive():
+  ring = HashRing(4)
+  assert [ring.shard_for(alias) for alias in ALIASES] == [HashRing(4).shard_for(alias.upper()) for alias in ALIASES]
+  assert set(ring.shard_for(alias) for alias in ALIASES) == {0, 1, 2, 3}
+
+
+def test_hash_ring_moves_few_aliases_on_resize():
+  before, after = HashRing(4), HashRing(5)
+  moved = sum(before.shard_for(alias) != after.shard_for(alias) for alias in ALIASES)
+  # A fifth shard should take about a fifth of the aliases, all of them from the other shards
+  assert moved < len(ALIASES) * 0.35
+  assert all(after.shard_for(alias) == 4 for alias in ALIASES if before.shard_for(alias) != after.shard_for(alias))
+
+
+@pytest.mark.parametrize('spec', ['jsonl', 'jsonl:', 'csv:out.csv'])
+def test_open_sink_rejects_bad_specs(spec):
+  with pytest.raises(ValueError):
+    open_sink(spec)
+
+
+def test_file_sinks(tmp_path):
+  emails = [Email('a', 'Subject ✓', 'a@example.com', 1.0, 'Body'), Email('b', 'Other', 'b@example.com', 2.0, '')]
+  sink = JSONLSink(str(tmp_path / 'out.jsonl'))
+  sink.write('alias', emails)
+  sink.close()
+  lines = [json.loads(line) for line in (tmp_path / 'out.jsonl').read_text('utf-8').splitlines()]
+  assert [(line['alias'], line['id'], line['subject']) for line in lines] == [('alias', 'a', 'Subject ✓'), ('alias', 'b', 'Other')]
+  sink = SQLiteSink(str(tmp_path / 'out.db'))
+  sink.write('alias', emails)
+  sink.write('alias', emails)
+  sink.close()
+  assert sqlite3.connect(tmp_path / 'out.db').execute("SELECT COUNT(*) FROM emails").fetchone() == (2,)
+
+
+def test_cursor_store_is_shared_in_wal_mode(tmp_path):
+  path = tmp_path / 'cursors.db'
+  first, second = SQLiteCursorStore(path), SQLiteCursorStore(path, timeout=1)
+  assert first.connection.execute("PRAGMA journal_mode").fetchone() == ('wal',)
+  first.set('alias', 'a', 1.0, ['a'])
+  assert second.get('alias') == ('a', 1.0, ('a',))
+  first.close()
+  second.close()
+
+
+def options(server, tmp_path, output: str) -> dict:
+  return {
+    'authorization': 'token', 'output': output, 'private_key': None, 'keyring': None, 'encrypted': False,
+    'cursors': str(tmp_path / 'cursors.db'), 'base_url': server.url, 'concurrency': 10, 'min_interval': 0.05,
+    'max_interval': 0.1, 'skip_existing': False, 'stats_interval': 0.2,
+  }
+
+
+def run_shard(shard_options: dict, aliases, seconds: float) -> list:
+  control, reports = queue.Queue(), queue.Queue()
+  timer = threading.Timer(seconds, control.put, (('stop', []),))
+  timer.start()
+  asyncio.run(_Shard(0, shard_options, control, reports).run(aliases))
+  return list(reports.queue)
+
+
+def test_shard_writes_new_emails_once(server, tmp_path, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  output = tmp_path / 'out.db'
+  reports = run_shard(options(server, tmp_path, f'sqlite:{output}'), ['one', 'two'], 0.6)
+  rows = sqlite3.connect(output).execute("SELECT alias, id FROM emails ORDER BY alias, id").fetchall()
+  assert rows == [('one', 'a'), ('one', 'b'), ('two', 'a'), ('two', 'b')]
+  assert sum(report.emails for report in reports) == 4
+  assert SQLiteCursorStore(tmp_path / 'cursors.db').get('one').email_id == 'b'
+
+
+def test_shard_puts_the_cursor_back_when_the_sink_fails(server, tmp_path, make_email):
+  server.emails.append(make_email('a', 1.0))
+  # Nothing listens on the socket, so every write fails
+  reports = run_shard(options(server, tmp_path, f'unix:{tmp_path / "missing.sock"}'), ['one'], 0.4)
+  assert sum(report.errors for report in reports) > 0
+  assert SQLiteCursorStore(tmp_path / 'cursors.db').get('one') is None
+
+
+def test_poller_workers_share_the_cursor_database(server, tmp_path, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  output = tmp_path / 'out.jsonl'
+  with Poller(
+    'token', f'jsonl:{output}', 2, base_url=server.url, cursors=str(tmp_path / 'cursors.db'),
+    min_interval=0.05, max_interval=0.1
+  ) as poller:
+    poller.start([f'alias{n}' for n in range(6)])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and (not output.exists() or len(output.read_text().splitlines()) < 12):
+      time.sleep(0.1)
+  lines = [json.loads(line) for line in output.read_text().splitlines()]
+  assert sorted((line['alias'], line['id']) for line in lines) == sorted(
+    (f'ALIAS{n}', email_id) for n in range(6) for email_id in ('a', 'b')
+  )
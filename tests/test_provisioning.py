@@ -0,0 +1,29 @@
+from reusable.email import KeyPool, KeyRing, Sync
+from reusable.email.crypto import generate_key_pairs
+from reusable.email.keyring import public_key_fingerprint
+
+KEY_SIZE = 1024
+
+
+def test_generate_key_pairs_on_spawned_workers():
+  pairs = generate_key_pairs(3, key_size=KEY_SIZE)
+  assert len(pairs) == 3
+  assert len({public_key for public_key, _ in pairs}) == 3
+  assert generate_key_pairs(0) == []
+
+
+def test_key_pool_fills_in_the_background():
+  with KeyPool(size=2, workers=1, key_size=KEY_SIZE) as pool:
+    pairs = pool.take(3, timeout=60)
+  assert len({public_key for public_key, _ in pairs}) == 3
+
+
+def test_provision_registers_inboxes_and_fills_the_keyring(server):
+  keyring = KeyRing()
+  with KeyPool(size=2, workers=1, key_size=KEY_SIZE) as pool:
+    with Sync('token', base_url=server.url, keyring=keyring) as client:
+      provisioned = client.provision_encrypted_inboxes(['one', 'two'], key_pool=pool)
+  assert sorted(provisioned) == sorted(server.inboxes) == ['ONE', 'TWO']
+  for alias, (public_key, private_key) in provisioned.items():
+    assert server.inboxes[alias] == public_key.decode('utf-8')
+    assert keyring.get(public_key_fingerprint(public_key)) is keyring.get(alias)
@@ -0,0 +1,78 @@
+import asyncio
+import email.utils
+import time
+
+import pytest
+
+from reusable.email import Async, RetryPolicy, Sync
+from reusable.email.errors import FetchFail, RateLimited
+from reusable.email.retry import parse_retry_after
+
+FAST = RetryPolicy(total=2, backoff_initial=0.01, backoff_max=0.02)
+
+
+def test_no_retries_by_default(server, make_email):
+  server.emails.append(make_email('a'))
+  server.failures.append((503, {}))
+  with Sync('token', base_url=server.url) as client:
+    with pytest.raises(FetchFail):
+      client.view_inbox('alias')
+  assert len(server.requests) == 1
+
+
+def test_retries_until_success(server, make_email):
+  server.emails.append(make_email('a'))
+  server.failures.extend([(503, {}), (502, {})])
+  with Sync('token', base_url=server.url, retry=FAST) as client:
+    assert [email.id for email in client.view_inbox('alias')] == ['a']
+  assert len(server.requests) == 3
+
+
+def test_gives_up_after_total_retries(server):
+  server.failures.extend([(503, {})] * 3)
+  with Sync('token', base_url=server.url, retry=FAST) as client:
+    with pytest.raises(FetchFail):
+      client.view_inbox('alias')
+  assert len(server.requests) == 3
+
+
+def test_honours_retry_after(server, make_email):
+  server.emails.append(make_email('a'))
+  server.failures.append((429, {'Retry-After': '0.5'}))
+  start = time.monotonic()
+  with Sync('token', base_url=server.url, retry=FAST) as client:
+    assert len(client.view_inbox('alias')) == 1
+  # Well past the 0.02 s backoff, so the header set the wait
+  assert time.monotonic() - start >= 0.5
+
+
+def test_retry_after_beyond_limit_raises(server):
+  server.failures.append((429, {'Retry-After': '120'}))
+  with Sync('token', base_url=server.url, retry=RetryPolicy(max_retry_after=60)) as client:
+    with pytest.raises(RateLimited) as info:
+      client.view_inbox('alias')
+  assert info.value.retry_after == 120
+  assert len(server.requests) == 1
+
+
+def test_async_honours_retry_after(server, make_email):
+  server.emails.append(make_email('a'))
+  server.failures.extend([(503, {'Retry-After': '0.3'}), (503, {})])
+
+  async def main():
+    async with Async('token', base_url=server.url, retry=FAST) as client:
+      return await client.view_inbox('alias')
+
+  start = time.monotonic()
+  assert len(asyncio.run(main())) == 1
+  assert time.monotonic() - start >= 0.3
+  assert len(server.requests) == 3
+
+
+def test_parse_retry_after():
+  assert parse_retry_after('2') == 2.0
+  assert parse_retry_after('-1') == 0.0
+  assert parse_retry_after(None) is None
+  assert parse_retry_after('soon') is None
+  assert parse_retry_after(email.utils.formatdate(0, usegmt=True)) == 0.0
+  assert 25 < parse_retry_after(email.utils.formatdate(time.time() + 30, usegmt=True)) <= 30
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from reusable.email import Async, Sync
+from reusable.email.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_async_identical_fetches_share_one_request(server, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  server.delay = 0.2
+
+  async def main():
+    async with Async('token', base_url=server.url, coalesce=True) as client:
+      return await asyncio.gather(*(client.view_inbox('alias') for _ in range(5)))
+
+  inboxes = asyncio.run(main())
+  assert len(server.requests) == 1
+  assert all([email.id for email in inbox] == ['a', 'b'] for inbox in inboxes)
+  # Callers get their own lists, so one mutating its result does not affect the others
+  assert len({id(inbox) for inbox in inboxes}) == 5
+
+
+def test_async_different_fetches_are_not_shared(server):
+  server.delay = 0.1
+
+  async def main():
+    async with Async('token', base_url=server.url, coalesce=True) as client:
+      await asyncio.gather(client.view_inbox('one'), client.view_inbox('two'), client.view_inbox('one', after='x'))
+
+  asyncio.run(main())
+  assert len(server.requests) == 3
+
+
+def test_async_fetches_are_not_shared_without_coalesce(server):
+  server.delay = 0.1
+
+  async def main():
+    async with Async('token', base_url=server.url) as client:
+      await asyncio.gather(*(client.view_inbox('alias') for _ in range(3)))
+
+  asyncio.run(main())
+  assert len(server.requests) == 3
+
+
+def test_sync_identical_fetches_share_one_request(server, make_email):
+  server.emails.append(make_email('a'))
+  server.delay = 0.3
+  barrier = threading.Barrier(4)
+
+  def fetch(client):
+    barrier.wait()
+    return client.view_inbox('alias')
+
+  with Sync('token', base_url=server.url, coalesce=True) as client, ThreadPoolExecutor(4) as executor:
+    inboxes = list(executor.map(fetch, [client] * 4))
+  assert len(server.requests) == 1
+  assert all([email.id for email in inbox] == ['a'] for inbox in inboxes)
+
+
+def test_shared_failure_reaches_every_caller():
+  flights = AsyncSingleFlight()
+  calls = 0
+
+  async def fail():
+    nonlocal calls
+    calls += 1
+    await asyncio.sleep(0.05)
+    raise ValueError('boom')
+
+  async def main():
+    return await asyncio.gather(*(flights.do('key', fail) for _ in range(3)), return_exceptions=True)
+
+  results = asyncio.run(main())
+  assert calls == 1
+  assert all(isinstance(result, ValueError) for result in results)
+  assert not flights.calls
+
+
+def test_sync_flight_runs_again_once_finished():
+  flights = SingleFlight()
+  assert flights.do('key', lambda: 1) == (1, False)
+  assert flights.do('key', lambda: 2) == (2, False)
+  with pytest.raises(ValueError):
+    flights.do('key', lambda: int('x'))
+  assert not flights.calls
+
+
+def test_sync_first_caller_mutating_its_list_does_not_affect_the_others(server, make_email):
+  server.emails.extend([make_email('a'), make_email('b')])
+  server.delay = 0.3
+  def first(client):
+    inbox = client.view_inbox('alias')
+    inbox.clear()
+    return inbox
+
+  with Sync('token', base_url=server.url, coalesce=True) as client, ThreadPoolExecutor(4) as executor:
+    futures = [executor.submit(first, client)]
+    futures += [executor.submit(lambda: [email.id for email in client.view_inbox('alias')]) for _ in range(3)]
+    results = [future.result() for future in futures]
+  assert len(server.requests) == 1
+  assert results == [[], ['a', 'b'], ['a', 'b'], ['a', 'b']]
+
+
+def test_async_first_caller_mutating_its_list_does_not_affect_the_others(server, make_email):
+  server.emails.extend([make_email('a'), make_email('b')])
+  server.delay = 0.2
+
+  async def main():
+    async with Async('token', base_url=server.url, coalesce=True) as client:
+      async def first():
+        inbox = await client.view_inbox('alias')
+        inbox.clear()
+        # Let the waiters run only after the mutation
+        await asyncio.sleep(0)
+        return inbox
+
+      async def other():
+        return [email.id for email in await client.view_inbox('alias')]
+
+      return await asyncio.gather(first(), other(), other())
+
+  assert asyncio.run(main()) == [[], ['a', 'b'], ['a', 'b']]
+  assert len(server.requests) == 1
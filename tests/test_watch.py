@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from reusable.email import Async, Sync
+
+FAST = {'min_interval': 0.05, 'max_interval': 0.1}
+
+
+def arrive_later(server, email: dict, delay: float = 0.3) -> None:
+  timer = threading.Timer(delay, server.emails.append, (email,))
+  timer.daemon = True
+  timer.start()
+
+
+def test_wait_for_returns_new_arrival(server, make_email):
+  server.emails.append(make_email('old', 1.0, subject='Your code is 111111'))
+  arrive_later(server, make_email('new', 2.0, subject='Your code is 222222'))
+  with Sync('token', base_url=server.url) as client:
+    email = client.wait_for('alias', lambda email: 'code' in email.subject, timeout=5, skip_existing=True, **FAST)
+  assert email.id == 'new'
+
+
+def test_wait_for_predicate_skips_other_emails(server, make_email):
+  server.emails.append(make_email('welcome', 1.0, subject='Welcome'))
+  arrive_later(server, make_email('code', 2.0, subject='Your code'))
+  with Sync('token', base_url=server.url) as client:
+    email = client.wait_for('alias', lambda email: email.subject == 'Your code', timeout=5, **FAST)
+  assert email.id == 'code'
+
+
+def test_wait_for_times_out(server, make_email):
+  server.emails.append(make_email('old', 1.0))
+  start = time.monotonic()
+  with Sync('token', base_url=server.url) as client:
+    with pytest.raises(TimeoutError):
+      client.wait_for('alias', timeout=0.3, skip_existing=True, **FAST)
+  assert 0.3 <= time.monotonic() - start < 2
+
+
+def test_watch_yields_each_email_once_until_timeout(server, make_email):
+  server.emails.extend([make_email('a', 1.0), make_email('b', 2.0)])
+  arrive_later(server, make_email('c', 3.0), delay=0.2)
+  with Sync('token', base_url=server.url) as client:
+    ids = [email.id for email in client.watch('alias', timeout=0.6, **FAST)]
+  assert ids == ['a', 'b', 'c']
+  assert len(server.requests) > 3
+
+
+def test_watch_backs_off_while_quiet(server):
+  with Sync('token', base_url=server.url) as client:
+    list(client.watch('alias', timeout=1.0, min_interval=0.2, max_interval=5))
+  # A fixed interval of at most 0.2 s would poll at least six times
+  assert len(server.requests) <= 5
+
+
+def test_async_wait_for_returns_new_arrival(server, make_email):
+  server.emails.append(make_email('old', 1.0))
+
+  async def main():
+    async with Async('token', base_url=server.url) as client:
+      arrive_later(server, make_email('new', 2.0))
+      return await client.wait_for('alias', timeout=5, skip_existing=True, **FAST)
+
+  assert asyncio.run(main()).id == 'new'
+
+
+def test_async_wait_for_times_out(server):
+  async def main():
+    async with Async('token', base_url=server.url) as client:
+      await client.wait_for('alias', timeout=0.3, **FAST)
+
+  with pytest.raises(TimeoutError):
+    asyncio.run(main())
+
+
+def test_wait_for_encrypted_inbox(server, keys, make_email):
+  server.emails.append(make_email('old', 1.0))
+  arrive_later(server, make_email('new', 2.0, subject='Secret'))
+  with Sync('token', keys[1], base_url=server.url) as client:
+    email = client.wait_for('alias', timeout=5, encrypted=True, skip_existing=True, **FAST)
+  assert (email.id, email.subject) == ('new', 'Secret')
+  assert server.requests[0]['alias'] == 'ALIAS'